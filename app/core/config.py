@@ -1,4 +1,4 @@
-from typing import List
+from typing import Dict, List
 from pydantic_settings import BaseSettings
 from pydantic import AnyHttpUrl
 
@@ -24,9 +24,104 @@ class Settings(BaseSettings):
     # OpenAI Configuration
     OPENAI_API_KEY: str
     OPENAI_MODEL: str = "gpt-4o-mini"
+    OPENAI_MAX_RETRIES: int = 2
+    # Prompt template versions (app/utils/prompts.py), e.g. {"generate_feedback": 1}; default newest
+    PROMPT_VERSIONS: Dict[str, int] = {}
     # File Upload Configuration
     UPLOAD_DIR: str = "uploads"
     MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10MB
+
+    # Upload originals are stored by content hash: "local" (under UPLOAD_DIR) or "s3"
+    BLOB_BACKEND: str = "local"
+    BLOB_S3_BUCKET: str = ""
+    BLOB_S3_ENDPOINT: str = ""  # e.g. http://localhost:9000 for MinIO
+    BLOB_S3_ACCESS_KEY: str = ""
+    BLOB_S3_SECRET_KEY: str = ""
+    BLOB_GC_GRACE_SECONDS: int = 24 * 3600
+    # Internal nginx location mapped to UPLOAD_DIR; when set, downloads are
+    # handed to nginx with X-Accel-Redirect so it serves them with sendfile
+    DOWNLOAD_ACCEL_PREFIX: str = ""
+
+    # Extracted text is stored compressed (migrations/submission_texts.sql)
+    TEXT_CODEC: str = "zlib"  # or "zstd" (needs zstandard)
+    TEXT_COMPRESSION_LEVEL: int = 6
+    TEXT_DICTIONARY_MAX_CHARS: int = 32 * 1024  # shorter texts use the shared dictionary
+
+    # Near-duplicate detection (MinHash + LSH)
+    MINHASH_NUM_PERM: int = 128
+    LSH_BANDS: int = 16  # 8 rows per band, candidate threshold ~0.7
+    SIMILARITY_THRESHOLD: float = 0.8
+    MINHASH_MIN_SHINGLES: int = 20  # shorter texts (e.g. scanned PDFs) are not checked
+
+    # Revision feedback falls back to full feedback above this changed share
+    REVISION_FULL_FEEDBACK_RATIO: float = 0.6
+
+    # Feedback notification stream (SSE)
+    SSE_HEARTBEAT_SECONDS: int = 15
+    SSE_TICKET_SECONDS: int = 30
+
+    # Gradebook export. Also the number of ids per in() filter, so keep
+    # request URLs short, and the page size for feedback and students
+    EXPORT_BATCH_SIZE: int = 100
+
+    # Responses larger than this are gzip-compressed
+    GZIP_MIN_SIZE: int = 1024
+
+    # Prometheus metrics at /metrics, for scrapers sending
+    # "Authorization: Bearer <METRICS_TOKEN>"; not served while it is unset
+    METRICS_ENABLED: bool = True
+    METRICS_TOKEN: str = ""
+
+    # AI job scheduler (per worker): concurrent provider calls, and per priority
+    # class the queue length and longest wait before a call is shed with a 503
+    AI_MAX_CONCURRENCY: int = 16
+    AI_QUEUE_LIMITS: Dict[str, int] = {"interactive": 200, "standard": 100, "bulk": 20}
+    AI_MAX_QUEUE_WAIT_SECONDS: Dict[str, float] = {"interactive": 30.0, "standard": 60.0, "bulk": 300.0}
+    AI_TENANT_WEIGHTS: Dict[str, float] = {}  # teacher id -> fair-share weight, default 1
+
+    # AI endpoint rate limits: token buckets refilled per minute, 0 disables a limit
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"  # "memory" (per worker) or "postgres" (shared, migrations/rate_limits.sql)
+    AI_USER_REQUESTS_PER_MINUTE: int = 10
+    AI_USER_TOKENS_PER_MINUTE: int = 20000
+    AI_CLASS_REQUESTS_PER_MINUTE: int = 120
+    AI_CLASS_TOKENS_PER_MINUTE: int = 200000
+    AI_COMPLETION_TOKEN_ESTIMATE: int = 600  # charged on top of the prompt estimate
+
+    # Cache: in-memory L1 per worker in front of a SQLite L2 shared by workers on the host
+    CACHE_L1_MAX_ENTRIES: int = 10000
+    CACHE_L2_PATH: str = "cache/cura-cache.sqlite3"  # empty keeps the cache per worker
+    CACHE_L2_MAX_BYTES: int = 256 * 1024 * 1024
+    CACHE_INVALIDATION_POLL_SECONDS: float = 0.5
+    TOKEN_CACHE_SECONDS: int = 300
+    STATEMENT_CACHE_SECONDS: int = 300
+    EXTRACTION_CACHE_SECONDS: int = 24 * 3600
+    FOLLOW_UP_CACHE_SECONDS: int = 24 * 3600
+    # Rephrased follow-up questions reuse an answer above this cosine similarity (per worker)
+    FOLLOW_UP_SIMILARITY_THRESHOLD: float = 0.85  # 1.0 limits reuse to exact matches
+    FOLLOW_UP_SEMANTIC_MAX_ENTRIES: int = 10000
+    FOLLOW_UP_SEMANTIC_MAX_PER_FEEDBACK: int = 50
+
+    # Logging: records are queued and written by a background thread
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"  # "json" lines or "text"
+    LOG_DEBUG_PER_SECOND: int = 20  # per call site; the excess is dropped and counted
+    LOG_QUEUE_SIZE: int = 10000  # records beyond this are dropped rather than blocking
+
+    # LLM usage ledger (migrations/llm_usage.sql), written in batches off the request path
+    LLM_USAGE_ENABLED: bool = True
+    LLM_USAGE_FLUSH_SECONDS: float = 5.0
+    LLM_USAGE_BATCH_SIZE: int = 500
+    LLM_USAGE_MAX_BUFFER: int = 20000  # entries kept while the database is unreachable
+
+    # Teachers with access to admin endpoints
+    ADMIN_EMAILS: List[str] = []
+
+    # Request profiling (pyinstrument, speedscope output)
+    PROFILE_SAMPLE_RATE: float = 0.0  # fraction of requests, 0 disables sampling
+    PROFILE_HEADER_TOKEN: str = ""  # X-Cura-Profile value that forces a profile
+    PROFILE_DIR: str = "profiles"
+    PROFILE_MAX_FILES: int = 200
     
     class Config:
         env_file = ".env"
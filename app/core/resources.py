@@ -0,0 +1,162 @@
+# app/core/resources.py
+import logging
+from typing import Any, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Resources:
+    """
+    Process-wide external resources, created once per worker.
+
+    The FastAPI lifespan opens them at startup and closes them on shutdown.
+    Accessors also create them on first use, so code running outside the
+    lifespan (scripts, a TestClient used without `with`) still works.
+    The heavy client libraries are only imported here, on first use.
+    """
+
+    def __init__(self):
+        self._supabase: Optional[Any] = None
+        self._supabase_auth: Optional[Any] = None
+        self._openai: Optional[Any] = None
+        self._cache: Optional[Any] = None
+        self._blob_store: Optional[Any] = None
+
+    @property
+    def supabase(self):
+        if self._supabase is None:
+            from supabase import create_client
+            from app.utils.metrics import instrument_supabase
+
+            self._supabase = instrument_supabase(
+                create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+            )
+        return self._supabase
+
+    @property
+    def supabase_auth(self):
+        # Signing in on a client makes its later queries run as that user,
+        # so sign-up and login get their own client that keeps no session
+        if self._supabase_auth is None:
+            from supabase import create_client
+            from supabase.lib.client_options import ClientOptions
+
+            self._supabase_auth = create_client(
+                settings.SUPABASE_URL,
+                settings.SUPABASE_KEY,
+                ClientOptions(persist_session=False, auto_refresh_token=False),
+            )
+        return self._supabase_auth
+
+    @property
+    def openai(self):
+        if self._openai is None:
+            from openai import OpenAI
+
+            # Retries are handled in openai_client._chat_completion so they can be counted
+            self._openai = OpenAI(api_key=settings.OPENAI_API_KEY, max_retries=0)
+        return self._openai
+
+    @property
+    def cache(self):
+        if self._cache is None:
+            from app.utils.cache import Cache, SQLiteBackend
+
+            l2 = None
+            if settings.CACHE_L2_PATH:
+                try:
+                    l2 = SQLiteBackend(settings.CACHE_L2_PATH, settings.CACHE_L2_MAX_BYTES)
+                except Exception as e:
+                    logger.error("Shared cache unavailable, using per-worker cache only: %s", e)
+            self._cache = Cache(
+                l2,
+                max_entries=settings.CACHE_L1_MAX_ENTRIES,
+                poll_interval=settings.CACHE_INVALIDATION_POLL_SECONDS,
+            )
+        return self._cache
+
+    @property
+    def blob_store(self):
+        if self._blob_store is None:
+            from app.utils.blob_store import LocalBlobStore, S3BlobStore
+
+            if settings.BLOB_BACKEND == "s3":
+                self._blob_store = S3BlobStore(
+                    settings.BLOB_S3_BUCKET,
+                    endpoint_url=settings.BLOB_S3_ENDPOINT,
+                    access_key=settings.BLOB_S3_ACCESS_KEY,
+                    secret_key=settings.BLOB_S3_SECRET_KEY,
+                )
+            else:
+                self._blob_store = LocalBlobStore(settings.UPLOAD_DIR)
+        return self._blob_store
+
+    def open(self) -> None:
+        # Touch each client so the first request doesn't pay for setup
+        self.supabase
+        self.supabase_auth
+        self.openai
+        self.cache
+        self.blob_store
+
+    def close(self) -> None:
+        if self._supabase is not None:
+            try:
+                self._supabase.postgrest.session.close()
+            except Exception as e:
+                logger.error("Error closing Supabase client: %s", e)
+            self._supabase = None
+        if self._supabase_auth is not None:
+            try:
+                self._supabase_auth.auth.close()
+            except Exception as e:
+                logger.error("Error closing Supabase auth client: %s", e)
+            self._supabase_auth = None
+        if self._openai is not None:
+            try:
+                self._openai.close()
+            except Exception as e:
+                logger.error("Error closing OpenAI client: %s", e)
+            self._openai = None
+        if self._cache is not None:
+            try:
+                self._cache.close()
+            except Exception as e:
+                logger.error("Error closing cache: %s", e)
+            self._cache = None
+        if self._blob_store is not None:
+            try:
+                self._blob_store.close()
+            except Exception as e:
+                logger.error("Error closing blob store: %s", e)
+            self._blob_store = None
+
+
+resources = Resources()
+
+
+def get_supabase():
+    """Dependency returning the shared Supabase client."""
+    return resources.supabase
+
+
+def get_supabase_auth():
+    """Dependency returning the Supabase client used for sign-up and login."""
+    return resources.supabase_auth
+
+
+def get_openai():
+    """Return the shared OpenAI client."""
+    return resources.openai
+
+
+def get_blob_store():
+    """Dependency returning the store for uploaded originals."""
+    return resources.blob_store
+
+
+def get_cache():
+    """Return the two-tier cache (per-worker L1, host-wide L2)."""
+    return resources.cache
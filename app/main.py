@@ -1,13 +1,45 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+import hmac
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import auth, upload, feedback, teacher, assignments, values
+from app.routes import auth, upload, feedback, teacher, assignments, values, search, admin
 from app.core.config import settings
+from app.core.resources import resources
+from app.utils.compression import SelectiveGZipMiddleware
+from app.utils.metrics import MetricsMiddleware, render_metrics
+from app.utils.profiling import ProfilingMiddleware
+from app.utils.notifications import get_broker
+from app.utils.usage_ledger import get_ledger
+from app.utils.structured_logging import RequestIdMiddleware, setup_logging, shutdown_logging
+from app.utils import rate_limit
 from app.routes.values import router as values_router
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create external clients once per worker and close them on shutdown."""
+    setup_logging(
+        settings.LOG_LEVEL,
+        settings.LOG_FORMAT,
+        settings.LOG_DEBUG_PER_SECOND,
+        settings.LOG_QUEUE_SIZE,
+    )
+    resources.open()
+    try:
+        yield
+    finally:
+        await get_broker().close()
+        await rate_limit.get_store().close()
+        await get_ledger().close()
+        resources.close()
+        shutdown_logging()
+
 app = FastAPI(
     title="Cura API",
     description="A feedback platform API for teachers and students",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 # Configure CORS
 app.add_middleware(
@@ -17,6 +49,24 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Compress large JSON payloads (e.g. long submission and feedback lists)
+app.add_middleware(
+    SelectiveGZipMiddleware,
+    minimum_size=settings.GZIP_MIN_SIZE,
+    excluded_paths=["/feedback/events", "/teacher/export", "/upload/original/"],
+)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+if settings.PROFILE_SAMPLE_RATE or settings.PROFILE_HEADER_TOKEN:
+    app.add_middleware(
+        ProfilingMiddleware,
+        profile_dir=settings.PROFILE_DIR,
+        sample_rate=settings.PROFILE_SAMPLE_RATE,
+        header_token=settings.PROFILE_HEADER_TOKEN,
+        max_files=settings.PROFILE_MAX_FILES,
+    )
+# Outermost, so everything below logs with the request id
+app.add_middleware(RequestIdMiddleware)
 
 # Include routers
 app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
@@ -25,7 +75,21 @@ app.include_router(feedback.router, prefix="/feedback", tags=["Feedback Generati
 app.include_router(teacher.router, prefix="/teacher", tags=["Teacher Operations"])
 app.include_router(assignments.router, prefix="/assignments", tags=["Student-Teacher Assignments"])
 app.include_router(values_router, prefix="/values", tags=["Weekly Statement"])
+app.include_router(search.router, prefix="/search", tags=["Search"])
+app.include_router(admin.router, prefix="/admin", tags=["Admin"])
 
 @app.get("/")
 async def root():
-    return {"message": "Welcome to Cura API"} 
+    return {"message": "Welcome to Cura API"}
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """Prometheus scrape endpoint, behind a shared bearer token."""
+    if not settings.METRICS_ENABLED or not settings.METRICS_TOKEN:
+        return Response(status_code=404)
+    expected = f"Bearer {settings.METRICS_TOKEN}"
+    if not hmac.compare_digest(request.headers.get("Authorization", "").encode(), expected.encode()):
+        return Response(status_code=401, headers={"WWW-Authenticate": "Bearer"})
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
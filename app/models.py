@@ -1,5 +1,5 @@
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from typing import List, Literal, Optional
 from pydantic import BaseModel, EmailStr
 
 class UserBase(BaseModel):
@@ -26,13 +26,33 @@ class SubmissionCreate(SubmissionBase):
     user_id: str
 
 class Submission(SubmissionBase):
+    # Only returned on upload; listings leave it out (see app/utils/text_codec.py)
+    extracted_text: Optional[str] = None
     id: str
     user_id: str
     created_at: datetime
+    near_duplicate_of: Optional[str] = None
+    revision_of: Optional[str] = None
+    word_count: Optional[int] = None
+    char_count: Optional[int] = None
+    page_count: Optional[int] = None
+    token_estimate: Optional[int] = None
+    language: Optional[str] = None
+    text_hash: Optional[str] = None
+    blob_sha256: Optional[str] = None
+    file_size: Optional[int] = None
+    content_type: Optional[str] = None
     
     class Config:
         from_attributes = True
 
+class SimilarSubmission(BaseModel):
+    submission_id: str
+    user_id: str
+    file_name: str
+    created_at: datetime
+    jaccard: float
+
 class FeedbackBase(BaseModel):
     feedback_text: str
     tone: str
@@ -69,8 +89,31 @@ class ValuesResponse(BaseModel):
 
 class ValuesResponseCreate(BaseModel):
     statement_id: str
-    stance: str
+    stance: Literal["for", "against"]  # values_stance_counts only accepts these
     response: str
 
 class ValuesReflection(BaseModel):
-    reflection: str 
+    reflection: str
+
+class ValuesStanceWeek(BaseModel):
+    week: str  # ISO week, e.g. "2024-W37"
+    week_start: date
+    for_count: int
+    against_count: int
+
+class ValuesStatementAnalytics(BaseModel):
+    statement_id: str
+    text: str
+    for_count: int
+    against_count: int
+    weeks: List[ValuesStanceWeek]
+
+class SearchResult(BaseModel):
+    kind: str  # "submission" or "feedback"
+    id: str
+    submission_id: str
+    student_id: str
+    file_name: str
+    created_at: datetime
+    rank: float
+    headline: str
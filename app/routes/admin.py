@@ -0,0 +1,84 @@
+import os
+import logging
+from typing import List, Literal, Optional
+from datetime import datetime, timedelta, timezone
+
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import FileResponse
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.routes.auth import get_current_user
+from app.utils.rbac import require_admin
+from app.utils.profiling import PROFILE_NAME_RE, list_profiles
+from app.core.resources import get_supabase
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+class ProfileInfo(BaseModel):
+    name: str
+    size: int
+    created_at: datetime
+
+
+class UsageReportRow(BaseModel):
+    key: str
+    calls: int
+    errors: int
+    prompt_tokens: int
+    completion_tokens: int
+    cached_tokens: int
+    avg_latency_ms: float
+    p95_latency_ms: float
+
+
+@router.get("/profiles", response_model=List[ProfileInfo])
+@require_admin
+async def get_profiles(current_user=Depends(get_current_user)):
+    """
+    Admin-only: list recent request profiles, newest first.
+    Open downloaded files at https://www.speedscope.app.
+    """
+    return [ProfileInfo(**p) for p in list_profiles(settings.PROFILE_DIR)]
+
+
+@router.get("/profiles/{name}")
+@require_admin
+async def download_profile(name: str, current_user=Depends(get_current_user)):
+    """Admin-only: download a single speedscope profile."""
+    if not PROFILE_NAME_RE.match(name):
+        raise HTTPException(400, "Invalid profile name")
+    path = os.path.join(settings.PROFILE_DIR, name)
+    if not os.path.isfile(path):
+        raise HTTPException(404, "Profile not found")
+    return FileResponse(path, media_type="application/json", filename=name)
+
+
+@router.get("/llm-usage", response_model=List[UsageReportRow])
+@require_admin
+async def get_llm_usage(
+    group_by: Literal["teacher", "feature", "endpoint", "model", "prompt", "user", "day"] = "teacher",
+    days: int = Query(30, ge=1, le=366),
+    teacher_id: Optional[str] = Query(None, description="Only calls made on this teacher's capacity"),
+    current_user=Depends(get_current_user),
+    supabase=Depends(get_supabase),
+):
+    """
+    Admin-only: LLM calls, tokens (with the prompt tokens served from the
+    provider's cache) and latency from the usage ledger over the last
+    `days` days, grouped by teacher, feature, endpoint, model, prompt
+    template version, user or day.
+    """
+    try:
+        since = datetime.now(timezone.utc) - timedelta(days=days)
+        resp = supabase.rpc("llm_usage_report", {
+            "p_group_by": group_by,
+            "p_since": since.isoformat(),
+            "p_teacher_id": teacher_id,
+        }).execute()
+        return [UsageReportRow(**row) for row in (resp.data or [])]
+    except Exception as e:
+        logger.error("Error building LLM usage report: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
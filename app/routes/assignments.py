@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
 from typing import List
 from pydantic import BaseModel
 from datetime import datetime
@@ -6,11 +6,11 @@ import logging
 
 from app.routes.auth import get_current_user
 from app.utils.rbac import require_teacher
-from supabase import create_client, Client
-from app.core.config import settings
+from app.utils.etag import collection_version, make_etag, etag_matches, not_modified, set_cache_headers
+from app.utils.rate_limit import class_cache_key
+from app.core.resources import get_supabase, get_cache
 
 router = APIRouter()
-supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
 logger = logging.getLogger(__name__)
 
 class Assignment(BaseModel):
@@ -30,7 +30,8 @@ async def ping():
 @require_teacher
 async def assign_student_to_teacher(
     student_id: str,
-    current_user=Depends(get_current_user)
+    current_user=Depends(get_current_user),
+    supabase=Depends(get_supabase),
 ):
     """Assign a student to the current teacher."""
     try:
@@ -61,6 +62,7 @@ async def assign_student_to_teacher(
         resp = supabase.table("student_teacher_assignments").insert(assignment_data).execute()
         
         if resp.data:
+            await get_cache().adelete(class_cache_key(student_id))
             return Assignment(**resp.data[0])
         raise HTTPException(500, "Failed to create assignment")
 
@@ -72,9 +74,24 @@ async def assign_student_to_teacher(
 
 @router.get("/my-students", response_model=List[Assignment])
 @require_teacher
-async def get_my_students(current_user=Depends(get_current_user)):
+async def get_my_students(
+    request: Request,
+    response: Response,
+    current_user=Depends(get_current_user),
+    supabase=Depends(get_supabase),
+):
     """Get all students assigned to the current teacher."""
     try:
+        version = collection_version(
+            supabase.table("student_teacher_assignments")
+            .select("created_at", count="exact")
+            .eq("teacher_id", current_user.id)
+        )
+        etag = make_etag("my-students", current_user.id, version)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        set_cache_headers(response, etag)
+
         resp = supabase.table("student_teacher_assignments") \
             .select("*") \
             .eq("teacher_id", current_user.id) \
@@ -89,7 +106,8 @@ async def get_my_students(current_user=Depends(get_current_user)):
 @require_teacher
 async def unassign_student(
     student_id: str,
-    current_user=Depends(get_current_user)
+    current_user=Depends(get_current_user),
+    supabase=Depends(get_supabase),
 ):
     """Remove a student assignment from the current teacher."""
     try:
@@ -101,6 +119,7 @@ async def unassign_student(
         
         if not resp.data:
             raise HTTPException(404, "Assignment not found")
+        await get_cache().adelete(class_cache_key(student_id))
         return {"message": "Assignment removed successfully"}
     except Exception as e:
         logger.error(f"Error unassigning student: {str(e)}", exc_info=True)
@@ -1,28 +1,28 @@
 # app/routes/auth.py
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Request, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from supabase import create_client, Client
 from typing import Optional
 from datetime import datetime
+import hashlib
 import logging
 
 from app.models import UserCreate, User
 from app.core.config import settings
+from app.core.resources import get_supabase_auth, get_cache
 from app.utils.jwt_handler import jwt_handler
+from app.utils.usage_ledger import set_caller
 
 router = APIRouter()
-supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 logger = logging.getLogger(__name__)
 
 
 @router.post("/signup", response_model=User)
-async def signup(user: UserCreate):
+async def signup(user: UserCreate, supabase=Depends(get_supabase_auth)):
     """
     Create a new user in Supabase Auth, storing `role` and `name` in user_metadata.
     """
     try:
-        logger.info(f"Signing up via Supabase at {settings.SUPABASE_URL}")
         auth_response = supabase.auth.sign_up({
             "email": user.email,
             "password": user.password,
@@ -50,12 +50,14 @@ async def signup(user: UserCreate):
 
 
 @router.post("/login")
-async def login(form_data: OAuth2PasswordRequestForm = Depends()):
+async def login(
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    supabase=Depends(get_supabase_auth),
+):
     """
     Authenticate against Supabase Auth and return a JWT access token.
     """
     try:
-        logger.info(f"Logging in via Supabase at {settings.SUPABASE_URL}")
         auth_response = supabase.auth.sign_in_with_password({
             "email": form_data.username,
             "password": form_data.password
@@ -80,10 +82,25 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
 
 
 @router.get("/me", response_model=User)
-async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
+async def get_current_user(request: Request, token: str = Depends(oauth2_scheme)) -> User:
     """
     Verify the JWT, extract user_metadata, and return the current User.
+    Also tags the request's LLM calls with the user and endpoint for the
+    usage ledger, so every authenticated route is attributed.
     """
+    user = await _user_from_token(token)
+    endpoint = request.scope.get("endpoint")
+    set_caller(user.id, getattr(endpoint, "__name__", request.url.path))
+    return user
+
+
+async def _user_from_token(token: str) -> User:
+    # Keyed by a hash so raw tokens never reach the shared cache
+    cache_key = f"user:{hashlib.sha256(token.encode()).hexdigest()}"
+    cached = await get_cache().aget(cache_key)
+    if cached is not None:
+        return User(**cached)
+
     try:
         payload = jwt_handler.verify_token(token)
 
@@ -96,13 +113,15 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
             raise HTTPException(status_code=401, detail="Token missing iat claim")
         created_at = datetime.fromtimestamp(iat)
 
-        return User(
+        user = User(
             id=user_meta["sub"],
             email=user_meta["email"],
             role=user_meta.get("role", "student"),
             name=user_meta.get("name", ""),
             created_at=created_at
         )
+        await get_cache().aset(cache_key, user.model_dump(mode="json"), settings.TOKEN_CACHE_SECONDS)
+        return user
 
     except HTTPException:
         raise
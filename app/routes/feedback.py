@@ -1,22 +1,38 @@
 # app/routes/feedback.py
 
-from fastapi import APIRouter, HTTPException, Depends
-from pydantic import BaseModel
-from typing import Optional, List
+from fastapi import APIRouter, HTTPException, Depends, Request, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, TypeAdapter
+from typing import Optional, List, Literal
 from datetime import datetime
+import asyncio
+import hashlib
+import json
+import secrets
 import logging 
 
-from app.models import Feedback as FeedbackModel, FeedbackCreate
+from app.models import Feedback as FeedbackModel, FeedbackCreate, User
 from app.routes.auth import get_current_user
-from app.utils.openai_client import generate_feedback, generate_follow_up_response
+from app.utils.openai_client import generate_feedback, generate_follow_up_response, generate_revision_feedback
+from app.utils.section_diff import diff_sections, changed_fraction, format_changes
+from app.utils.notifications import get_broker, notify_user, user_channel
+from app.utils.etag import collection_version, make_etag, etag_matches, not_modified, set_cache_headers
+from app.utils.serialization import validated_json_response
 from app.utils.rbac import require_teacher, require_teacher_or_student, require_student
-from supabase import create_client, Client
+from app.utils.rate_limit import rate_limited, charge_tokens
+from app.utils.ai_scheduler import tenant_for
+from app.utils.metrics import FOLLOW_UP_CACHE_LOOKUPS
+from app.utils.semantic_cache import get_semantic_cache
+from app.utils.text_stats import estimate_tokens, normalize_text
+from app.utils.text_codec import load_text, load_texts
 from app.core.config import settings
+from app.core.resources import get_supabase, get_cache
 
 router = APIRouter()
-supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
 logger = logging.getLogger(__name__)
 
+feedback_list_adapter = TypeAdapter(List[FeedbackModel])
+
 
 class GenerateFeedbackRequest(BaseModel):
     submission_id: str
@@ -24,6 +40,10 @@ class GenerateFeedbackRequest(BaseModel):
     grade: Optional[float] = None
     teacher_notes: str
     conciseness: str
+    # "revision" sends only the sections changed since the earlier draft
+    mode: Literal["full", "revision"] = "full"
+    # Scheduler class for the OpenAI call; batch grading should send "bulk"
+    priority: Literal["interactive", "standard", "bulk"] = "interactive"
 
 
 class FollowUpQuestionRequest(BaseModel):
@@ -31,40 +51,107 @@ class FollowUpQuestionRequest(BaseModel):
     question: str
 
 
+async def _generate_revision_feedback(
+    supabase,
+    submission: dict,
+    text: str,
+    payload: GenerateFeedbackRequest,
+    tenant: str,
+    priority: str,
+) -> Optional[str]:
+    """
+    Update the earlier draft's feedback using only the changed sections.
+    Returns None when full feedback should be generated instead.
+    """
+    previous_id = submission.get("revision_of")
+    if not previous_id:
+        raise HTTPException(status_code=400, detail="Submission is not a revision of an earlier submission")
+
+    previous_text = load_texts(supabase, [previous_id]).get(previous_id)
+    prior_fb_resp = (
+        supabase.table("feedback")
+        .select("feedback_text")
+        .eq("submission_id", previous_id)
+        .order("created_at", desc=True)
+        .limit(1)
+        .execute()
+    )
+    if previous_text is None or not prior_fb_resp.data:
+        logger.info("No prior feedback for %s, generating full feedback", previous_id)
+        return None
+
+    changes = diff_sections(previous_text, text)
+    fraction = changed_fraction(changes, text)
+    if fraction > settings.REVISION_FULL_FEEDBACK_RATIO:
+        logger.info("Revision changed %.0f%% of the text, generating full feedback", fraction * 100)
+        return None
+
+    logger.info("Revision feedback over %d changed sections (%.0f%% of text)", len(changes), fraction * 100)
+    return await generate_revision_feedback(
+        format_changes(changes) or "(no sections changed)",
+        prior_fb_resp.data[0]["feedback_text"],
+        payload.tone,
+        payload.teacher_notes,
+        payload.conciseness,
+        payload.grade,
+        priority=priority,
+        tenant=tenant,
+    )
+
+
 @router.post(
     "/generate",
     response_model=FeedbackModel,
 )
 @require_teacher
+@rate_limited
 async def generate_feedback_endpoint(
     payload: GenerateFeedbackRequest,
     current_user=Depends(get_current_user),
+    supabase=Depends(get_supabase),
 ):
     """
     Generate feedback for a submission. Only teachers can access this endpoint.
     """
     try:
-        # Fetch the submission text
+        # Fetch the submission and its text
         submission_resp = (
             supabase.table("submissions")
-            .select("*")
+            .select("id, user_id, revision_of, token_estimate")
             .eq("id", payload.submission_id)
             .execute()
         )
         if not submission_resp.data:
             raise HTTPException(status_code=404, detail="Submission not found")
 
-        text = submission_resp.data[0]["extracted_text"]
-
-        # Call OpenAI
-        feedback_text = await generate_feedback(
-            text,
-            payload.tone,
-            payload.teacher_notes,
-            payload.conciseness,
-            payload.grade,
+        submission = submission_resp.data[0]
+        text = load_text(supabase, submission["id"])
+        await charge_tokens(
+            current_user,
+            submission.get("token_estimate") or estimate_tokens(text or ""),
         )
 
+        # Call OpenAI. Revisions come in batches once a class resubmits, so
+        # they queue behind first drafts and students' questions
+        priority = payload.priority
+        if payload.mode == "revision" and priority == "interactive":
+            priority = "standard"
+        feedback_text = None
+        if payload.mode == "revision":
+            feedback_text = await _generate_revision_feedback(
+                supabase, submission, text, payload, current_user.id, priority
+            )
+        if feedback_text is None:
+            feedback_text = await generate_feedback(
+                text,
+                payload.tone,
+                payload.teacher_notes,
+                payload.conciseness,
+                payload.grade,
+                priority=priority,
+                tenant=current_user.id,
+            )
+
         # Insert into feedback table
         insert_resp = (
             supabase.table("feedback")
@@ -79,6 +166,12 @@ async def generate_feedback_endpoint(
 
         if insert_resp.data:
             row = insert_resp.data[0]
+            await notify_user(submission["user_id"], {
+                "type": "feedback.created",
+                "feedback_id": row["id"],
+                "submission_id": row["submission_id"],
+                "created_at": row["created_at"],
+            })
             return FeedbackModel(
                 id=row["id"],
                 submission_id=row["submission_id"],
@@ -103,15 +196,27 @@ async def generate_feedback_endpoint(
 )
 async def get_feedback_for_submission(
     submission_id: str,
+    request: Request,
     current_user=Depends(get_current_user),
+    supabase=Depends(get_supabase),
 ):
     """
     Get all feedback for a specific submission.
+    Supports conditional GET via ETag / If-None-Match.
     """
     if not current_user:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
     try:
+        version = collection_version(
+            supabase.table("feedback")
+            .select("created_at", count="exact")
+            .eq("submission_id", submission_id)
+        )
+        etag = make_etag("submission-feedback", submission_id, version)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
         resp = (
             supabase.table("feedback")
             # include submission_id so the FeedbackModel serializer won't complain
@@ -120,7 +225,9 @@ async def get_feedback_for_submission(
             .order("created_at", desc=False)
             .execute()
         )
-        return resp.data or []
+        response = validated_json_response(feedback_list_adapter, resp.data or [])
+        set_cache_headers(response, etag)
+        return response
     except Exception as e:
         logger.error(f"Error retrieving feedback: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -131,54 +238,117 @@ async def get_feedback_for_submission(
     response_model=List[FeedbackModel],
 )
 @require_student
-async def get_my_feedback(current_user=Depends(get_current_user)):
+async def get_my_feedback(
+    request: Request,
+    current_user=Depends(get_current_user),
+    supabase=Depends(get_supabase),
+):
     """
     Get all feedback for the current student's submissions.
     Only students can access this endpoint.
+    Supports conditional GET via ETag / If-None-Match.
     """
     try:
-        subs_resp = (
-            supabase.table("submissions")
-            .select("id")
-            .eq("user_id", current_user.id)
-            .execute()
+        # One query over feedback joined to the student's submissions
+        version = collection_version(
+            supabase.table("feedback")
+            .select("created_at, submissions!inner(user_id)", count="exact")
+            .eq("submissions.user_id", current_user.id)
         )
-        ids = [s["id"] for s in (subs_resp.data or [])]
-        if not ids:
-            return []
+        etag = make_etag("my-feedback", current_user.id, version)
+        if etag_matches(request, etag):
+            return not_modified(etag)
 
+        # The same join as the version query; the embedded submission is
+        # dropped when the rows are validated
         fb_resp = (
             supabase.table("feedback")
-            .select("submission_id, id, feedback_text, tone, grade, created_at")
-            .in_("submission_id", ids)
+            .select("submission_id, id, feedback_text, tone, grade, created_at, submissions!inner(user_id)")
+            .eq("submissions.user_id", current_user.id)
             .order("created_at", desc=False)
             .execute()
         )
 
-        return [
-            FeedbackModel(
-                id=f["id"],
-                submission_id=f["submission_id"],
-                feedback_text=f["feedback_text"],
-                tone=f["tone"],
-                grade=f.get("grade"),
-                created_at=f["created_at"],
-            )
-            for f in (fb_resp.data or [])
-        ]
+        response = validated_json_response(feedback_list_adapter, fb_resp.data or [])
+        set_cache_headers(response, etag)
+        return response
     except Exception as e:
         logger.error(f"Error retrieving user feedback: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _events_ticket_key(ticket: str) -> str:
+    return f"sse-ticket:{hashlib.sha256(ticket.encode()).hexdigest()}"
+
+
+@router.post("/events/ticket", response_model=dict)
+@require_student
+async def create_events_ticket(current_user=Depends(get_current_user)):
+    """
+    Issue a short-lived, single-use ticket for GET /feedback/events.
+    EventSource cannot set an Authorization header, and an access token
+    in the URL would end up in access logs.
+    """
+    ticket = secrets.token_urlsafe(32)
+    await get_cache().aset(
+        _events_ticket_key(ticket), current_user.model_dump(mode="json"), settings.SSE_TICKET_SECONDS,
+    )
+    return {"ticket": ticket, "expires_in": settings.SSE_TICKET_SECONDS}
+
+
+@router.get("/events")
+async def feedback_events(
+    request: Request,
+    ticket: Optional[str] = Query(None, description="From POST /feedback/events/ticket, for clients that cannot set headers (EventSource)"),
+):
+    """
+    Server-Sent Events stream notifying the current student when new
+    feedback is generated for one of their submissions. Replaces polling
+    GET /feedback/my-feedback.
+    """
+    auth_header = request.headers.get("Authorization", "")
+    if auth_header.lower().startswith("bearer "):
+        current_user = await get_current_user(request, auth_header[7:])
+    elif ticket:
+        cached = await get_cache().apop(_events_ticket_key(ticket))
+        if cached is None:
+            raise HTTPException(status_code=401, detail="Invalid or expired ticket")
+        current_user = User(**cached)
+    else:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    if current_user.role != "student":
+        raise HTTPException(status_code=403, detail="Access denied. This endpoint requires one of the following roles: student")
+
+    async def event_stream():
+        async with get_broker().subscribe(user_channel(current_user.id)) as queue:
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=settings.SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    # comment line keeps proxies from closing an idle stream
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {message['type']}\ndata: {json.dumps(message)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post(
     "/follow-up",
     response_model=dict,
 )
 @require_teacher_or_student
+@rate_limited
 async def ask_follow_up_question(
     payload: FollowUpQuestionRequest,
     current_user=Depends(get_current_user),
+    supabase=Depends(get_supabase),
 ):
     """
     Allow students to ask follow-up questions about feedback.
@@ -187,7 +357,7 @@ async def ask_follow_up_question(
         # Fetch submission
         sub_resp = (
             supabase.table("submissions")
-            .select("*")
+            .select("id, user_id")
             .eq("id", payload.submission_id)
             .execute()
         )
@@ -215,10 +385,29 @@ async def ask_follow_up_question(
 
         fb = fb_resp.data[0]
 
+        # The same question about the same feedback gets the same answer
+        question_hash = hashlib.sha256(normalize_text(payload.question).encode()).hexdigest()
+        cache_key = f"follow-up:{fb['id']}:{question_hash}"
+        response_text = await get_cache().aget(cache_key)
+        if response_text is not None:
+            FOLLOW_UP_CACHE_LOOKUPS.labels("exact_hit").inc()
+            return {"response": response_text}
+        # ...and a rephrasing of an answered question gets its answer
+        semantic_cache = get_semantic_cache()
+        response_text = semantic_cache.lookup(fb["id"], payload.question)
+        if response_text is not None:
+            return {"response": response_text}
+
+        await charge_tokens(current_user, estimate_tokens(fb["feedback_text"] + payload.question))
+
         # Call OpenAI follow-up
         response_text = await generate_follow_up_response(
-            submission["extracted_text"], fb["feedback_text"], payload.question
+            fb["feedback_text"],
+            payload.question,
+            tenant=await tenant_for(current_user),
         )
+        await get_cache().aset(cache_key, response_text, settings.FOLLOW_UP_CACHE_SECONDS)
+        semantic_cache.store(fb["id"], payload.question, response_text)
 
         # (Optional) store question/response here in DB...
 
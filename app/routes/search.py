@@ -0,0 +1,96 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import List, Optional
+from datetime import datetime
+import html
+import logging
+import re
+
+from app.models import SearchResult
+from app.routes.auth import get_current_user
+from app.utils.rbac import require_teacher
+from app.core.resources import get_supabase
+from app.utils.text_codec import load_texts
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+_TERM_RE = re.compile(r"\w+")
+_QUERY_OPERATORS = {"or", "and", "not"}
+
+
+def _headline(text: str, query: str, max_words: int = 30, max_fragments: int = 2) -> str:
+    """
+    Highlighted snippets of `text` around the query terms, in the format
+    ts_headline produces. Terms match by prefix, a rough stand-in for the
+    stemming the search index uses. The text is student-supplied or echoes
+    it, so it is HTML-escaped and only the <mark> tags are markup.
+    """
+    prefixes = [
+        term[:max(3, len(term) - 3)]
+        for term in (t.lower() for t in _TERM_RE.findall(query))
+        if term not in _QUERY_OPERATORS
+    ]
+    words = text.split()
+
+    def matches(word: str) -> bool:
+        bare = "".join(_TERM_RE.findall(word.lower()))
+        return any(bare.startswith(p) for p in prefixes)
+
+    fragments, covered_until = [], -1
+    for i, word in enumerate(words):
+        if len(fragments) == max_fragments:
+            break
+        if i <= covered_until or not matches(word):
+            continue
+        start = max(0, i - max_words // 3)
+        end = min(len(words), start + max_words)
+        fragments.append(" ".join(
+            f"<mark>{html.escape(w)}</mark>" if matches(w) else html.escape(w) for w in words[start:end]
+        ))
+        covered_until = end - 1
+    if not fragments:
+        return html.escape(" ".join(words[:max_words]))
+    return " ... ".join(fragments)
+
+
+@router.get("/", response_model=List[SearchResult])
+@require_teacher
+async def search_documents(
+    q: str = Query(..., min_length=1, description="Search terms (web search syntax)"),
+    student_id: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    current_user=Depends(get_current_user),
+    supabase=Depends(get_supabase),
+):
+    """
+    Teacher-only: full-text search across submission text and feedback.
+    Results are ranked and include a highlighted snippet.
+    """
+    try:
+        resp = supabase.rpc("search_documents", {
+            "search_query": q,
+            "filter_student_id": student_id,
+            "filter_date_from": date_from.isoformat() if date_from else None,
+            "filter_date_to": date_to.isoformat() if date_to else None,
+            "result_limit": limit,
+            "result_offset": offset,
+        }).execute()
+
+        rows = resp.data or []
+
+        # Headlines are built here, escaped: submission text is stored
+        # compressed, and feedback text is model output echoing the student's
+        texts = load_texts(supabase, [r["id"] for r in rows if r["kind"] == "submission"])
+        feedback_ids = [r["id"] for r in rows if r["kind"] == "feedback"]
+        if feedback_ids:
+            fb_resp = supabase.table("feedback").select("id, feedback_text").in_("id", feedback_ids).execute()
+            texts.update({r["id"]: r["feedback_text"] or "" for r in (fb_resp.data or [])})
+        for row in rows:
+            row["headline"] = _headline(texts.get(row["id"], ""), q)
+        return [SearchResult(**row) for row in rows]
+    except Exception as e:
+        logger.error("Error searching documents: %s", e, exc_info=True)
+        raise HTTPException(500, str(e))
@@ -1,38 +1,236 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import AsyncIterator, Callable, Dict, List, Literal, Optional
+import csv
+import io
+import zlib
+import orjson
 from app.routes.auth import get_current_user
 from app.utils.rbac import require_teacher
-from supabase import create_client, Client
+from app.utils.etag import collection_version, make_etag, etag_matches, not_modified, set_cache_headers
+from app.utils.serialization import trusted_json_response
 from app.core.config import settings
+from app.core.resources import get_supabase
 import logging
  
 router = APIRouter()
-supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
 logger = logging.getLogger(__name__)
 
 @router.get("/submissions")
 @require_teacher
-async def get_teacher_submissions(current_user=Depends(get_current_user)):
+async def get_teacher_submissions(
+    request: Request,
+    current_user=Depends(get_current_user),
+    supabase=Depends(get_supabase),
+):
     """
     Get all submissions with student names for teachers.
+    Supports conditional GET via ETag / If-None-Match.
     """
     if not current_user:
         raise HTTPException(401, "Not authenticated")
 
     try:
+        version = collection_version(
+            supabase.from_("submissions").select("created_at", count="exact")
+        )
+        etag = make_etag("teacher-submissions", version)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
         resp = supabase.from_("submissions") \
-            .select("id, file_name, created_at, users(name)") \
+            .select("id, file_name, created_at, word_count, page_count, token_estimate, language, users(name)") \
             .order("created_at", desc=True) \
             .execute()
 
-        return [
+        # Rows are built here in response shape, so there is nothing to validate
+        response = trusted_json_response([
             {
                 "id": s["id"],
                 "fileName": s["file_name"],
                 "submittedAt": s["created_at"],
-                "studentName": s["users"]["name"] if s.get("users") else "Unknown"
+                "studentName": s["users"]["name"] if s.get("users") else "Unknown",
+                "wordCount": s.get("word_count"),
+                "pageCount": s.get("page_count"),
+                "tokenEstimate": s.get("token_estimate"),
+                "language": s.get("language"),
             }
             for s in resp.data
-        ]
+        ])
+        set_cache_headers(response, etag)
+        return response
     except Exception as e:
         logger.error("Error retrieving teacher submissions", exc_info=e)
-        raise HTTPException(500, str(e)) 
+        raise HTTPException(500, str(e))
+
+
+EXPORT_COLUMNS = [
+    "student_id", "student_name", "submission_id", "file_name", "submitted_at",
+    "feedback_id", "feedback_created_at", "tone", "grade", "feedback_text",
+]
+
+
+def _fetch_all(query: Callable[[Optional[str]], object], page_size: int) -> List[Dict]:
+    """
+    Every row of an ordered query, read in range() pages. `query(count)`
+    builds the query with `count` passed to select(). PostgREST caps each
+    response at its max-rows setting, so paging continues until the exact
+    count from the first page is reached, and a shortfall raises.
+    """
+    resp = query("exact").range(0, page_size - 1).execute()
+    total = resp.count or 0
+    rows = list(resp.data or [])
+    while len(rows) < total:
+        page = query(None).range(len(rows), len(rows) + page_size - 1).execute().data or []
+        if not page:
+            break
+        rows.extend(page)
+    if len(rows) != total:
+        raise RuntimeError(f"Expected {total} rows, fetched {len(rows)}")
+    return rows
+
+
+def _fetch_submission_batch(supabase, student_ids: List[str], after: Optional[Dict]) -> List[Dict]:
+    """Next keyset page of submissions ordered by (created_at, id)."""
+    query = supabase.from_("submissions") \
+        .select("id, user_id, file_name, created_at, users(name)") \
+        .in_("user_id", student_ids)
+    if after:
+        ts, last_id = after["created_at"], after["id"]
+        query = query.or_(f'created_at.gt."{ts}",and(created_at.eq."{ts}",id.gt.{last_id})')
+    return query.order("created_at").order("id") \
+        .limit(settings.EXPORT_BATCH_SIZE) \
+        .execute().data or []
+
+
+def _fetch_feedback(supabase, submission_ids: List[str]) -> Dict[str, List[Dict]]:
+    rows = _fetch_all(
+        lambda count: supabase.table("feedback")
+        .select("id, submission_id, feedback_text, tone, grade, created_at", count=count)
+        .in_("submission_id", submission_ids)
+        .order("created_at")
+        .order("id"),
+        settings.EXPORT_BATCH_SIZE,
+    )
+    by_submission: Dict[str, List[Dict]] = {}
+    for f in rows:
+        by_submission.setdefault(f["submission_id"], []).append(f)
+    return by_submission
+
+
+async def _gradebook_rows(supabase, teacher_id: str) -> AsyncIterator[List[Dict]]:
+    """
+    Yield gradebook rows batch by batch, one row per feedback entry.
+    Students are taken EXPORT_BATCH_SIZE at a time, and each group's
+    submissions are in submission order.
+    """
+    assignments = await run_in_threadpool(
+        _fetch_all,
+        lambda count: supabase.table("student_teacher_assignments")
+        .select("student_id", count=count)
+        .eq("teacher_id", teacher_id)
+        .order("student_id"),
+        settings.EXPORT_BATCH_SIZE,
+    )
+    student_ids = [a["student_id"] for a in assignments]
+    for i in range(0, len(student_ids), settings.EXPORT_BATCH_SIZE):
+        async for rows in _student_group_rows(supabase, student_ids[i:i + settings.EXPORT_BATCH_SIZE]):
+            yield rows
+
+
+async def _student_group_rows(supabase, student_ids: List[str]) -> AsyncIterator[List[Dict]]:
+    after = None
+    while True:
+        # Runs until an empty page: a page can come back short of
+        # EXPORT_BATCH_SIZE when PostgREST's max-rows is lower
+        submissions = await run_in_threadpool(_fetch_submission_batch, supabase, student_ids, after)
+        if not submissions:
+            return
+        feedback = await run_in_threadpool(_fetch_feedback, supabase, [s["id"] for s in submissions])
+
+        rows = []
+        for s in submissions:
+            base = {
+                "student_id": s["user_id"],
+                "student_name": s["users"]["name"] if s.get("users") else "Unknown",
+                "submission_id": s["id"],
+                "file_name": s["file_name"],
+                "submitted_at": s["created_at"],
+            }
+            entries = feedback.get(s["id"]) or [None]
+            for f in entries:
+                rows.append({
+                    **base,
+                    "feedback_id": f["id"] if f else None,
+                    "feedback_created_at": f["created_at"] if f else None,
+                    "tone": f["tone"] if f else None,
+                    "grade": f["grade"] if f else None,
+                    "feedback_text": f["feedback_text"] if f else None,
+                })
+        yield rows
+        after = submissions[-1]
+
+
+async def _encode_rows(rows: AsyncIterator[List[Dict]], fmt: str) -> AsyncIterator[bytes]:
+    if fmt == "ndjson":
+        async for batch in rows:
+            yield b"".join(orjson.dumps(row) + b"\n" for row in batch)
+        return
+
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    yield buf.getvalue().encode("utf-8")
+    async for batch in rows:
+        buf.seek(0)
+        buf.truncate()
+        writer.writerows(batch)
+        yield buf.getvalue().encode("utf-8")
+
+
+async def _gzip_stream(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    async for chunk in chunks:
+        # Sync-flush each batch so the client gets it now, not once deflate's buffer fills
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+async def _log_errors(chunks: AsyncIterator[bytes], teacher_id: str) -> AsyncIterator[bytes]:
+    # The status line is already sent, so a failure can only cut the
+    # stream short; log it rather than leave a silently truncated file
+    try:
+        async for chunk in chunks:
+            yield chunk
+    except Exception:
+        logger.error("Error exporting gradebook for teacher %s", teacher_id, exc_info=True)
+        raise
+
+
+@router.get("/export")
+@require_teacher
+async def export_gradebook(
+    format: Literal["csv", "ndjson"] = Query("csv"),
+    gzip: bool = False,
+    current_user=Depends(get_current_user),
+    supabase=Depends(get_supabase),
+):
+    """
+    Teacher-only: stream every submission and feedback entry for the
+    teacher's assigned students as CSV or NDJSON, optionally gzipped.
+    Rows are read and sent in keyset batches, so memory stays flat.
+    """
+    body = _encode_rows(_gradebook_rows(supabase, current_user.id), format)
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"gradebook.{format}"
+    if gzip:
+        body = _gzip_stream(body)
+        media_type = "application/gzip"
+        filename += ".gz"
+
+    return StreamingResponse(
+        _log_errors(body, current_user.id),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
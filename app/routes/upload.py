@@ -1,34 +1,87 @@
-import os
 import logging
-from typing import List
+import mimetypes
+from typing import Iterable, List, Optional
 from datetime import datetime 
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, Request, Response
+from fastapi.responses import RedirectResponse
+from pydantic import TypeAdapter
+from starlette.concurrency import run_in_threadpool
 
-from supabase import create_client, Client
 
-from app.models import Submission, User
+from app.models import Submission, SimilarSubmission, User
 from app.core.config import settings
+from app.core.resources import get_supabase, get_cache, get_blob_store
 from app.routes.auth import get_current_user
-from app.utils.file_processor import extract_text_from_file
+from app.utils.file_processor import extract_text_and_page_count
 from app.utils.rbac import require_teacher, require_teacher_or_student
+from app.utils.similarity import minhash_signature, band_hashes, estimate_jaccard
+from app.utils.text_stats import compute_text_stats
+from app.utils.text_codec import save_text
+from app.utils.etag import CACHE_CONTROL, collection_version, make_etag, etag_matches, not_modified, set_cache_headers
+from app.utils.blob_store import shard_path
+from app.utils.file_response import RangeFileResponse, content_disposition
+from app.utils.serialization import validated_json_response
 
 router = APIRouter()
-supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
 logger = logging.getLogger(__name__)
 
-# Debug log
-logger.info(f"Upload router initialized with Supabase URL: {settings.SUPABASE_URL}")
+# Extracted text is stored compressed in its own table and never listed
+SUBMISSION_COLUMNS = ", ".join(f for f in Submission.model_fields if f != "extracted_text")
+submission_list_adapter = TypeAdapter(List[Submission])
 
-# Ensure upload dir exists
-os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+
+def find_similar_submissions(
+    supabase,
+    signature: List[int],
+    threshold: float,
+    exclude_ids: Iterable[str] = (),
+) -> List[SimilarSubmission]:
+    """
+    Look up submissions sharing at least one LSH band with the signature
+    and return those whose estimated Jaccard similarity passes threshold,
+    leaving out `exclude_ids`.
+    """
+    buckets = band_hashes(signature, settings.LSH_BANDS)
+    bucket_resp = supabase.table("submission_lsh_buckets") \
+        .select("submission_id") \
+        .in_("bucket", buckets) \
+        .execute()
+    candidate_ids = {r["submission_id"] for r in (bucket_resp.data or [])}
+    candidate_ids.difference_update(exclude_ids)
+    if not candidate_ids:
+        return []
+
+    sig_resp = supabase.table("submissions") \
+        .select("id, user_id, file_name, created_at, minhash_signature") \
+        .in_("id", list(candidate_ids)) \
+        .execute()
+
+    similar = []
+    for row in (sig_resp.data or []):
+        if not row.get("minhash_signature"):
+            continue
+        score = estimate_jaccard(signature, row["minhash_signature"])
+        if score >= threshold:
+            similar.append(SimilarSubmission(
+                submission_id=row["id"],
+                user_id=row["user_id"],
+                file_name=row["file_name"],
+                created_at=row["created_at"],
+                jaccard=score,
+            ))
+    similar.sort(key=lambda s: s.jaccard, reverse=True)
+    return similar
 
 
 @router.post("/", response_model=Submission)
 @require_teacher_or_student
 async def upload_document(
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_user)
+    revision_of: Optional[str] = Form(None),
+    current_user: User = Depends(get_current_user),
+    supabase=Depends(get_supabase),
+    blob_store=Depends(get_blob_store),
 ):
     allowed_types = [
         "application/pdf",
@@ -38,54 +91,134 @@ async def upload_document(
     if file.content_type not in allowed_types:
         raise HTTPException(400, "Invalid file type")
 
-    file_path = os.path.join(settings.UPLOAD_DIR, file.filename)
+    if revision_of:
+        previous = supabase.table("submissions") \
+            .select("id, user_id") \
+            .eq("id", revision_of) \
+            .execute()
+        if not previous.data:
+            raise HTTPException(404, "Original submission not found")
+        if current_user.role == "student" and previous.data[0]["user_id"] != current_user.id:
+            raise HTTPException(403, "Forbidden")
+
     try:
-        # save & extract
-        content = await file.read()
-        with open(file_path, "wb") as buf:
-            buf.write(content)
+        # store the original under its content hash (identical files share one blob)
+        digest, file_size = await run_in_threadpool(blob_store.put, file.file)
+        supabase.table("blobs").upsert({
+            "sha256": digest,
+            "size": file_size,
+            "content_type": file.content_type,
+            "last_seen_at": datetime.utcnow().isoformat(),
+        }, on_conflict="sha256").execute()
+
+        def extract():
+            with blob_store.local_copy(digest) as path:
+                return list(extract_text_and_page_count(path, file.content_type))
+
+        # Re-uploads of the same file reuse the earlier extraction
+        extracted_text, page_count = await get_cache().get_or_set(
+            f"extract:{digest}", extract, settings.EXTRACTION_CACHE_SECONDS,
+        )
+        stats = compute_text_stats(extracted_text, page_count)
 
-        extracted_text = extract_text_from_file(file_path, file.content_type)
+        # near-duplicate check against the LSH index; too little text to
+        # compare gets no signature. The submission this revises is not a
+        # duplicate, but resubmitting an earlier one is.
+        signature = await run_in_threadpool(
+            minhash_signature, extracted_text, settings.MINHASH_NUM_PERM,
+            min_shingles=settings.MINHASH_MIN_SHINGLES,
+        )
+        similar = []
+        if signature is not None:
+            similar = find_similar_submissions(
+                supabase, signature, settings.SIMILARITY_THRESHOLD,
+                exclude_ids=[revision_of] if revision_of else (),
+            )
+        near_duplicate_of = similar[0].submission_id if similar else None
+        if near_duplicate_of:
+            logger.warning(
+                "Upload by %s is a near-duplicate of submission %s (jaccard %.2f)",
+                current_user.id, near_duplicate_of, similar[0].jaccard,
+            )
 
-        # insert into Supabase
+        # insert into Supabase; the search trigger indexes extracted_text and
+        # clears it, the text itself is kept compressed in submission_texts
         response = supabase.table("submissions").insert({
             "user_id": current_user.id,
             "file_name": file.filename,
             "extracted_text": extracted_text,
+            "minhash_signature": signature,
+            "near_duplicate_of": near_duplicate_of,
+            "revision_of": revision_of,
+            "blob_sha256": digest,
+            "file_size": file_size,
+            "content_type": file.content_type,
+            **stats,
             "created_at": datetime.utcnow().isoformat()
         }).execute()
 
         if response.data:
             row = response.data[0]
+            try:
+                await run_in_threadpool(save_text, supabase, row["id"], extracted_text)
+            except Exception:
+                supabase.table("submissions").delete().eq("id", row["id"]).execute()
+                raise
+            if signature is not None:
+                supabase.table("submission_lsh_buckets").insert([
+                    {"bucket": bucket, "submission_id": row["id"]}
+                    for bucket in set(band_hashes(signature, settings.LSH_BANDS))
+                ]).execute()
+
             return Submission(
                 id=row["id"],
                 user_id=current_user.id,
                 file_name=file.filename,
                 extracted_text=extracted_text,
                 created_at=row["created_at"],
+                near_duplicate_of=near_duplicate_of,
+                revision_of=revision_of,
+                blob_sha256=digest,
+                file_size=file_size,
+                content_type=file.content_type,
+                **stats,
             )
 
         raise HTTPException(500, "Failed to create submission")
 
     except Exception as e:
-        # cleanup on error
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        # an unreferenced blob is reclaimed by the blob store's garbage collection
         logger.error("Error uploading document", exc_info=e)
         raise HTTPException(500, str(e))
 
 
 @router.get("/my-submissions")
-async def get_my_submissions(current_user=Depends(get_current_user)):
+async def get_my_submissions(
+    request: Request,
+    response: Response,
+    current_user=Depends(get_current_user),
+    supabase=Depends(get_supabase),
+):
     """
     Get all submissions for the current user.
+    Supports conditional GET via ETag / If-None-Match.
     """
     if not current_user:
         raise HTTPException(401, "Not authenticated")
 
     try:
+        version = collection_version(
+            supabase.table("submissions")
+            .select("created_at", count="exact")
+            .eq("user_id", current_user.id)
+        )
+        etag = make_etag("my-submissions", current_user.id, version)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        set_cache_headers(response, etag)
+
         resp = supabase.table("submissions").select(
-            "id, file_name, created_at"
+            "id, file_name, created_at, word_count, page_count, token_estimate, language"
         ).eq("user_id", current_user.id).order("created_at", desc=True).execute()
 
         return [
@@ -93,6 +226,10 @@ async def get_my_submissions(current_user=Depends(get_current_user)):
                 "id": s["id"],
                 "documentName": s["file_name"],
                 "submittedAt": s["created_at"],
+                "wordCount": s.get("word_count"),
+                "pageCount": s.get("page_count"),
+                "tokenEstimate": s.get("token_estimate"),
+                "language": s.get("language"),
             }
             for s in resp.data
         ]
@@ -103,23 +240,126 @@ async def get_my_submissions(current_user=Depends(get_current_user)):
 
 @router.get("/all-submissions", response_model=List[Submission])
 @require_teacher
-async def get_all_submissions(current_user: User = Depends(get_current_user)):
+async def get_all_submissions(
+    current_user: User = Depends(get_current_user),
+    supabase=Depends(get_supabase),
+):
     """
     Teacher-only: return every submission in the system.
     """
     try:
-        resp = supabase.table("submissions").select("*").execute()
-        data = resp.data or []
-        return [
-            Submission(
-                id=item["id"],
-                user_id=item["user_id"],
-                file_name=item["file_name"],
-                extracted_text=item["extracted_text"],
-                created_at=item["created_at"],
-            )
-            for item in data
-        ]
+        # explicit columns: select("*") would also ship search vectors and signatures
+        resp = supabase.table("submissions").select(SUBMISSION_COLUMNS).execute()
+        return validated_json_response(submission_list_adapter, resp.data or [])
     except Exception as e:
         logger.error("Error retrieving all submissions", exc_info=e)
         raise HTTPException(500, str(e))
+
+
+@router.get("/similar/{submission_id}", response_model=List[SimilarSubmission])
+@require_teacher
+async def get_similar_submissions(
+    submission_id: str,
+    threshold: Optional[float] = None,
+    current_user: User = Depends(get_current_user),
+    supabase=Depends(get_supabase),
+):
+    """
+    Teacher-only: list submissions similar to the given one, with
+    estimated Jaccard similarity. Defaults to SIMILARITY_THRESHOLD.
+    """
+    try:
+        resp = supabase.table("submissions") \
+            .select("id, minhash_signature") \
+            .eq("id", submission_id) \
+            .execute()
+        if not resp.data:
+            raise HTTPException(404, "Submission not found")
+
+        signature = resp.data[0].get("minhash_signature")
+        if not signature:
+            return []
+
+        return find_similar_submissions(
+            supabase,
+            signature,
+            settings.SIMILARITY_THRESHOLD if threshold is None else threshold,
+            exclude_ids=[submission_id],
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error retrieving similar submissions", exc_info=e)
+        raise HTTPException(500, str(e))
+
+
+@router.get("/original/{submission_id}")
+@require_teacher_or_student
+async def download_original(
+    submission_id: str,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    supabase=Depends(get_supabase),
+    blob_store=Depends(get_blob_store),
+):
+    """
+    Serve the originally uploaded file. Students can only fetch their own
+    submissions. Supports Range requests (PDF viewers load pages as needed)
+    and conditional GETs; the file is streamed, never loaded into memory.
+    """
+    try:
+        resp = supabase.table("submissions") \
+            .select("id, user_id, file_name, created_at, blob_sha256, content_type") \
+            .eq("id", submission_id) \
+            .execute()
+        if not resp.data:
+            raise HTTPException(404, "Submission not found")
+
+        submission = resp.data[0]
+        if current_user.role == "student" and submission["user_id"] != current_user.id:
+            raise HTTPException(403, "Forbidden")
+
+        digest = submission.get("blob_sha256")
+        if not digest:
+            raise HTTPException(404, "Original file not available for this submission")
+
+        file_name = submission["file_name"]
+        media_type = (
+            submission.get("content_type")
+            or mimetypes.guess_type(file_name)[0]
+            or "application/octet-stream"
+        )
+
+        path = blob_store.local_path(digest)
+        if path is None:
+            url = blob_store.url(digest, file_name, media_type)
+            if url is None:
+                raise HTTPException(404, "Original file not found")
+            return RedirectResponse(url, status_code=307)
+
+        # Content-addressed, so the hash is a strong validator
+        etag = f'"{digest}"'
+        if settings.DOWNLOAD_ACCEL_PREFIX:
+            return Response(
+                media_type=media_type,
+                headers={
+                    "X-Accel-Redirect": f"{settings.DOWNLOAD_ACCEL_PREFIX.rstrip('/')}/{shard_path(digest)}",
+                    "Content-Disposition": content_disposition(file_name),
+                    "ETag": etag,
+                    "Cache-Control": CACHE_CONTROL,
+                },
+            )
+        return RangeFileResponse(
+            path,
+            request,
+            etag=etag,
+            last_modified=datetime.fromisoformat(submission["created_at"]),
+            media_type=media_type,
+            filename=file_name,
+            headers={"Cache-Control": CACHE_CONTROL},
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error serving original document", exc_info=e)
+        raise HTTPException(500, str(e))
@@ -1,23 +1,38 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import Literal
-from datetime import datetime, timedelta
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import List, Literal
+from datetime import datetime, timedelta, timezone
 import logging
 from uuid import UUID 
 
-from app.models import ValuesStatement, ValuesResponse, ValuesResponseCreate, ValuesReflection
+from app.models import ValuesStatement, ValuesResponse, ValuesResponseCreate, ValuesReflection, ValuesStatementAnalytics
 from app.routes.auth import get_current_user
-from app.utils.rbac import require_student
+from app.utils.rbac import require_student, require_teacher
+from app.utils import values_analytics
+from app.utils.rate_limit import rate_limited, charge_tokens
+from app.utils.ai_scheduler import tenant_for
+from app.utils.text_stats import estimate_tokens
 from app.utils.openai_client import generate_reflection
-from supabase import create_client, Client
 from app.core.config import settings
+from app.core.resources import get_supabase, get_cache
 
 router = APIRouter()
-supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
 logger = logging.getLogger(__name__)
 
+
+async def _statement_catalog(supabase):
+    """All statements; the catalog rarely changes, so it is cached."""
+    return await get_cache().get_or_set(
+        "values:statements",
+        lambda: supabase.table("value_statements").select("*").execute().data or None,
+        settings.STATEMENT_CACHE_SECONDS,
+    )
+
 @router.get("/next-statement", response_model=ValuesStatement)
 @require_student
-async def get_next_statement(current_user=Depends(get_current_user)):
+async def get_next_statement(
+    current_user=Depends(get_current_user),
+    supabase=Depends(get_supabase),
+):
     """
     Get the next values statement for the current student.
     Ensures one statement per student per week.
@@ -26,12 +41,9 @@ async def get_next_statement(current_user=Depends(get_current_user)):
         # Get the current week's start (Monday)
         today = datetime.now()
         week_start = today - timedelta(days=today.weekday())
-        logger.info(f"Week start: {week_start}")
         
-        # Get all statements
-        statements_resp = supabase.table("value_statements").select("*").execute()
-        logger.info(f"Found {len(statements_resp.data) if statements_resp.data else 0} statements")
-        if not statements_resp.data:
+        statements = await _statement_catalog(supabase)
+        if not statements:
             raise HTTPException(404, "No values statements found")
         
         # Get student's responses for this week
@@ -40,15 +52,16 @@ async def get_next_statement(current_user=Depends(get_current_user)):
             .eq("user_id", current_user.id) \
             .gte("created_at", week_start.isoformat()) \
             .execute()
-        logger.info(f"Found {len(responses_resp.data) if responses_resp.data else 0} responses this week")
         
         # Get IDs of statements the student has already responded to this week
         responded_ids = {r["statement_id"] for r in (responses_resp.data or [])}
-        logger.info(f"Responded to statement IDs: {responded_ids}")
         
         # Filter out statements the student has already responded to
-        available_statements = [s for s in statements_resp.data if s["id"] not in responded_ids]
-        logger.info(f"Available statements: {len(available_statements)}")
+        available_statements = [s for s in statements if s["id"] not in responded_ids]
+        logger.debug(
+            "Next statement for %s: %d of %d available since %s",
+            current_user.id, len(available_statements), len(statements), week_start,
+        )
         
         if not available_statements:
             raise HTTPException(404, "No new statements available this week")
@@ -56,7 +69,6 @@ async def get_next_statement(current_user=Depends(get_current_user)):
         # Select the first available statement
         # In a production environment, you might want to use a more sophisticated selection algorithm
         selected_statement = available_statements[0]
-        logger.info(f"Selected statement: {selected_statement}")
         
         # Check if the column is named 'text' or 'statement'
         statement_text = selected_statement.get("text") or selected_statement.get("statement")
@@ -69,7 +81,6 @@ async def get_next_statement(current_user=Depends(get_current_user)):
             id=selected_statement["id"],
             text=statement_text
         )
-        logger.info(f"Returning statement: {response_obj}")
         
         return response_obj
         
@@ -81,9 +92,11 @@ async def get_next_statement(current_user=Depends(get_current_user)):
 
 @router.post("/respond", response_model=ValuesReflection)
 @require_student
+@rate_limited
 async def submit_response(
     response: ValuesResponseCreate,
-    current_user=Depends(get_current_user)
+    current_user=Depends(get_current_user),
+    supabase=Depends(get_supabase),
 ):
     """
     Submit a response to a values statement and get a reflection.
@@ -104,6 +117,9 @@ async def submit_response(
         if not statement_text:
             logger.error(f"Statement text not found in columns: {list(statement.keys())}")
             raise HTTPException(500, "Statement text not found in database")
+
+        # Charge before saving so a rejected request leaves no orphaned response
+        await charge_tokens(current_user, estimate_tokens(statement_text + response.response))
         
         # Insert the response
         response_data = {
@@ -122,7 +138,8 @@ async def submit_response(
         reflection_text = await generate_reflection(
             statement_text=statement_text,
             stance=response.stance,
-            response_text=response.response
+            response_text=response.response,
+            tenant=await tenant_for(current_user),
         )
         
         return ValuesReflection(reflection=reflection_text)
@@ -133,8 +150,35 @@ async def submit_response(
         logger.error(f"Error submitting response: {str(e)}", exc_info=True)
         raise HTTPException(500, str(e))
 
+@router.get("/analytics", response_model=List[ValuesStatementAnalytics])
+@require_teacher
+async def get_values_analytics(
+    weeks: int = Query(12, ge=1, le=104, description="Number of ISO weeks to include, ending with the current one"),
+    current_user=Depends(get_current_user),
+    supabase=Depends(get_supabase),
+):
+    """
+    How the teacher's students split for and against each statement, in
+    total and per ISO week. Reads the pre-aggregated counts, so the cost
+    does not grow with the number of responses.
+    """
+    try:
+        today = datetime.now(timezone.utc).date()
+        since = values_analytics.week_start(today) - timedelta(weeks=weeks - 1)
+        rows = values_analytics.fetch_counts(supabase, current_user.id, since)
+        if not rows:
+            return []
+        statements = await _statement_catalog(supabase) or []
+        return values_analytics.summarize(rows, statements)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error getting values analytics: %s", e, exc_info=True)
+        raise HTTPException(500, str(e))
+
 @router.get("/ping")
-async def ping():
+async def ping(supabase=Depends(get_supabase)):
     """
     Simple endpoint to check if the values router is working.
     Also checks the structure of the values table.
@@ -142,12 +186,11 @@ async def ping():
     try:
         # Check if the value_statements table exists and has data
         statements_resp = supabase.table("value_statements").select("*").execute()
-        logger.info(f"Value statements table structure: {statements_resp.data[0] if statements_resp.data else 'No data'}")
         
         # Check the column names
         if statements_resp.data and len(statements_resp.data) > 0:
             first_statement = statements_resp.data[0]
-            logger.info(f"Column names in value_statements table: {list(first_statement.keys())}")
+            logger.debug("Columns in value_statements table: %s", list(first_statement))
             
             # Check if 'text' column exists
             if 'text' not in first_statement:
@@ -0,0 +1,174 @@
+# app/utils/ai_scheduler.py
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, List, Optional
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.models import User
+from app.utils.metrics import AI_JOBS_SHED, AI_QUEUE_DEPTH, AI_QUEUE_WAIT
+
+# Highest priority first
+PRIORITIES = ("interactive", "standard", "bulk")
+
+
+@dataclass(order=True)
+class _Waiter:
+    tag: float
+    seq: int
+    future: asyncio.Future = field(compare=False)
+    tenant: str = field(compare=False)
+
+
+class AIScheduler:
+    """
+    Admission and ordering for provider calls within one worker.
+
+    At most `max_concurrency` calls run at once. When all slots are busy,
+    callers queue by priority class: a free slot always goes to the highest
+    non-empty class. Within a class, tenants (teachers) share slots by
+    weighted fair queuing (start-time tags), so one teacher's grading rush
+    can't starve another's students. A class whose queue is full, or whose
+    caller has waited longer than its limit, is shed with a 503, which is
+    how low-priority work gives way under load.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        queue_limits: Dict[str, int],
+        max_wait: Dict[str, float],
+        tenant_weights: Optional[Dict[str, float]] = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.queue_limits = queue_limits
+        self.max_wait = max_wait
+        self.tenant_weights = tenant_weights or {}
+        self.active = 0
+        self._queues: Dict[str, List[_Waiter]] = {p: [] for p in PRIORITIES}
+        self._waiting: Dict[str, int] = {p: 0 for p in PRIORITIES}
+        self._virtual_time: Dict[str, float] = {p: 0.0 for p in PRIORITIES}
+        self._last_tag: Dict[str, Dict[str, float]] = {p: {} for p in PRIORITIES}
+        self._seq = itertools.count()
+
+    def queued(self, priority: str) -> int:
+        return self._waiting[priority]
+
+    def _shed(self, priority: str, reason: str) -> HTTPException:
+        AI_JOBS_SHED.labels(priority, reason).inc()
+        return HTTPException(
+            status_code=503,
+            detail="The AI service is busy. Please try again shortly.",
+            headers={"Retry-After": "5"},
+        )
+
+    def _enqueue(self, priority: str, tenant: str) -> _Waiter:
+        weight = self.tenant_weights.get(tenant, 1.0)
+        tags = self._last_tag[priority]
+        tag = max(self._virtual_time[priority], tags.get(tenant, 0.0)) + 1.0 / weight
+        tags[tenant] = tag
+        waiter = _Waiter(tag, next(self._seq), asyncio.get_running_loop().create_future(), tenant)
+        heapq.heappush(self._queues[priority], waiter)
+        self._waiting[priority] += 1
+        AI_QUEUE_DEPTH.labels(priority).inc()
+        return waiter
+
+    def _abandon(self, priority: str, waiter: _Waiter) -> None:
+        # Left in the heap and skipped when popped
+        waiter.future.cancel()
+        self._waiting[priority] -= 1
+        AI_QUEUE_DEPTH.labels(priority).dec()
+
+    def _dispatch(self) -> None:
+        while self.active < self.max_concurrency:
+            waiter = self._next_waiter()
+            if waiter is None:
+                return
+            self.active += 1
+            waiter.future.set_result(None)
+
+    def _next_waiter(self) -> Optional[_Waiter]:
+        for priority in PRIORITIES:
+            queue = self._queues[priority]
+            while queue:
+                waiter = heapq.heappop(queue)
+                if waiter.future.done():
+                    continue
+                self._waiting[priority] -= 1
+                AI_QUEUE_DEPTH.labels(priority).dec()
+                self._virtual_time[priority] = waiter.tag
+                if not queue:
+                    # idle class: forget tags so they can't grow without bound
+                    self._last_tag[priority].clear()
+                return waiter
+        return None
+
+    def _release(self) -> None:
+        self.active -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, priority: str = "interactive", tenant: str = "") -> AsyncIterator[None]:
+        """Hold one of the concurrency slots for the duration of the block."""
+        if priority not in self._queues:
+            raise ValueError(f"Unknown AI priority class: {priority}")
+        started = time.perf_counter()
+        if self.active < self.max_concurrency and not any(self._waiting.values()):
+            self.active += 1
+        else:
+            if self.queued(priority) >= self.queue_limits.get(priority, 0):
+                raise self._shed(priority, "queue_full")
+            waiter = self._enqueue(priority, tenant)
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter.future), self.max_wait.get(priority, 30.0))
+            except asyncio.TimeoutError:
+                if waiter.future.done():
+                    # granted just as the wait expired; hand the slot back
+                    self._release()
+                else:
+                    self._abandon(priority, waiter)
+                raise self._shed(priority, "wait_timeout")
+            except asyncio.CancelledError:
+                if waiter.future.done():
+                    self._release()
+                else:
+                    self._abandon(priority, waiter)
+                raise
+        AI_QUEUE_WAIT.labels(priority).observe(time.perf_counter() - started)
+        try:
+            yield
+        finally:
+            self._release()
+
+
+_scheduler: Optional[AIScheduler] = None
+
+
+def get_scheduler() -> AIScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = AIScheduler(
+            settings.AI_MAX_CONCURRENCY,
+            settings.AI_QUEUE_LIMITS,
+            settings.AI_MAX_QUEUE_WAIT_SECONDS,
+            settings.AI_TENANT_WEIGHTS,
+        )
+    return _scheduler
+
+
+def set_scheduler(scheduler: AIScheduler) -> None:
+    global _scheduler
+    _scheduler = scheduler
+
+
+async def tenant_for(user: User) -> str:
+    """The teacher whose share of AI capacity this user's requests use."""
+    from app.utils.rate_limit import class_ids
+
+    teacher_ids = await class_ids(user)
+    return teacher_ids[0] if teacher_ids else user.id
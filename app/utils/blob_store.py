@@ -0,0 +1,258 @@
+# app/utils/blob_store.py
+import hashlib
+import os
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def shard_path(digest: str) -> str:
+    """
+    Relative path of a blob: two levels of 256 directories, so a few
+    million blobs leave only tens of entries per leaf directory.
+    """
+    return os.path.join(digest[:2], digest[2:4], digest)
+
+
+def _copy_hashing(src: BinaryIO, dst: BinaryIO) -> Tuple[str, int]:
+    sha = hashlib.sha256()
+    size = 0
+    while True:
+        chunk = src.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        sha.update(chunk)
+        dst.write(chunk)
+        size += len(chunk)
+    return sha.hexdigest(), size
+
+
+class BlobStore:
+    """
+    Content-addressed storage for uploaded originals, keyed by SHA-256.
+
+    Identical content is stored once. Reference counts live in the `blobs`
+    table (migrations/blob_store.sql); unreferenced blobs are removed by
+    `python -m app.utils.blob_store --gc`, not on the request path.
+    """
+
+    def put(self, src: BinaryIO) -> Tuple[str, int]:
+        """Store the stream's content; returns (sha256 hex digest, size)."""
+        raise NotImplementedError
+
+    def exists(self, digest: str) -> bool:
+        raise NotImplementedError
+
+    def local_path(self, digest: str) -> Optional[str]:
+        """Filesystem path of the blob if the backend has one, for sendfile."""
+        return None
+
+    def url(self, digest: str, filename: str, content_type: str) -> Optional[str]:
+        """A short-lived URL clients can download the blob from directly, if supported."""
+        return None
+
+    @contextmanager
+    def local_copy(self, digest: str) -> Iterator[str]:
+        """A filesystem path holding the blob for the duration of the block."""
+        raise NotImplementedError
+
+    def open(self, digest: str) -> BinaryIO:
+        raise NotImplementedError
+
+    def delete(self, digest: str, older_than: Optional[float] = None) -> bool:
+        """
+        Delete the blob, unless it was written or re-uploaded after
+        `older_than` (a timestamp). Returns whether it was deleted.
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release connections held by the backend."""
+        pass
+
+
+class LocalBlobStore(BlobStore):
+    """
+    Blobs under `root` in sharded directories. Writes go to `root/tmp` and
+    are renamed into place, so readers never see a partial file, and a
+    duplicate upload only touches the existing blob's mtime.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.tmp_dir = os.path.join(root, "tmp")
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.root, shard_path(digest))
+
+    def put(self, src: BinaryIO) -> Tuple[str, int]:
+        tmp_path = os.path.join(self.tmp_dir, uuid.uuid4().hex)
+        try:
+            with open(tmp_path, "wb") as dst:
+                digest, size = _copy_hashing(src, dst)
+                dst.flush()
+                os.fsync(dst.fileno())
+            final_path = self.path(digest)
+            if os.path.exists(final_path):
+                # Refresh mtime so garbage collection leaves it alone
+                os.utime(final_path)
+            else:
+                os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                os.replace(tmp_path, final_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return digest, size
+
+    def exists(self, digest: str) -> bool:
+        return os.path.exists(self.path(digest))
+
+    def local_path(self, digest: str) -> Optional[str]:
+        path = self.path(digest)
+        return path if os.path.exists(path) else None
+
+    @contextmanager
+    def local_copy(self, digest: str) -> Iterator[str]:
+        yield self.path(digest)
+
+    def open(self, digest: str) -> BinaryIO:
+        return open(self.path(digest), "rb")
+
+    def delete(self, digest: str, older_than: Optional[float] = None) -> bool:
+        path = self.path(digest)
+        try:
+            if older_than is not None and os.path.getmtime(path) > older_than:
+                return False
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+
+class S3BlobStore(BlobStore):
+    """
+    Blobs in an S3-compatible bucket (MinIO, Ceph, AWS), under the same
+    sharded keys. Needs boto3, which is only imported when this backend is
+    configured.
+    """
+
+    def __init__(self, bucket: str, endpoint_url: Optional[str] = None,
+                 access_key: Optional[str] = None, secret_key: Optional[str] = None,
+                 spool_dir: Optional[str] = None):
+        try:
+            import boto3
+        except ImportError as e:
+            raise RuntimeError("BLOB_BACKEND=s3 requires boto3 (pip install boto3)") from e
+        self.bucket = bucket
+        self.spool_dir = spool_dir
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url or None,
+            aws_access_key_id=access_key or None,
+            aws_secret_access_key=secret_key or None,
+        )
+
+    def _exists(self, key: str) -> Optional[dict]:
+        from botocore.exceptions import ClientError
+
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    def put(self, src: BinaryIO) -> Tuple[str, int]:
+        # The key depends on the hash, so spool to disk first
+        with tempfile.TemporaryFile(dir=self.spool_dir) as spool:
+            digest, size = _copy_hashing(src, spool)
+            key = shard_path(digest)
+            if self._exists(key) is not None:
+                # Refresh last-modified so garbage collection leaves it alone
+                self.client.copy_object(
+                    Bucket=self.bucket, Key=key, CopySource={"Bucket": self.bucket, "Key": key},
+                    MetadataDirective="REPLACE",
+                )
+            else:
+                spool.seek(0)
+                self.client.upload_fileobj(spool, self.bucket, key)
+        return digest, size
+
+    def exists(self, digest: str) -> bool:
+        return self._exists(shard_path(digest)) is not None
+
+    def url(self, digest: str, filename: str, content_type: str) -> Optional[str]:
+        # The object store handles Range requests itself
+        from app.utils.file_response import content_disposition
+
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": shard_path(digest),
+                "ResponseContentType": content_type,
+                "ResponseContentDisposition": content_disposition(filename),
+            },
+            ExpiresIn=300,
+        )
+
+    @contextmanager
+    def local_copy(self, digest: str) -> Iterator[str]:
+        with tempfile.NamedTemporaryFile(dir=self.spool_dir) as tmp:
+            self.client.download_fileobj(self.bucket, shard_path(digest), tmp)
+            tmp.flush()
+            yield tmp.name
+
+    def open(self, digest: str) -> BinaryIO:
+        return self.client.get_object(Bucket=self.bucket, Key=shard_path(digest))["Body"]
+
+    def delete(self, digest: str, older_than: Optional[float] = None) -> bool:
+        head = self._exists(shard_path(digest))
+        if head is None:
+            return False
+        if older_than is not None and head["LastModified"].timestamp() > older_than:
+            return False
+        self.client.delete_object(Bucket=self.bucket, Key=shard_path(digest))
+        return True
+
+    def close(self) -> None:
+        self.client.close()
+
+
+def collect_garbage(supabase, store: BlobStore, grace_seconds: float) -> int:
+    """
+    Delete blobs no submission references any more. A blob must have been
+    unreferenced, and untouched on disk, for `grace_seconds`, so an upload
+    that is re-using it right now is never affected.
+    """
+    cutoff = time.time() - grace_seconds
+    deleted = 0
+    # Rows are removed first; a file touched since then is kept and its
+    # uploader re-creates the row
+    resp = supabase.rpc("claim_unreferenced_blobs", {"grace_seconds": grace_seconds}).execute()
+    for row in resp.data or []:
+        if store.delete(row["sha256"], older_than=cutoff):
+            deleted += 1
+    return deleted
+
+
+if __name__ == "__main__":
+    import argparse
+    import logging
+
+    from app.core.config import settings
+    from app.core.resources import resources
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Blob store maintenance")
+    parser.add_argument("--gc", action="store_true", help="delete unreferenced blobs")
+    args = parser.parse_args()
+
+    if args.gc:
+        count = collect_garbage(resources.supabase, resources.blob_store, settings.BLOB_GC_GRACE_SECONDS)
+        logging.info("Deleted %d unreferenced blobs", count)
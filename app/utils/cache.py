@@ -0,0 +1,453 @@
+# app/utils/cache.py
+import asyncio
+import inspect
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+import orjson
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+Loader = Callable[[], Union[Any, Awaitable[Any]]]
+
+
+class CacheBackend:
+    """
+    Shared (L2) cache storage, visible to every worker.
+
+    Values are opaque bytes. Besides get/set/delete a backend provides a
+    per-key lock for stampede protection and an invalidation log so each
+    worker can evict stale entries from its local tier. A network backend
+    (Redis, memcached) implements the same methods.
+    """
+
+    def get(self, key: str) -> Optional[Tuple[bytes, float]]:
+        """The stored value and its remaining TTL in seconds, or None."""
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        """Store the entry and record an invalidation, since it may replace a value other workers hold."""
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        """Remove the entry and record an invalidation for other workers."""
+        raise NotImplementedError
+
+    def pop(self, key: str) -> Optional[bytes]:
+        """Atomically remove the entry and return its value if it hadn't expired."""
+        raise NotImplementedError
+
+    def invalidations_since(self, last_id: int) -> Tuple[int, List[str]]:
+        """Keys invalidated after `last_id`, and the newest id seen."""
+        raise NotImplementedError
+
+    def latest_invalidation(self) -> int:
+        """Id of the newest invalidation, so a new worker starts from there."""
+        return 0
+
+    def try_lock(self, key: str, ttl: float) -> bool:
+        raise NotImplementedError
+
+    def unlock(self, key: str) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    L2 tier in a SQLite file shared by the workers on one host (WAL mode,
+    so readers never block the writer). Total value size is kept under
+    `max_bytes` by dropping the entries closest to expiry; reads never
+    write, so hits stay cheap under concurrency.
+    """
+
+    _MAINTENANCE_EVERY = 200  # sets between expiry/size sweeps
+    _INVALIDATION_RETENTION = 3600.0
+
+    def __init__(self, path: str, max_bytes: int, clock: Callable[[], float] = time.time):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._sets = 0
+        self._conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_entries_expires_at ON entries(expires_at);
+            CREATE TABLE IF NOT EXISTS invalidations (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                key TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS locks (
+                key TEXT PRIMARY KEY,
+                expires_at REAL NOT NULL
+            );
+        """)
+
+    def get(self, key: str) -> Optional[Tuple[bytes, float]]:
+        now = self._clock()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM entries WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+        return (row[0], row[1] - now) if row else None
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        with self._lock:
+            now = self._clock()
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, size, expires_at) VALUES (?, ?, ?, ?)",
+                    (key, value, len(value), now + ttl),
+                )
+                self._conn.execute("INSERT INTO invalidations (key, created_at) VALUES (?, ?)", (key, now))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._sets += 1
+            if self._sets % self._MAINTENANCE_EVERY == 0 or len(value) > self.max_bytes // 10:
+                self._maintain()
+
+    def _maintain(self) -> None:
+        now = self._clock()
+        self._conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+        self._conn.execute("DELETE FROM locks WHERE expires_at <= ?", (now,))
+        self._conn.execute(
+            "DELETE FROM invalidations WHERE created_at <= ?", (now - self._INVALIDATION_RETENTION,)
+        )
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Evict down to 90% so the next few sets don't trigger another sweep
+        excess = total - int(self.max_bytes * 0.9)
+        evict = []
+        for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY expires_at"):
+            evict.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", evict)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._conn.execute(
+                    "INSERT INTO invalidations (key, created_at) VALUES (?, ?)", (key, self._clock())
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def pop(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            now = self._clock()
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "DELETE FROM entries WHERE key = ? RETURNING value, expires_at", (key,)
+                ).fetchone()
+                self._conn.execute("INSERT INTO invalidations (key, created_at) VALUES (?, ?)", (key, now))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return row[0] if row and row[1] > now else None
+
+    def invalidations_since(self, last_id: int) -> Tuple[int, List[str]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, key FROM invalidations WHERE id > ? ORDER BY id", (last_id,)
+            ).fetchall()
+        if not rows:
+            return last_id, []
+        return rows[-1][0], [key for _, key in rows]
+
+    def latest_invalidation(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM invalidations").fetchone()[0]
+
+    def try_lock(self, key: str, ttl: float) -> bool:
+        now = self._clock()
+        with self._lock:
+            self._conn.execute("DELETE FROM locks WHERE key = ? AND expires_at <= ?", (key, now))
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO locks (key, expires_at) VALUES (?, ?)", (key, now + ttl)
+            )
+            return cursor.rowcount == 1
+
+    def unlock(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM locks WHERE key = ?", (key,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class Cache:
+    """
+    Two-tier cache: a per-worker in-memory LRU (L1) in front of an optional
+    shared backend (L2).
+
+    Values must be JSON-serializable (they are stored with orjson in L2)
+    and are returned as-is from L1, so callers must not mutate them. `None`
+    is never cached. `set` and `delete` broadcast an invalidation that
+    every worker applies to its L1 within `poll_interval` seconds, so an
+    overwritten or deleted value is not served stale until its TTL.
+
+    L2 calls are blocking I/O (`set` may wait on another worker's write
+    lock), so coroutines use the `a`-prefixed methods: they read L1 in
+    place and run L2 calls in the threadpool.
+    """
+
+    def __init__(
+        self,
+        l2: Optional[CacheBackend] = None,
+        max_entries: int = 10_000,
+        default_ttl: float = 300.0,
+        poll_interval: float = 0.5,
+        lock_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.l2 = l2
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.poll_interval = poll_interval
+        self.lock_timeout = lock_timeout
+        self._clock = clock
+        self._l1: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._loading: Dict[str, asyncio.Lock] = {}
+        self._last_poll = clock()
+        self._last_invalidation = 0
+        if l2 is not None:
+            self._last_invalidation = l2.latest_invalidation()
+
+    def _poll_due(self) -> bool:
+        now = self._clock()
+        if self.l2 is None or now - self._last_poll < self.poll_interval:
+            return False
+        self._last_poll = now
+        return True
+
+    def _apply_invalidations(self, found: Tuple[int, List[str]]) -> None:
+        self._last_invalidation, keys = found
+        for key in keys:
+            self._l1.pop(key, None)
+
+    def _sync_invalidations(self) -> None:
+        if not self._poll_due():
+            return
+        try:
+            found = self.l2.invalidations_since(self._last_invalidation)
+        except Exception as e:
+            logger.error("Error reading cache invalidations: %s", e)
+            return
+        self._apply_invalidations(found)
+
+    async def _async_sync_invalidations(self) -> None:
+        if not self._poll_due():
+            return
+        try:
+            found = await run_in_threadpool(self.l2.invalidations_since, self._last_invalidation)
+        except Exception as e:
+            logger.error("Error reading cache invalidations: %s", e)
+            return
+        self._apply_invalidations(found)
+
+    def _set_l1(self, key: str, value: Any, ttl: float) -> None:
+        self._l1[key] = (self._clock() + ttl, value)
+        self._l1.move_to_end(key)
+        while len(self._l1) > self.max_entries:
+            self._l1.popitem(last=False)
+
+    def _get_l1(self, key: str) -> Optional[Any]:
+        entry = self._l1.get(key)
+        if entry is None:
+            return None
+        if entry[0] > self._clock():
+            self._l1.move_to_end(key)
+            return entry[1]
+        del self._l1[key]
+        return None
+
+    def _from_l2(self, key: str, found: Optional[Tuple[bytes, float]]) -> Optional[Any]:
+        if found is None:
+            return None
+        value = orjson.loads(found[0])
+        self._set_l1(key, value, found[1])
+        return value
+
+    def _get_l2(self, key: str) -> Optional[Any]:
+        if self.l2 is None:
+            return None
+        try:
+            found = self.l2.get(key)
+        except Exception as e:
+            logger.error("Error reading shared cache: %s", e)
+            return None
+        return self._from_l2(key, found)
+
+    async def _aget_l2(self, key: str) -> Optional[Any]:
+        if self.l2 is None:
+            return None
+        try:
+            found = await run_in_threadpool(self.l2.get, key)
+        except Exception as e:
+            logger.error("Error reading shared cache: %s", e)
+            return None
+        return self._from_l2(key, found)
+
+    def get(self, key: str) -> Optional[Any]:
+        self._sync_invalidations()
+        value = self._get_l1(key)
+        return value if value is not None else self._get_l2(key)
+
+    async def aget(self, key: str) -> Optional[Any]:
+        await self._async_sync_invalidations()
+        value = self._get_l1(key)
+        return value if value is not None else await self._aget_l2(key)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        if value is None:
+            return
+        ttl = self.default_ttl if ttl is None else ttl
+        self._set_l1(key, value, ttl)
+        if self.l2 is not None:
+            try:
+                self.l2.set(key, orjson.dumps(value), ttl)
+            except Exception as e:
+                logger.error("Error writing shared cache: %s", e)
+
+    async def aset(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        if value is None:
+            return
+        ttl = self.default_ttl if ttl is None else ttl
+        self._set_l1(key, value, ttl)
+        if self.l2 is not None:
+            try:
+                await run_in_threadpool(self.l2.set, key, orjson.dumps(value), ttl)
+            except Exception as e:
+                logger.error("Error writing shared cache: %s", e)
+
+    def delete(self, key: str) -> None:
+        self._l1.pop(key, None)
+        if self.l2 is not None:
+            try:
+                self.l2.delete(key)
+            except Exception as e:
+                logger.error("Error invalidating shared cache: %s", e)
+
+    async def adelete(self, key: str) -> None:
+        self._l1.pop(key, None)
+        if self.l2 is not None:
+            try:
+                await run_in_threadpool(self.l2.delete, key)
+            except Exception as e:
+                logger.error("Error invalidating shared cache: %s", e)
+
+    async def apop(self, key: str) -> Optional[Any]:
+        """
+        Remove and return the value. With a shared backend only one worker
+        gets it, which makes the cache usable for single-use tokens.
+        """
+        value = self._get_l1(key)
+        self._l1.pop(key, None)
+        if self.l2 is None:
+            return value
+        try:
+            found = await run_in_threadpool(self.l2.pop, key)
+        except Exception as e:
+            logger.error("Error invalidating shared cache: %s", e)
+            return None
+        return orjson.loads(found) if found is not None else None
+
+    async def get_or_set(self, key: str, loader: Loader, ttl: Optional[float] = None) -> Any:
+        """
+        Return the cached value, or load, cache and return it. Concurrent
+        misses for the same key run `loader` once per host: callers in this
+        worker wait on a local lock, other workers wait for the L2 entry.
+        A sync `loader` runs in the threadpool.
+        """
+        value = await self.aget(key)
+        if value is not None:
+            return value
+
+        lock = self._loading.setdefault(key, asyncio.Lock())
+        try:
+            async with lock:
+                value = await self.aget(key)
+                if value is not None:
+                    return value
+                return await self._load(key, loader, ttl)
+        finally:
+            # Waiters keep their reference; later misses start a fresh lock
+            if self._loading.get(key) is lock:
+                del self._loading[key]
+
+    async def _load(self, key: str, loader: Loader, ttl: Optional[float]) -> Any:
+        locked = False
+        if self.l2 is not None:
+            try:
+                locked = await run_in_threadpool(self.l2.try_lock, key, self.lock_timeout)
+            except Exception as e:
+                logger.error("Error taking shared cache lock: %s", e)
+            if not locked:
+                value = await self._wait_for_l2(key)
+                if value is not None:
+                    return value
+        try:
+            if inspect.iscoroutinefunction(loader):
+                value = await loader()
+            else:
+                # Sync loaders (text extraction, Supabase queries) block
+                value = await run_in_threadpool(loader)
+                if inspect.isawaitable(value):
+                    value = await value
+            await self.aset(key, value, ttl)
+            return value
+        finally:
+            if locked:
+                try:
+                    await run_in_threadpool(self.l2.unlock, key)
+                except Exception as e:
+                    logger.error("Error releasing shared cache lock: %s", e)
+
+    async def _wait_for_l2(self, key: str) -> Optional[Any]:
+        """Poll L2 while another worker loads the key, up to `lock_timeout`."""
+        deadline = self._clock() + self.lock_timeout
+        delay = 0.01
+        while self._clock() < deadline:
+            await asyncio.sleep(delay)
+            value = await self._aget_l2(key)
+            if value is not None:
+                return value
+            delay = min(delay * 2, 0.2)
+        return None
+
+    def close(self) -> None:
+        self._l1.clear()
+        if self.l2 is not None:
+            self.l2.close()
@@ -0,0 +1,23 @@
+# app/utils/compression.py
+from typing import Iterable
+
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class SelectiveGZipMiddleware:
+    """
+    GZip responses above `minimum_size`, except on paths that stream
+    (SSE, where compression would buffer events) or compress themselves.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, excluded_paths: Iterable[str] = ()):
+        self.app = app
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size)
+        self.excluded_paths = tuple(excluded_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and not scope["path"].startswith(self.excluded_paths):
+            await self.gzip(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
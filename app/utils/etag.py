@@ -0,0 +1,52 @@
+# app/utils/etag.py
+import hashlib
+from typing import Any
+
+from fastapi import Request, Response
+
+# Clients may keep a copy but must revalidate it, which costs one cheap
+# version query and a bodiless 304 when nothing changed.
+CACHE_CONTROL = "private, no-cache"
+
+
+def collection_version(query: Any) -> str:
+    """
+    Summarize a listing as "<row count>:<latest created_at>" with a single
+    query. `query` must be a select on created_at with count="exact" and
+    the same filters as the listing itself.
+    """
+    resp = query.order("created_at", desc=True).limit(1).execute()
+    latest = resp.data[0]["created_at"] if resp.data else ""
+    return f"{resp.count}:{latest}"
+
+
+def make_etag(*parts: Any) -> str:
+    """Build a weak ETag from the listing scope and its version."""
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+    return f'W/"{digest[:20]}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Weak comparison of the ETag against the request's If-None-Match."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+
+def set_cache_headers(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
@@ -1,6 +1,6 @@
-import pdfplumber
-from docx import Document
-from typing import Optional 
+import time
+from typing import List, Optional, Tuple
+from app.utils.metrics import EXTRACTION_DURATION, page_bucket
 
 def extract_text_from_file(file_path: str, content_type: str) -> str:
     """
@@ -13,28 +13,54 @@ def extract_text_from_file(file_path: str, content_type: str) -> str:
     Returns:
         Extracted text content as string
     """
+    return extract_text_and_page_count(file_path, content_type)[0]
+
+def extract_text_and_page_count(file_path: str, content_type: str) -> Tuple[str, Optional[int]]:
+    """
+    Extract text content and, for paginated formats (PDF), the page count.
+    
+    Args:
+        file_path: Path to the uploaded file
+        content_type: MIME type of the file
+        
+    Returns:
+        Tuple of (extracted text, page count or None)
+    """
+    started = time.perf_counter()
     try:
         if content_type == "application/pdf":
-            return extract_text_from_pdf(file_path)
+            pages = extract_pages_from_pdf(file_path)
+            text, page_count = "\n".join(pages), len(pages)
         elif content_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-            return extract_text_from_docx(file_path)
+            text, page_count = extract_text_from_docx(file_path), None
         elif content_type == "text/plain":
-            return extract_text_from_txt(file_path)
+            text, page_count = extract_text_from_txt(file_path), None
         else:
             raise ValueError(f"Unsupported file type: {content_type}")
     except Exception as e:
         raise Exception(f"Error extracting text from file: {str(e)}")
 
-def extract_text_from_pdf(file_path: str) -> str:
-    """Extract text from PDF file using pdfplumber."""
+    EXTRACTION_DURATION.labels(content_type, page_bucket(page_count)).observe(time.perf_counter() - started)
+    return text, page_count
+
+def extract_pages_from_pdf(file_path: str) -> List[str]:
+    """Extract the text of each PDF page using pdfplumber."""
+    import pdfplumber
+
     text = []
     with pdfplumber.open(file_path) as pdf:
         for page in pdf.pages:
             text.append(page.extract_text() or "")
-    return "\n".join(text)
+    return text
+
+def extract_text_from_pdf(file_path: str) -> str:
+    """Extract text from PDF file using pdfplumber."""
+    return "\n".join(extract_pages_from_pdf(file_path))
 
 def extract_text_from_docx(file_path: str) -> str:
     """Extract text from DOCX file using python-docx."""
+    from docx import Document
+
     doc = Document(file_path)
     return "\n".join([paragraph.text for paragraph in doc.paragraphs])
 
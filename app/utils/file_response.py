@@ -0,0 +1,141 @@
+# app/utils/file_response.py
+import os
+import re
+from datetime import datetime
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional, Tuple
+from urllib.parse import quote
+
+import anyio
+from fastapi import Request
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from app.utils.etag import etag_matches
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range `Range` header into inclusive (start, end).
+
+    Returns None when the whole file should be sent (no header, a syntax we
+    don't serve such as multiple ranges). Raises ValueError when the range
+    is unsatisfiable.
+    """
+    if not header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("range not satisfiable")
+    return start, end
+
+
+def content_disposition(filename: str, inline: bool = True) -> str:
+    kind = "inline" if inline else "attachment"
+    ascii_name = filename.encode("ascii", "ignore").decode().replace('"', "") or "download"
+    return f"{kind}; filename=\"{ascii_name}\"; filename*=UTF-8''{quote(filename)}"
+
+
+class RangeFileResponse(Response):
+    """
+    Serve part or all of a file from disk in fixed-size chunks, so memory
+    stays flat regardless of file size. Handles conditional requests
+    (If-None-Match, If-Modified-Since, If-Range) and single byte ranges.
+    """
+
+    chunk_size = 64 * 1024
+
+    def __init__(
+        self,
+        path: str,
+        request: Request,
+        etag: str,
+        last_modified: datetime,
+        media_type: str,
+        filename: str,
+        headers: Optional[dict] = None,
+    ):
+        self.path = path
+        size = os.stat(path).st_size
+        self.start, self.length = 0, size
+        common = {
+            "ETag": etag,
+            "Last-Modified": formatdate(last_modified.timestamp(), usegmt=True),
+            "Accept-Ranges": "bytes",
+            **(headers or {}),
+        }
+
+        if self._not_modified(request, etag, last_modified):
+            super().__init__(status_code=304, headers=common)
+            self.length = 0
+            return
+
+        status = 200
+        range_header = request.headers.get("range")
+        if_range = request.headers.get("if-range")
+        if if_range and if_range.strip() != etag:
+            # The client's copy is stale: send the whole new file
+            range_header = None
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            super().__init__(status_code=416, headers={**common, "Content-Range": f"bytes */{size}"})
+            self.length = 0
+            return
+        if byte_range is not None:
+            status = 206
+            self.start, end = byte_range
+            self.length = end - self.start + 1
+            common["Content-Range"] = f"bytes {self.start}-{end}/{size}"
+
+        super().__init__(
+            status_code=status,
+            media_type=media_type,
+            headers={**common, "Content-Disposition": content_disposition(filename)},
+        )
+        self.headers["content-length"] = str(self.length)
+
+    @staticmethod
+    def _not_modified(request: Request, etag: str, last_modified: datetime) -> bool:
+        if request.headers.get("if-none-match"):
+            return etag_matches(request, etag)
+        since = request.headers.get("if-modified-since")
+        if since:
+            try:
+                return int(last_modified.timestamp()) <= int(parsedate_to_datetime(since).timestamp())
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"] == "HEAD" or self.length == 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+        remaining = self.length
+        async with await anyio.open_file(self.path, "rb") as f:
+            await f.seek(self.start)
+            while remaining > 0:
+                chunk = await f.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            # File shrank underneath us; close the response cleanly
+            await send({"type": "http.response.body", "body": b""})
@@ -18,10 +18,6 @@ class JWTHandler:
     def verify_token(self, token: str) -> Dict[str, Any]:
         """Verify and decode the JWT token using HS256, but ignore expiration."""
         try:
-            logger.info(f"JWT secret being used: {settings.SUPABASE_JWT_SECRET[:8]}...")
-            logger.info(f"JWT issuer: {self.issuer}")
-            logger.info(f"JWT audience: {self.audience}")
-
             # Decode and verify the token, but turn off expiry verification
             payload = jwt.decode(
                 token,
@@ -36,7 +32,7 @@ class JWTHandler:
             return payload
 
         except jwt.InvalidTokenError as e:
-            logger.error(f"Invalid token: {e}")
+            logger.warning("Invalid token: %s", e)
             raise HTTPException(status_code=401, detail="Invalid token")
 
         except Exception as e:
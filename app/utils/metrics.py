@@ -0,0 +1,213 @@
+# app/utils/metrics.py
+import os
+import time
+from typing import Any, Dict, Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+HTTP_REQUEST_DURATION = Histogram(
+    "cura_http_request_duration_seconds",
+    "HTTP request latency by route template, method and status",
+    ["route", "method", "status"],
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "cura_http_requests_in_flight",
+    "HTTP requests currently being handled",
+    multiprocess_mode="livesum",
+)
+
+SUPABASE_QUERY_DURATION = Histogram(
+    "cura_supabase_query_duration_seconds",
+    "Supabase (PostgREST) query latency by table and operation",
+    ["table", "operation"],
+)
+SUPABASE_QUERY_ERRORS = Counter(
+    "cura_supabase_query_errors_total",
+    "Supabase queries that returned an error status",
+    ["table", "operation"],
+)
+
+LLM_CALL_DURATION = Histogram(
+    "cura_llm_call_duration_seconds",
+    "OpenAI chat completion latency by calling function",
+    ["function", "model"],
+    buckets=(0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120),
+)
+LLM_TOKENS = Counter(
+    "cura_llm_tokens_total",
+    "Tokens used by OpenAI calls",
+    ["function", "model", "kind"],
+)
+LLM_RETRIES = Counter(
+    "cura_llm_retries_total",
+    "OpenAI call retries by calling function",
+    ["function"],
+)
+LLM_ERRORS = Counter(
+    "cura_llm_errors_total",
+    "OpenAI calls that failed after all retries",
+    ["function"],
+)
+LLM_CALLS_IN_FLIGHT = Gauge(
+    "cura_llm_calls_in_flight",
+    "OpenAI calls currently waiting on the provider",
+    multiprocess_mode="livesum",
+)
+AI_QUEUE_WAIT = Histogram(
+    "cura_ai_queue_wait_seconds",
+    "Time AI calls waited for a scheduler slot, by priority class",
+    ["priority"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+AI_QUEUE_DEPTH = Gauge(
+    "cura_ai_queue_depth",
+    "AI calls waiting for a scheduler slot, by priority class",
+    ["priority"],
+    multiprocess_mode="livesum",
+)
+AI_JOBS_SHED = Counter(
+    "cura_ai_jobs_shed_total",
+    "AI calls rejected by scheduler admission control",
+    ["priority", "reason"],
+)
+RATE_LIMITED = Counter(
+    "cura_rate_limited_total",
+    "AI requests rejected by rate limits, by bucket kind (requests or tokens)",
+    ["kind"],
+)
+FOLLOW_UP_CACHE_LOOKUPS = Counter(
+    "cura_follow_up_cache_lookups_total",
+    "Follow-up question cache lookups by result (exact_hit, semantic_hit, miss)",
+    ["result"],
+)
+FOLLOW_UP_CACHE_SIMILARITY = Histogram(
+    "cura_follow_up_cache_similarity",
+    "Best similarity between a follow-up question and cached questions on the same feedback",
+    buckets=(0.3, 0.5, 0.6, 0.7, 0.75, 0.8, 0.85, 0.9, 0.95, 0.99, 1.0),
+)
+
+EXTRACTION_DURATION = Histogram(
+    "cura_text_extraction_duration_seconds",
+    "Text extraction time by content type and page count bucket",
+    ["content_type", "pages"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+_SUPABASE_OPERATIONS = {"GET": "select", "POST": "insert", "PATCH": "update", "DELETE": "delete", "HEAD": "count"}
+
+
+def page_bucket(pages: Optional[int]) -> str:
+    """Bucket page counts so the label set stays small."""
+    if pages is None:
+        return "unknown"
+    if pages <= 1:
+        return "1"
+    if pages <= 5:
+        return "2-5"
+    if pages <= 20:
+        return "6-20"
+    return "21+"
+
+
+def instrument_supabase(client: Any) -> Any:
+    """
+    Time every PostgREST request made by a Supabase client via httpx event
+    hooks on its session. Returns the client for use at creation time.
+    """
+    session = client.postgrest.session
+
+    def on_request(request):
+        request.extensions["cura_started"] = time.perf_counter()
+
+    def on_response(response):
+        request = response.request
+        started = request.extensions.get("cura_started")
+        if started is None:
+            return
+        # Paths look like /rest/v1/<table> or /rest/v1/rpc/<function>
+        parts = request.url.path.rstrip("/").split("/")
+        if len(parts) >= 2 and parts[-2] == "rpc":
+            table, operation = parts[-1], "rpc"
+        else:
+            table, operation = parts[-1], _SUPABASE_OPERATIONS.get(request.method, request.method.lower())
+        SUPABASE_QUERY_DURATION.labels(table, operation).observe(time.perf_counter() - started)
+        if response.status_code >= 400:
+            SUPABASE_QUERY_ERRORS.labels(table, operation).inc()
+
+    session.event_hooks["request"].append(on_request)
+    session.event_hooks["response"].append(on_response)
+    return client
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording request latency by route template.
+    Unmatched paths share one label so 404 scans can't blow up cardinality.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._route_paths: Dict[Any, str] = {}
+
+    def _route_label(self, scope: Scope) -> str:
+        route = scope.get("route")
+        if route is not None:
+            return route.path
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        path = self._route_paths.get(endpoint)
+        if path is None:
+            for candidate in scope["app"].routes:
+                if getattr(candidate, "endpoint", None) is endpoint:
+                    path = candidate.path
+                    break
+            else:
+                path = "unmatched"
+            self._route_paths[endpoint] = path
+        return path
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            HTTP_REQUEST_DURATION.labels(
+                self._route_label(scope), scope["method"], str(status)
+            ).observe(time.perf_counter() - started)
+
+
+def render_metrics() -> tuple:
+    """
+    Render the metrics exposition. With several workers, set
+    PROMETHEUS_MULTIPROC_DIR so every worker's samples are aggregated.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,96 @@
+# app/utils/notifications.py
+import asyncio
+import logging
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Set
+
+logger = logging.getLogger(__name__)
+
+Message = Dict[str, Any]
+
+
+def user_channel(user_id: str) -> str:
+    """Channel carrying notifications for a single user."""
+    return f"user:{user_id}"
+
+
+class NotificationBroker:
+    """
+    Pub/sub interface used by the notification stream.
+
+    `publish` sends a message to every subscriber of a channel, in any
+    worker. `subscribe` yields a local queue receiving those messages.
+    """
+
+    async def publish(self, channel: str, message: Message) -> None:
+        raise NotImplementedError
+
+    def subscribe(self, channel: str):
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class InProcessBroker(NotificationBroker):
+    """
+    Broker for a single worker process. Each subscriber gets a bounded
+    queue; a slow consumer loses its oldest messages rather than holding
+    up publishers.
+
+    Shared brokers for multi-worker deployments (Redis pub/sub, Postgres
+    LISTEN/NOTIFY) can subclass this: override `publish` to send to the
+    shared bus and call `deliver` from the listener for each message
+    received, so fan-out to local subscribers stays the same.
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+
+    async def publish(self, channel: str, message: Message) -> None:
+        self.deliver(channel, message)
+
+    def deliver(self, channel: str, message: Message) -> None:
+        for queue in list(self._subscribers.get(channel, ())):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(message)
+
+    @asynccontextmanager
+    async def subscribe(self, channel: str) -> AsyncIterator[asyncio.Queue]:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[channel].add(queue)
+        try:
+            yield queue
+        finally:
+            subscribers = self._subscribers.get(channel)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[channel]
+
+    def subscriber_count(self, channel: str) -> int:
+        return len(self._subscribers.get(channel, ()))
+
+
+_broker: NotificationBroker = InProcessBroker()
+
+
+def get_broker() -> NotificationBroker:
+    return _broker
+
+
+def set_broker(broker: NotificationBroker) -> None:
+    """Swap in a shared broker, e.g. at startup in multi-worker deployments."""
+    global _broker
+    _broker = broker
+
+
+async def notify_user(user_id: str, message: Message) -> None:
+    """Publish a notification to a user. Failures are logged, never raised."""
+    try:
+        await _broker.publish(user_channel(user_id), message)
+    except Exception as e:
+        logger.error("Error publishing notification: %s", e)
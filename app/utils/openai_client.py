@@ -1,10 +1,108 @@
 # app/utils/openai_client.py
-from openai import OpenAI
+import asyncio
+import time
 from app.core.config import settings
+from app.core.resources import get_openai
+from app.utils.metrics import LLM_CALL_DURATION, LLM_CALLS_IN_FLIGHT, LLM_ERRORS, LLM_RETRIES, LLM_TOKENS
+from app.utils.ai_scheduler import get_scheduler
+from app.utils.prompts import get_template
+from app.utils.usage_ledger import UsageEntry, get_ledger
 from starlette.concurrency import run_in_threadpool
-from typing import Optional
- 
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
+from typing import Dict, List, Optional
+
+
+def _retryable_errors() -> tuple:
+    # imported lazily so importing this module doesn't load the SDK
+    from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+
+    return (APIConnectionError, APITimeoutError, InternalServerError, RateLimitError)
+
+
+async def _chat_completion(
+    function: str,
+    model_name: str,
+    messages: List[Dict[str, str]],
+    priority: str = "interactive",
+    tenant: str = "",
+    prompt: str = "",
+):
+    """
+    Run a chat completion in the threadpool, retrying transient errors with
+    exponential backoff and recording latency, token and retry metrics
+    under the calling function's name. Each attempt waits for a slot from
+    the AI scheduler; backoff sleeps don't hold one. The outcome is added
+    to the usage ledger with `prompt`, the id of the template used.
+    """
+    client = get_openai()
+    retryable = _retryable_errors()
+    attempt = 0
+    while True:
+        async with get_scheduler().slot(priority, tenant):
+            started = time.perf_counter()
+            LLM_CALLS_IN_FLIGHT.inc()
+            try:
+                response = await run_in_threadpool(
+                    lambda: client.chat.completions.create(
+                        model=model_name,
+                        messages=messages,
+                    )
+                )
+            except retryable:
+                if attempt >= settings.OPENAI_MAX_RETRIES:
+                    LLM_ERRORS.labels(function).inc()
+                    _record_usage(function, model_name, tenant, prompt, None, started, attempt + 1)
+                    raise
+                response = None
+            except Exception:
+                LLM_ERRORS.labels(function).inc()
+                _record_usage(function, model_name, tenant, prompt, None, started, attempt + 1)
+                raise
+            finally:
+                LLM_CALLS_IN_FLIGHT.dec()
+
+        if response is None:
+            attempt += 1
+            LLM_RETRIES.labels(function).inc()
+            await asyncio.sleep(min(0.5 * 2 ** attempt, 8))
+            continue
+
+        LLM_CALL_DURATION.labels(function, model_name).observe(time.perf_counter() - started)
+        if response.usage is not None:
+            LLM_TOKENS.labels(function, model_name, "prompt").inc(response.usage.prompt_tokens)
+            LLM_TOKENS.labels(function, model_name, "completion").inc(response.usage.completion_tokens)
+            LLM_TOKENS.labels(function, model_name, "cached").inc(_cached_tokens(response.usage))
+        _record_usage(function, model_name, tenant, prompt, response, started, attempt + 1)
+        return response
+
+
+def _cached_tokens(usage) -> int:
+    """Prompt tokens the provider served from its prompt cache."""
+    # Newer than the pinned SDK's models, so it arrives as an extra field
+    details = getattr(usage, "prompt_tokens_details", None)
+    if isinstance(details, dict):
+        return details.get("cached_tokens") or 0
+    return getattr(details, "cached_tokens", None) or 0
+
+
+def _record_usage(
+    function: str, model_name: str, tenant: str, prompt: str, response, started: float, attempts: int
+) -> None:
+    """Add one call to the usage ledger; latency is that of the last attempt."""
+    if not settings.LLM_USAGE_ENABLED:
+        return
+    usage = response.usage if response is not None else None
+    get_ledger().record(UsageEntry(
+        feature=function,
+        model=model_name,
+        teacher_id=tenant,
+        prompt_tokens=usage.prompt_tokens if usage else 0,
+        completion_tokens=usage.completion_tokens if usage else 0,
+        cached_tokens=_cached_tokens(usage) if usage else 0,
+        latency_ms=round((time.perf_counter() - started) * 1000),
+        attempts=attempts,
+        status="ok" if response is not None else "error",
+        prompt=prompt,
+    ))
 
 async def generate_feedback(
     extracted_text: str,
@@ -12,6 +110,8 @@ async def generate_feedback(
     teacher_notes: str,
     conciseness: str,
     grade: Optional[float] = None,
+    priority: str = "interactive",
+    tenant: str = "",
 ) -> str:
     """
     Build and send a prompt to OpenAI that incorporates
@@ -20,57 +120,73 @@ async def generate_feedback(
     """
     model_name = getattr(settings, "OPENAI_MODEL", "gpt-3.5-turbo")
 
-    system_prompt = (
-        "You are a warm, encouraging tutor. First celebrate strengths, "
-        "then gently point out 1–2 areas to improve. Keep it conversational."
+    template = get_template("generate_feedback")
+    messages = template.messages(
+        extracted_text=extracted_text,
+        teacher_notes=teacher_notes,
+        tone=tone,
+        conciseness=conciseness,
+        grade=grade if grade is not None else "N/A",
+    )
+
+    response = await _chat_completion(
+        "generate_feedback", model_name, messages, priority=priority, tenant=tenant, prompt=template.id
     )
-    user_prompt = (
-        f"Student text:\n{extracted_text}\n\n"
-        f"Teacher notes to incorporate:\n{teacher_notes}\n\n"
-        f"Tone: {tone}\n"
-        f"Length: {conciseness}\n"
-        f"Grade: {grade if grade is not None else 'N/A'}"
+    return response.choices[0].message.content
+
+
+async def generate_revision_feedback(
+    changes_text: str,
+    prior_feedback: str,
+    tone: str,
+    teacher_notes: str,
+    conciseness: str,
+    grade: Optional[float] = None,
+    priority: str = "interactive",
+    tenant: str = "",
+) -> str:
+    """
+    Update earlier feedback for a revised draft. Only the changed sections
+    are sent, so cost scales with the size of the revision.
+    """
+    model_name = getattr(settings, "OPENAI_MODEL", "gpt-3.5-turbo")
+
+    template = get_template("generate_revision_feedback")
+    messages = template.messages(
+        prior_feedback=prior_feedback,
+        changes_text=changes_text,
+        teacher_notes=teacher_notes,
+        tone=tone,
+        conciseness=conciseness,
+        grade=grade if grade is not None else "N/A",
     )
 
-    # run blocking OpenAI call in threadpool
-    response = await run_in_threadpool(
-        lambda: client.chat.completions.create(
-            model=model_name,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user",   "content": user_prompt},
-            ],
-        )
+    response = await _chat_completion(
+        "generate_revision_feedback", model_name, messages, priority=priority, tenant=tenant, prompt=template.id
     )
     return response.choices[0].message.content
 
 
 async def generate_follow_up_response(
-    extracted_text: str,
     feedback_text: str,
     question: str,
+    priority: str = "interactive",
+    tenant: str = "",
 ) -> str:
     """
-    Handle student follow-up questions by feeding the original
-    text and the latest feedback into the AI plus the new question.
+    Handle student follow-up questions by feeding the latest
+    feedback into the AI plus the new question.
     """
     model_name = getattr(settings, "OPENAI_MODEL", "gpt-3.5-turbo")
 
-    system_prompt = (
-        "You are a helpful tutor answering follow-up questions. "
-        "Be concise, clear, and encouraging."
+    template = get_template("generate_follow_up_response")
+    messages = template.messages(
+        history=[{"role": "assistant", "content": feedback_text}],
+        question=question,
     )
-    messages = [
-        {"role": "system",    "content": system_prompt},
-        {"role": "assistant", "content": feedback_text},
-        {"role": "user",      "content": question},
-    ]
-
-    response = await run_in_threadpool(
-        lambda: client.chat.completions.create(
-            model=model_name,
-            messages=messages,
-        )
+
+    response = await _chat_completion(
+        "generate_follow_up_response", model_name, messages, priority=priority, tenant=tenant, prompt=template.id
     )
     return response.choices[0].message.content
 
@@ -78,36 +194,22 @@ async def generate_reflection(
     statement_text: str,
     stance: str,
     response_text: str,
+    priority: str = "interactive",
+    tenant: str = "",
 ) -> str:
     """
     Generate a reflection on a student's response to a values statement.
     """
     model_name = getattr(settings, "OPENAI_MODEL", "gpt-3.5-turbo")
 
-    system_prompt = (
-        "You are a thoughtful mentor helping students reflect on their values and beliefs. "
-        "Your role is to help them explore their reasoning and consider alternative perspectives "
-        "while maintaining a supportive and non-judgmental tone."
-    )
-    
-    user_prompt = (
-        f"Statement: {statement_text}\n\n"
-        f"Student's stance: {stance}\n\n"
-        f"Student's response: {response_text}\n\n"
-        "Please provide a brief reflection that:\n"
-        "1. Acknowledges their perspective\n"
-        "2. Highlights any strong reasoning they've shown\n"
-        "3. Gently prompts them to consider an alternative viewpoint\n"
-        "4. Encourages further reflection"
+    template = get_template("generate_reflection")
+    messages = template.messages(
+        statement_text=statement_text,
+        stance=stance,
+        response_text=response_text,
     )
 
-    response = await run_in_threadpool(
-        lambda: client.chat.completions.create(
-            model=model_name,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-        )
+    response = await _chat_completion(
+        "generate_reflection", model_name, messages, priority=priority, tenant=tenant, prompt=template.id
     )
     return response.choices[0].message.content
@@ -0,0 +1,114 @@
+# app/utils/profiling.py
+import hmac
+import logging
+import os
+import random
+import re
+import time
+from datetime import datetime
+from typing import Dict, List
+
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-cura-profile"
+PROFILE_SUFFIX = ".speedscope.json"
+PROFILE_NAME_RE = re.compile(r"^[\w.-]+\.speedscope\.json$")
+_UNSAFE_CHARS_RE = re.compile(r"[^\w-]+")
+
+
+class ProfilingMiddleware:
+    """
+    Profile a sample of requests with pyinstrument (wall-clock, including
+    time spent awaiting) and write speedscope files to `profile_dir`.
+
+    A request is profiled when it wins the `sample_rate` draw or carries
+    the X-Cura-Profile header with the configured admin token. Only one
+    request is profiled at a time per worker. With sampling off and no
+    token configured, the cost is a single comparison per request.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        profile_dir: str,
+        sample_rate: float = 0.0,
+        header_token: str = "",
+        max_files: int = 200,
+        interval: float = 0.001,
+    ):
+        self.app = app
+        self.profile_dir = profile_dir
+        self.sample_rate = sample_rate
+        self.header_token = header_token.encode("utf-8")
+        self.max_files = max_files
+        self.interval = interval
+        self._busy = False
+
+    def _should_profile(self, scope: Scope) -> bool:
+        if self.sample_rate and random.random() < self.sample_rate:
+            return True
+        if self.header_token:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER:
+                    return hmac.compare_digest(value, self.header_token)
+        return False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self._busy or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        from pyinstrument import Profiler
+
+        self._busy = True
+        profiler = Profiler(interval=self.interval, async_mode="enabled")
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.stop()
+            self._busy = False
+            duration_ms = (time.perf_counter() - started) * 1000
+            try:
+                await run_in_threadpool(self._write, profiler, scope, duration_ms)
+            except Exception as e:
+                logger.error("Error writing request profile: %s", e)
+
+    def _write(self, profiler, scope: Scope, duration_ms: float) -> None:
+        from pyinstrument.renderers import SpeedscopeRenderer
+
+        os.makedirs(self.profile_dir, exist_ok=True)
+        path = _UNSAFE_CHARS_RE.sub("-", scope["path"]).strip("-") or "root"
+        name = (
+            f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}_{scope['method']}_"
+            f"{path[:80]}_{duration_ms:.0f}ms{PROFILE_SUFFIX}"
+        )
+        with open(os.path.join(self.profile_dir, name), "w") as f:
+            f.write(profiler.output(renderer=SpeedscopeRenderer()))
+        self._rotate()
+
+    def _rotate(self) -> None:
+        files = sorted(f for f in os.listdir(self.profile_dir) if f.endswith(PROFILE_SUFFIX))
+        for old in files[:max(0, len(files) - self.max_files)]:
+            os.remove(os.path.join(self.profile_dir, old))
+
+
+def list_profiles(profile_dir: str) -> List[Dict]:
+    """Recent profiles, newest first."""
+    if not os.path.isdir(profile_dir):
+        return []
+    profiles = []
+    for name in sorted(os.listdir(profile_dir), reverse=True):
+        if not PROFILE_NAME_RE.match(name):
+            continue
+        stat = os.stat(os.path.join(profile_dir, name))
+        profiles.append({
+            "name": name,
+            "size": stat.st_size,
+            "created_at": datetime.utcfromtimestamp(stat.st_mtime),
+        })
+    return profiles
@@ -0,0 +1,162 @@
+# app/utils/prompts.py
+from string import Formatter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+
+
+class PromptTemplate:
+    """
+    A versioned chat prompt, parsed once when the module is imported so a
+    call only joins strings. Providers cache the longest prefix a prompt
+    shares with recent ones, so the system message and the literal text
+    at the start of the user message should never vary, and placeholders
+    should follow in order of how often their values change, with the
+    student's own text last.
+    """
+
+    def __init__(self, name: str, version: int, system: str, user: str):
+        self.name = name
+        self.version = version
+        self.system = system
+        parts: List[Tuple[str, Optional[str]]] = []
+        for literal, field, spec, conversion in Formatter().parse(user):
+            if spec or conversion:
+                raise ValueError(f"Prompt {self.id}: format specs are not supported in {{{field}}}")
+            parts.append((literal, field))
+        self._parts = tuple(parts)
+        self.fields = tuple(field for _, field in parts if field is not None)
+
+    @property
+    def id(self) -> str:
+        return f"{self.name}@v{self.version}"
+
+    @property
+    def static_prefix(self) -> str:
+        """The text every rendering of this template starts with."""
+        return self.system + (self._parts[0][0] if self._parts else "")
+
+    def render(self, **values) -> str:
+        """The user message for `values`."""
+        missing = set(self.fields) - values.keys()
+        if missing:
+            raise ValueError(f"Prompt {self.id} is missing {', '.join(sorted(missing))}")
+        return "".join(literal + ("" if field is None else str(values[field])) for literal, field in self._parts)
+
+    def messages(self, history: Iterable[Dict[str, str]] = (), **values) -> List[Dict[str, str]]:
+        """System message, then `history`, then the rendered user message."""
+        return [
+            {"role": "system", "content": self.system},
+            *history,
+            {"role": "user", "content": self.render(**values)},
+        ]
+
+
+_templates: Dict[str, Dict[int, PromptTemplate]] = {}
+
+
+def register(template: PromptTemplate) -> PromptTemplate:
+    versions = _templates.setdefault(template.name, {})
+    if template.version in versions:
+        raise ValueError(f"Prompt {template.id} is already registered")
+    versions[template.version] = template
+    return template
+
+
+def get_template(name: str, version: Optional[int] = None) -> PromptTemplate:
+    """`version` of a prompt; by default the one pinned in PROMPT_VERSIONS, else the newest."""
+    versions = _templates[name]
+    version = version or settings.PROMPT_VERSIONS.get(name) or max(versions)
+    try:
+        return versions[version]
+    except KeyError:
+        raise ValueError(f"Unknown prompt version {name}@v{version}") from None
+
+
+# Version 1 is the original layout, kept so it can be pinned or benchmarked
+# (python -m benchmarks.bench_prompt_cache). Published versions are never
+# edited: change a prompt by registering the next version.
+
+_FEEDBACK_SYSTEM = (
+    "You are a warm, encouraging tutor. First celebrate strengths, "
+    "then gently point out 1–2 areas to improve. Keep it conversational."
+)
+
+register(PromptTemplate("generate_feedback", 1, _FEEDBACK_SYSTEM, (
+    "Student text:\n{extracted_text}\n\n"
+    "Teacher notes to incorporate:\n{teacher_notes}\n\n"
+    "Tone: {tone}\n"
+    "Length: {conciseness}\n"
+    "Grade: {grade}"
+)))
+
+register(PromptTemplate("generate_feedback", 2, _FEEDBACK_SYSTEM, (
+    "Write feedback on the student text at the end of this message, "
+    "following the teacher's preferences and notes.\n\n"
+    "Tone: {tone}\n"
+    "Length: {conciseness}\n"
+    "Teacher notes to incorporate:\n{teacher_notes}\n\n"
+    "Grade: {grade}\n\n"
+    "Student text:\n{extracted_text}"
+)))
+
+_REVISION_SYSTEM = (
+    "You are a warm, encouraging tutor reviewing a revised draft. "
+    "You are given your earlier feedback and only the sections the student changed. "
+    "Note which earlier suggestions were addressed, celebrate improvements, "
+    "and gently point out 1–2 remaining areas to improve. Keep it conversational."
+)
+
+register(PromptTemplate("generate_revision_feedback", 1, _REVISION_SYSTEM, (
+    "Earlier feedback:\n{prior_feedback}\n\n"
+    "Changed sections:\n{changes_text}\n\n"
+    "Teacher notes to incorporate:\n{teacher_notes}\n\n"
+    "Tone: {tone}\n"
+    "Length: {conciseness}\n"
+    "Grade: {grade}"
+)))
+
+register(PromptTemplate("generate_revision_feedback", 2, _REVISION_SYSTEM, (
+    "Update your feedback for the changed sections at the end of this message, "
+    "following the teacher's preferences and notes.\n\n"
+    "Tone: {tone}\n"
+    "Length: {conciseness}\n"
+    "Teacher notes to incorporate:\n{teacher_notes}\n\n"
+    "Grade: {grade}\n\n"
+    "Earlier feedback:\n{prior_feedback}\n\n"
+    "Changed sections:\n{changes_text}"
+)))
+
+# Already prefix-friendly: the feedback being discussed is the same for
+# every question about it
+register(PromptTemplate("generate_follow_up_response", 1, (
+    "You are a helpful tutor answering follow-up questions. "
+    "Be concise, clear, and encouraging."
+), "{question}"))
+
+_REFLECTION_SYSTEM = (
+    "You are a thoughtful mentor helping students reflect on their values and beliefs. "
+    "Your role is to help them explore their reasoning and consider alternative perspectives "
+    "while maintaining a supportive and non-judgmental tone."
+)
+_REFLECTION_INSTRUCTIONS = (
+    "Please provide a brief reflection that:\n"
+    "1. Acknowledges their perspective\n"
+    "2. Highlights any strong reasoning they've shown\n"
+    "3. Gently prompts them to consider an alternative viewpoint\n"
+    "4. Encourages further reflection"
+)
+
+register(PromptTemplate("generate_reflection", 1, _REFLECTION_SYSTEM, (
+    "Statement: {statement_text}\n\n"
+    "Student's stance: {stance}\n\n"
+    "Student's response: {response_text}\n\n"
+    + _REFLECTION_INSTRUCTIONS
+)))
+
+register(PromptTemplate("generate_reflection", 2, _REFLECTION_SYSTEM, (
+    _REFLECTION_INSTRUCTIONS + "\n\n"
+    "Statement: {statement_text}\n\n"
+    "Student's stance: {stance}\n\n"
+    "Student's response: {response_text}"
+)))
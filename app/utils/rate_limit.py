@@ -0,0 +1,226 @@
+# app/utils/rate_limit.py
+import logging
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import wraps
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.models import User
+from app.utils.metrics import RATE_LIMITED
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Bucket:
+    """A token bucket holding up to `capacity` units, refilled at `rate` units per second."""
+    key: str
+    capacity: float
+    rate: float
+    cost: float = 1.0
+
+    @property
+    def charge(self) -> float:
+        # A single request larger than the bucket would otherwise never fit
+        return min(self.cost, self.capacity)
+
+
+class RateLimitStore:
+    """
+    Storage for token buckets.
+
+    `consume` charges every bucket all-or-nothing. It returns 0 when the
+    request is allowed, otherwise the seconds until it could be.
+    """
+
+    async def consume(self, buckets: Sequence[Bucket]) -> float:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class InProcessStore(RateLimitStore):
+    """
+    Buckets held in this worker's memory. Limits are per worker, so with N
+    workers a user can get up to N times the configured rate. The least
+    recently used keys are dropped beyond `max_keys` (an idle bucket is full
+    anyway).
+    """
+
+    def __init__(self, max_keys: int = 100_000, clock: Callable[[], float] = time.monotonic):
+        self.max_keys = max_keys
+        self._clock = clock
+        self._state: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def _level(self, bucket: Bucket, now: float) -> float:
+        tokens, updated = self._state.get(bucket.key, (bucket.capacity, now))
+        return min(bucket.capacity, tokens + (now - updated) * bucket.rate)
+
+    def take(self, buckets: Sequence[Bucket]) -> float:
+        # No awaits in here, so this is atomic on the event loop
+        now = self._clock()
+        levels = [self._level(b, now) for b in buckets]
+        retry_after = max(
+            ((b.charge - level) / b.rate for b, level in zip(buckets, levels) if level < b.charge),
+            default=0.0,
+        )
+        if retry_after > 0:
+            return retry_after
+        for bucket, level in zip(buckets, levels):
+            self._state[bucket.key] = (level - bucket.charge, now)
+            self._state.move_to_end(bucket.key)
+        while len(self._state) > self.max_keys:
+            self._state.popitem(last=False)
+        return 0.0
+
+    async def consume(self, buckets: Sequence[Bucket]) -> float:
+        return self.take(buckets)
+
+
+class PostgresStore(RateLimitStore):
+    """
+    Buckets in the `rate_limit_buckets` table, shared by every worker.
+    Requires migrations/rate_limits.sql. Costs one RPC per check.
+    """
+
+    def __init__(self, supabase):
+        self.supabase = supabase
+
+    async def consume(self, buckets: Sequence[Bucket]) -> float:
+        params = {
+            "p_keys": [b.key for b in buckets],
+            "p_capacities": [b.capacity for b in buckets],
+            "p_rates": [b.rate for b in buckets],
+            "p_costs": [b.cost for b in buckets],
+        }
+        resp = await run_in_threadpool(
+            lambda: self.supabase.rpc("consume_rate_limit", params).execute()
+        )
+        return float(resp.data or 0)
+
+
+_store: Optional[RateLimitStore] = None
+
+
+def get_store() -> RateLimitStore:
+    global _store
+    if _store is None:
+        if settings.RATE_LIMIT_BACKEND == "postgres":
+            from app.core.resources import resources
+
+            _store = PostgresStore(resources.supabase)
+        else:
+            _store = InProcessStore()
+    return _store
+
+
+def set_store(store: RateLimitStore) -> None:
+    """Swap in a different store, e.g. a Redis-backed one shared across workers."""
+    global _store
+    _store = store
+
+
+# Student -> teacher ids, cached so class limits don't cost a query per request
+_CLASS_CACHE_SECONDS = 300
+
+
+def class_cache_key(student_id: str) -> str:
+    """Cache key to invalidate when a student's assignments change."""
+    return f"classes:{student_id}"
+
+
+async def class_ids(user: User) -> List[str]:
+    """Teacher ids whose class budget this user draws on."""
+    if user.role == "teacher":
+        return [user.id]
+
+    from app.core.resources import resources
+
+    async def load() -> List[str]:
+        resp = await run_in_threadpool(
+            lambda: resources.supabase.table("student_teacher_assignments")
+            .select("teacher_id")
+            .eq("student_id", user.id)
+            .execute()
+        )
+        return sorted({row["teacher_id"] for row in (resp.data or [])})
+
+    try:
+        return await resources.cache.get_or_set(class_cache_key(user.id), load, _CLASS_CACHE_SECONDS)
+    except Exception as e:
+        logger.error("Error loading teachers for rate limits: %s", e)
+        return []
+
+
+def _buckets(kind: str, user: User, teacher_ids: List[str], cost: float,
+             user_per_minute: int, class_per_minute: int) -> List[Bucket]:
+    buckets = []
+    # Teachers draw on their class budget directly
+    if user.role != "teacher" and user_per_minute > 0:
+        buckets.append(Bucket(f"ai:{kind}:user:{user.id}", user_per_minute, user_per_minute / 60, cost))
+    if class_per_minute > 0:
+        for teacher_id in teacher_ids:
+            buckets.append(Bucket(f"ai:{kind}:class:{teacher_id}", class_per_minute, class_per_minute / 60, cost))
+    return buckets
+
+
+async def _enforce(kind: str, buckets: List[Bucket]) -> None:
+    if not buckets:
+        return
+    try:
+        retry_after = await get_store().consume(buckets)
+    except Exception as e:
+        # A broken shared store shouldn't take the AI features down with it
+        logger.error("Rate limit store error, allowing request: %s", e)
+        return
+    if retry_after > 0:
+        RATE_LIMITED.labels(kind).inc()
+        raise HTTPException(
+            status_code=429,
+            detail="Too many AI requests. Please try again shortly.",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+
+async def check_request_quota(user: User) -> None:
+    """Charge one request against the user's and class's request buckets."""
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    await _enforce("requests", _buckets(
+        "requests", user, await class_ids(user), 1,
+        settings.AI_USER_REQUESTS_PER_MINUTE, settings.AI_CLASS_REQUESTS_PER_MINUTE,
+    ))
+
+
+async def charge_tokens(user: User, prompt_tokens: int) -> None:
+    """
+    Charge the estimated tokens of an OpenAI call (prompt plus expected
+    completion) against the user's and class's token buckets.
+    """
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    cost = prompt_tokens + settings.AI_COMPLETION_TOKEN_ESTIMATE
+    await _enforce("tokens", _buckets(
+        "tokens", user, await class_ids(user), cost,
+        settings.AI_USER_TOKENS_PER_MINUTE, settings.AI_CLASS_TOKENS_PER_MINUTE,
+    ))
+
+
+def rate_limited(func: Callable):
+    """
+    Decorator applying the AI request limits before the route body runs,
+    so rejected requests stay cheap. Place it below the RBAC decorator,
+    which supplies `current_user`.
+    """
+    @wraps(func)
+    async def wrapper(*args, current_user: User, **kwargs):
+        await check_request_quota(current_user)
+        return await func(*args, current_user=current_user, **kwargs)
+    return wrapper
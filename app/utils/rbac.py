@@ -3,6 +3,7 @@ from fastapi import HTTPException, Depends
 from typing import List, Optional, Callable
 from app.routes.auth import get_current_user
 from app.models import User
+from app.core.config import settings
 import logging 
 
 logger = logging.getLogger(__name__)
@@ -41,4 +42,14 @@ def require_student(func: Callable):
 
 def require_teacher_or_student(func: Callable):
     """Decorator to allow access to both teachers and students."""
-    return require_roles(["teacher", "student"])(func) 
+    return require_roles(["teacher", "student"])(func)
+
+def require_admin(func: Callable):
+    """Decorator to restrict access to teachers listed in ADMIN_EMAILS."""
+    @wraps(func)
+    async def wrapper(*args, current_user: User = Depends(get_current_user), **kwargs):
+        if current_user.role != "teacher" or current_user.email not in settings.ADMIN_EMAILS:
+            logger.warning("Access denied: User %s attempted to access an admin route", current_user.email)
+            raise HTTPException(status_code=403, detail="Access denied. This endpoint requires an admin teacher account")
+        return await func(*args, current_user=current_user, **kwargs)
+    return wrapper
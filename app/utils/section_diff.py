@@ -0,0 +1,81 @@
+# app/utils/section_diff.py
+import re
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import List, Optional
+
+_BLANK_LINE_RE = re.compile(r"\n\s*\n")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+@dataclass
+class SectionChange:
+    kind: str  # "added", "removed" or "modified"
+    index: int  # position of the section in the new draft (or where it was removed)
+    old_text: Optional[str] = None
+    new_text: Optional[str] = None
+
+
+def split_sections(text: str) -> List[str]:
+    """
+    Split a document into sections on blank lines. Extracted PDF text often
+    has no blank lines, in which case each non-empty line is a section.
+    """
+    text = text.replace("\r\n", "\n")
+    parts = _BLANK_LINE_RE.split(text)
+    if len(parts) == 1:
+        parts = text.split("\n")
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _key(section: str) -> str:
+    # Whitespace-only edits (re-wrapping, extraction noise) are not changes
+    return _WHITESPACE_RE.sub(" ", section)
+
+
+def diff_sections(old_text: str, new_text: str) -> List[SectionChange]:
+    """Compute section-level changes between two drafts."""
+    old = split_sections(old_text)
+    new = split_sections(new_text)
+    matcher = SequenceMatcher(None, [_key(s) for s in old], [_key(s) for s in new], autojunk=False)
+
+    changes: List[SectionChange] = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        if tag == "replace":
+            paired = min(i2 - i1, j2 - j1)
+            for k in range(paired):
+                changes.append(SectionChange("modified", j1 + k, old[i1 + k], new[j1 + k]))
+            for k in range(i1 + paired, i2):
+                changes.append(SectionChange("removed", j1 + paired, old_text=old[k]))
+            for k in range(j1 + paired, j2):
+                changes.append(SectionChange("added", k, new_text=new[k]))
+        elif tag == "delete":
+            for k in range(i1, i2):
+                changes.append(SectionChange("removed", j1, old_text=old[k]))
+        elif tag == "insert":
+            for k in range(j1, j2):
+                changes.append(SectionChange("added", k, new_text=new[k]))
+    return changes
+
+
+def changed_fraction(changes: List[SectionChange], new_text: str) -> float:
+    """Share of the new draft's characters that sit in changed sections."""
+    total = len(new_text) or 1
+    changed = sum(len(c.new_text or c.old_text or "") for c in changes)
+    return min(1.0, changed / total)
+
+
+def format_changes(changes: List[SectionChange]) -> str:
+    """Render changes as compact prompt text."""
+    blocks = []
+    for change in changes:
+        header = f"[Section {change.index + 1} - {change.kind}]"
+        if change.kind == "modified":
+            blocks.append(f"{header}\nBefore:\n{change.old_text}\nAfter:\n{change.new_text}")
+        elif change.kind == "added":
+            blocks.append(f"{header}\n{change.new_text}")
+        else:
+            blocks.append(f"{header}\n{change.old_text}")
+    return "\n\n".join(blocks)
@@ -0,0 +1,215 @@
+# app/utils/semantic_cache.py
+import hashlib
+import math
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.utils.metrics import FOLLOW_UP_CACHE_LOOKUPS, FOLLOW_UP_CACHE_SIMILARITY
+from app.utils.text_stats import normalize_text
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_CONTRACTION_RE = re.compile(r"\b(can)(?:'t|not)\b|n't\b")
+_NEGATIONS = {"not", "no", "never", "nor"}
+
+# Words that carry neither topic nor intent in a follow-up question
+_QUESTION_STOPWORDS = {
+    "a", "an", "the", "i", "me", "my", "we", "our", "you", "your", "it", "its", "this", "that",
+    "these", "those", "be", "been", "am", "do", "does", "did",
+    "can", "could", "would", "should", "will", "shall", "may", "might", "must",
+    "to", "of", "in", "on", "for", "with", "about",
+    "and", "or", "so", "if", "there", "here", "please", "some", "any", "more",
+    "get", "make", "way", "ways", "just", "really", "also", "tell", "explain", "mean",
+}
+
+# What the question asks, as opposed to what it is about: "how do I
+# improve my thesis?", "is my thesis good?" and "what is a thesis?" share
+# a topic but want different answers. Synonyms fold to one intent so
+# "make it better" still matches "improve it".
+_INTENTS = {
+    "how": "how", "what": "what", "why": "why", "when": "when", "where": "where",
+    "which": "which", "who": "who",
+    "is": "is", "are": "is", "was": "is", "were": "is",
+    "improve": "improve", "improving": "improve", "improved": "improve", "better": "improve",
+    "strengthen": "improve", "stronger": "improve",
+    "fix": "fix", "fixing": "fix", "wrong": "fix", "mistake": "fix", "mistakes": "fix",
+    "good": "good", "well": "good", "work": "good", "works": "good", "working": "good",
+    "ok": "good", "okay": "good", "fine": "good", "strong": "good",
+    "change": "change", "changing": "change", "revise": "change", "rewrite": "change",
+    "help": "help",
+}
+Vector = Dict[int, float]
+
+
+def _terms(text: str) -> Tuple[List[str], List[str]]:
+    """(intent terms, topic terms) of a question."""
+    intents, topics = [], []
+    negated = False
+    text = _CONTRACTION_RE.sub(lambda m: f"{m.group(1) or ''} not", normalize_text(text))
+    for word in _WORD_RE.findall(text):
+        if word in _NEGATIONS:
+            negated = True
+            continue
+        if word in _QUESTION_STOPWORDS:
+            continue
+        intent = _INTENTS.get(word)
+        if intent is None:
+            # Crude plural folding so "statements" matches "statement"
+            if len(word) > 4 and word.endswith("s") and not word.endswith("ss"):
+                word = word[:-1]
+        # Negation sticks to the next word, so "should I not use first
+        # person" is far from "should I use first person"
+        term = f"not_{intent or word}" if negated else intent or word
+        (intents if intent else topics).append(term)
+        negated = False
+    return intents, topics
+
+
+def _feature(term: str, dims: int) -> Tuple[int, float]:
+    digest = hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest()
+    value = int.from_bytes(digest, "little")
+    # The top bit picks the sign, so collisions tend to cancel out
+    return value % dims, -1.0 if value >> 63 else 1.0
+
+
+def vectorize(text: str, dims: int = 1 << 18) -> Vector:
+    """
+    Hashing-vectorizer embedding of a question: intent words, topic words,
+    adjacent topic-word pairs and every intent-topic pair, signed-hashed
+    into `dims` buckets and L2-normalized. The intent-topic pairs mean a
+    shared topic or a shared intent alone leaves two questions far apart.
+    Deterministic and model-free, so vectors agree across workers.
+    """
+    intents, topics = _terms(text)
+    intents = list(dict.fromkeys(intents))
+    features = [f"?{i}" for i in intents] + topics
+    features += [f"{a} {b}" for a, b in zip(topics, topics[1:])]
+    features += [f"?{i} {t}" for i in intents for t in dict.fromkeys(topics)]
+    vector: Vector = {}
+    for feature in features:
+        index, sign = _feature(feature, dims)
+        vector[index] = vector.get(index, 0.0) + sign
+    norm = math.sqrt(sum(v * v for v in vector.values()))
+    return {i: v / norm for i, v in vector.items() if v} if norm else {}
+
+
+def cosine(a: Vector, b: Vector) -> float:
+    """Cosine similarity of two normalized sparse vectors."""
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(i, 0.0) for i, v in a.items())
+
+
+@dataclass
+class _Entry:
+    vector: Vector
+    answer: str
+
+
+class SemanticCache:
+    """
+    Follow-up answers keyed by feedback id and question meaning, so
+    rephrasings of an answered question ("how do I improve my thesis
+    statement?" / "how can I make my thesis statement better") reuse the
+    answer instead of calling the model again.
+
+    Lookups only compare against questions about the same feedback, so
+    the scan is bounded by `max_per_feedback`. The whole index holds at
+    most `max_entries` answers; the least recently used go first.
+    Questions with fewer than `min_terms` intent and topic words, or with
+    no topic word at all ("why?", "what is it?"), are never matched, since
+    they only make sense in the conversation they came from.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.85,
+        max_entries: int = 10_000,
+        max_per_feedback: int = 50,
+        min_terms: int = 2,
+    ):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.max_per_feedback = max_per_feedback
+        self.min_terms = min_terms
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+        self._by_feedback: Dict[str, "OrderedDict[str, None]"] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _key(question: str) -> str:
+        return hashlib.sha256(normalize_text(question).encode()).hexdigest()
+
+    def _usable(self, question: str) -> Optional[Vector]:
+        intents, topics = _terms(question)
+        if not topics or len(intents) + len(topics) < self.min_terms:
+            return None
+        return vectorize(question)
+
+    def lookup(self, feedback_id: str, question: str) -> Optional[str]:
+        """The stored answer to the most similar question, if similar enough."""
+        vector = self._usable(question)
+        keys = self._by_feedback.get(feedback_id)
+        if vector is None or not keys:
+            FOLLOW_UP_CACHE_LOOKUPS.labels("miss").inc()
+            return None
+
+        best_key, best_score = None, 0.0
+        for key in keys:
+            score = cosine(vector, self._entries[(feedback_id, key)].vector)
+            if score > best_score:
+                best_key, best_score = key, score
+        FOLLOW_UP_CACHE_SIMILARITY.observe(best_score)
+
+        if best_key is None or best_score < self.threshold:
+            FOLLOW_UP_CACHE_LOOKUPS.labels("miss").inc()
+            return None
+        FOLLOW_UP_CACHE_LOOKUPS.labels("semantic_hit").inc()
+        self._entries.move_to_end((feedback_id, best_key))
+        keys.move_to_end(best_key)
+        return self._entries[(feedback_id, best_key)].answer
+
+    def store(self, feedback_id: str, question: str, answer: str) -> None:
+        vector = self._usable(question)
+        if vector is None:
+            return
+        key = self._key(question)
+        keys = self._by_feedback.setdefault(feedback_id, OrderedDict())
+        self._entries[(feedback_id, key)] = _Entry(vector, answer)
+        self._entries.move_to_end((feedback_id, key))
+        keys[key] = None
+        keys.move_to_end(key)
+        if len(keys) > self.max_per_feedback:
+            self._remove(feedback_id, next(iter(keys)))
+        while len(self._entries) > self.max_entries:
+            self._remove(*next(iter(self._entries)))
+
+    def _remove(self, feedback_id: str, key: str) -> None:
+        del self._entries[(feedback_id, key)]
+        keys = self._by_feedback[feedback_id]
+        del keys[key]
+        if not keys:
+            del self._by_feedback[feedback_id]
+
+
+_semantic_cache: Optional[SemanticCache] = None
+
+
+def get_semantic_cache() -> SemanticCache:
+    global _semantic_cache
+    if _semantic_cache is None:
+        _semantic_cache = SemanticCache(
+            settings.FOLLOW_UP_SIMILARITY_THRESHOLD,
+            settings.FOLLOW_UP_SEMANTIC_MAX_ENTRIES,
+            settings.FOLLOW_UP_SEMANTIC_MAX_PER_FEEDBACK,
+        )
+    return _semantic_cache
+
+
+def set_semantic_cache(cache: SemanticCache) -> None:
+    global _semantic_cache
+    _semantic_cache = cache
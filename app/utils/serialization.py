@@ -0,0 +1,28 @@
+# app/utils/serialization.py
+from typing import Any, Dict, List, Optional
+
+import orjson
+from fastapi import Response
+from pydantic import TypeAdapter
+
+
+def validated_json_response(
+    adapter: TypeAdapter,
+    rows: List[Dict[str, Any]],
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """
+    Validate database rows in one pass and serialize them with
+    pydantic-core. Returning a Response directly skips FastAPI's second
+    validation against `response_model`, which stays for the OpenAPI docs.
+    """
+    items = adapter.validate_python(rows)
+    return Response(content=adapter.dump_json(items), media_type="application/json", headers=headers)
+
+
+def trusted_json_response(
+    rows: Any,
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """Serialize rows that are already in response shape, without validation."""
+    return Response(content=orjson.dumps(rows), media_type="application/json", headers=headers)
@@ -0,0 +1,152 @@
+# app/utils/similarity.py
+import hashlib
+import random
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Mersenne prime used for the universal hash family h(x) = (a*x + b) mod p
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_WORD_RE = re.compile(r"\w+")
+
+DEFAULT_NUM_PERM = 128
+DEFAULT_BANDS = 16
+DEFAULT_SHINGLE_SIZE = 5
+DEFAULT_MIN_SHINGLES = 1
+
+
+def _permutations(num_perm: int, seed: int = 1) -> List[Tuple[int, int]]:
+    """Fixed (a, b) coefficients so signatures are comparable across processes."""
+    rng = random.Random(seed)
+    return [
+        (rng.randint(1, _MERSENNE_PRIME - 1), rng.randint(0, _MERSENNE_PRIME - 1))
+        for _ in range(num_perm)
+    ]
+
+
+_PERMUTATIONS = {DEFAULT_NUM_PERM: _permutations(DEFAULT_NUM_PERM)}
+
+
+def shingles(text: str, size: int = DEFAULT_SHINGLE_SIZE) -> Set[str]:
+    """
+    Split text into overlapping word n-grams, ignoring case and punctuation.
+    Texts shorter than `size` words yield a single shingle.
+    """
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _hash_shingle(shingle: str) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "little"
+    )
+
+
+def minhash_signature(
+    text: str,
+    num_perm: int = DEFAULT_NUM_PERM,
+    shingle_size: int = DEFAULT_SHINGLE_SIZE,
+    min_shingles: int = DEFAULT_MIN_SHINGLES,
+) -> Optional[List[int]]:
+    """
+    Compute a MinHash signature for the text. Two signatures agree in a
+    position with probability equal to the Jaccard similarity of the
+    underlying shingle sets.
+
+    Returns None for texts with fewer than `min_shingles` shingles: empty
+    or near-empty texts (e.g. scanned PDFs) would all share one signature
+    and match each other at 1.0.
+    """
+    perms = _PERMUTATIONS.get(num_perm)
+    if perms is None:
+        perms = _PERMUTATIONS.setdefault(num_perm, _permutations(num_perm))
+
+    hashes = [_hash_shingle(s) for s in shingles(text, shingle_size)]
+    if len(hashes) < max(min_shingles, 1):
+        return None
+
+    p = _MERSENNE_PRIME
+    return [min((a * h + b) % p for h in hashes) & _MAX_HASH for a, b in perms]
+
+
+def estimate_jaccard(sig_a: List[int], sig_b: List[int]) -> float:
+    """Estimate Jaccard similarity as the fraction of matching positions."""
+    if len(sig_a) != len(sig_b):
+        raise ValueError("Signatures must have the same length")
+    if not sig_a:
+        return 0.0
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+
+def band_hashes(signature: List[int], bands: int = DEFAULT_BANDS) -> List[int]:
+    """
+    Split the signature into `bands` bands and hash each one to a signed
+    64-bit bucket key (fits a Postgres bigint). The band index is part of
+    the hash, so a key collision only happens within the same band.
+    """
+    if len(signature) % bands:
+        raise ValueError("Signature length must be divisible by the number of bands")
+    rows = len(signature) // bands
+    keys = []
+    for band in range(bands):
+        chunk = signature[band * rows:(band + 1) * rows]
+        digest = hashlib.blake2b(
+            repr((band, chunk)).encode("ascii"), digest_size=8
+        ).digest()
+        keys.append(int.from_bytes(digest, "little", signed=True))
+    return keys
+
+
+class LSHIndex:
+    """
+    In-memory LSH banding index. Candidate lookup touches only the buckets
+    the query signature falls into, so cost is independent of index size.
+    """
+
+    def __init__(self, bands: int = DEFAULT_BANDS):
+        self.bands = bands
+        self._buckets: Dict[int, Set[str]] = defaultdict(set)
+        self._signatures: Dict[str, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def add(self, key: str, signature: List[int]) -> None:
+        self._signatures[key] = signature
+        for bucket in band_hashes(signature, self.bands):
+            self._buckets[bucket].add(key)
+
+    def remove(self, key: str) -> None:
+        signature = self._signatures.pop(key, None)
+        if signature is None:
+            return
+        for bucket in band_hashes(signature, self.bands):
+            members = self._buckets.get(bucket)
+            if members is not None:
+                members.discard(key)
+                if not members:
+                    del self._buckets[bucket]
+
+    def candidates(self, signature: List[int]) -> Set[str]:
+        found: Set[str] = set()
+        for bucket in band_hashes(signature, self.bands):
+            found.update(self._buckets.get(bucket, ()))
+        return found
+
+    def query(
+        self, signature: List[int], threshold: float = 0.0, exclude: Iterable[str] = ()
+    ) -> List[Tuple[str, float]]:
+        """Return (key, estimated Jaccard) pairs at or above threshold, best first."""
+        excluded = set(exclude)
+        results = []
+        for key in self.candidates(signature):
+            if key in excluded:
+                continue
+            score = estimate_jaccard(signature, self._signatures[key])
+            if score >= threshold:
+                results.append((key, score))
+        results.sort(key=lambda item: item[1], reverse=True)
+        return results
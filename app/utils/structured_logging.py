@@ -0,0 +1,190 @@
+# app/utils/structured_logging.py
+import logging
+import queue
+import re
+import sys
+import threading
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, List, Optional, TextIO, Tuple
+
+import orjson
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+_REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
+class RequestIdMiddleware:
+    """
+    Tag each request with an id for log correlation. A well-formed incoming
+    X-Request-ID (e.g. from the proxy) is reused, otherwise one is
+    generated; either way it is echoed on the response.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                candidate = value.decode("latin-1")
+                if _REQUEST_ID_RE.match(candidate):
+                    request_id = candidate
+                break
+        request_id = request_id or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-request-id", request_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id_var.reset(token)
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+        }
+        dropped = getattr(record, "dropped", 0)
+        if dropped:
+            entry["dropped"] = dropped
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry, default=str).decode()
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        dropped = getattr(record, "dropped", 0)
+        return f"{text} ({dropped} similar suppressed)" if dropped else text
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Let at most `per_second` records through per call site and second for
+    records at or below `level`. The rest are dropped before they are
+    queued, and the next record let through carries the dropped count.
+    """
+
+    def __init__(self, per_second: int, level: int = logging.DEBUG):
+        super().__init__()
+        self.per_second = per_second
+        self.level = level
+        # (path, line) -> [second, passed, dropped]
+        self._windows: Dict[Tuple[str, int], List[int]] = {}
+        # Threadpool code logs too; the counters are read-modify-write
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.level:
+            return True
+        site = (record.pathname, record.lineno)
+        second = int(record.created)
+        with self._lock:
+            window = self._windows.get(site)
+            if window is None or window[0] != second:
+                carried = window[2] if window else 0
+                window = [second, 0, carried]
+                self._windows[site] = window
+            if window[1] >= self.per_second:
+                window[2] += 1
+                return False
+            window[1] += 1
+            if window[2]:
+                record.dropped = window[2]
+                window[2] = 0
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Queue records for the listener thread without formatting them: the
+    message is only built (and exceptions rendered) on the listener, off
+    the event loop. Arguments must not be mutated after the log call. When
+    the queue is full the record is dropped rather than blocking.
+    """
+
+    def __init__(self, log_queue: "queue.Queue"):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Context variables are only visible in the calling thread
+        record.request_id = request_id_var.get()
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: Optional[QueueListener] = None
+
+
+def setup_logging(level: str = "INFO", fmt: str = "json", debug_per_second: int = 20,
+                  queue_size: int = 10000, stream: Optional[TextIO] = None) -> None:
+    """
+    Route all logging (including uvicorn's) through a bounded queue to a
+    handler writing to `stream` (stdout by default) on a background
+    thread. Idempotent.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JSONFormatter() if fmt == "json" else TextFormatter())
+
+    handler = NonBlockingQueueHandler(log_queue)
+    handler.addFilter(SamplingFilter(debug_per_second))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level.upper())
+
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers = []
+        uvicorn_logger.propagate = True
+
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
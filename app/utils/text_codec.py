@@ -0,0 +1,237 @@
+# app/utils/text_codec.py
+import re
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+
+# Extracted text lives compressed in its own table (migrations/submission_texts.sql)
+TEXT_TABLE = "submission_texts"
+DICTIONARY_TABLE = "text_dictionaries"
+
+CODECS = ("zlib", "zstd")
+# zlib only looks back 32 KiB, so a longer dictionary is wasted
+ZLIB_MAX_DICTIONARY = 32 * 1024
+_WORD_RE = re.compile(r"\S+\s+")
+
+
+@dataclass(frozen=True)
+class Dictionary:
+    id: int
+    codec: str
+    data: bytes
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError as e:
+        raise RuntimeError("TEXT_CODEC=zstd requires zstandard (pip install zstandard)") from e
+    return zstandard
+
+
+def compress(text: str, codec: str = "zlib", dictionary: Optional[bytes] = None, level: int = 6) -> bytes:
+    raw = text.encode("utf-8")
+    if codec == "zlib":
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 15, zdict=dictionary) if dictionary \
+            else zlib.compressobj(level)
+        return compressor.compress(raw) + compressor.flush()
+    if codec == "zstd":
+        zstandard = _zstd()
+        dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+        return zstandard.ZstdCompressor(level=level, dict_data=dict_data).compress(raw)
+    raise ValueError(f"Unknown text codec: {codec}")
+
+
+def decompress(data: bytes, codec: str, dictionary: Optional[bytes] = None) -> str:
+    if codec == "zlib":
+        decompressor = zlib.decompressobj(zdict=dictionary) if dictionary else zlib.decompressobj()
+        raw = decompressor.decompress(data) + decompressor.flush()
+    elif codec == "zstd":
+        zstandard = _zstd()
+        dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+        raw = zstandard.ZstdDecompressor(dict_data=dict_data).decompress(data)
+    else:
+        raise ValueError(f"Unknown text codec: {codec}")
+    return raw.decode("utf-8")
+
+
+def train_dictionary(samples: Iterable[str], codec: str = "zlib", size: int = ZLIB_MAX_DICTIONARY) -> bytes:
+    """
+    Build a shared dictionary from sample documents, so small documents,
+    which have too little text to find repeats in themselves, compress
+    against phrasing common to the whole corpus.
+    """
+    samples = list(samples)
+    if codec == "zstd":
+        zstandard = _zstd()
+        return zstandard.train_dictionary(size, [s.encode("utf-8") for s in samples]).as_bytes()
+    if codec != "zlib":
+        raise ValueError(f"Unknown text codec: {codec}")
+
+    # zlib has no trainer: keep the word runs (1-4 words) that save the
+    # most bytes across the samples
+    counts: Counter = Counter()
+    for text in samples:
+        words = _WORD_RE.findall(text)
+        for n in range(1, 5):
+            for i in range(len(words) - n + 1):
+                counts["".join(words[i:i + n])] += 1
+    size = min(size, ZLIB_MAX_DICTIONARY)
+    chosen, total = [], 0
+    for phrase, count in sorted(counts.items(), key=lambda item: item[1] * len(item[0]), reverse=True):
+        if count < 2:
+            break
+        length = len(phrase.encode("utf-8"))
+        if total + length > size:
+            continue
+        chosen.append(phrase)
+        total += length
+    # Most valuable last: back-references to the end of the dictionary are shortest
+    return "".join(reversed(chosen)).encode("utf-8")
+
+
+# Dictionaries are immutable, so once loaded they are kept for the life of
+# the worker; the newest one (used for new text) is re-checked periodically
+_dictionaries: Dict[int, Dictionary] = {}
+_active: Tuple[float, Optional[Dictionary]] = (0.0, None)
+_ACTIVE_CHECK_SECONDS = 300
+
+
+def get_dictionary(supabase, dictionary_id: int) -> Dictionary:
+    dictionary = _dictionaries.get(dictionary_id)
+    if dictionary is None:
+        row = supabase.table(DICTIONARY_TABLE).select("id, codec, data") \
+            .eq("id", dictionary_id).execute().data[0]
+        dictionary = _dictionaries[dictionary_id] = _from_row(row)
+    return dictionary
+
+
+def active_dictionary(supabase, codec: str) -> Optional[Dictionary]:
+    global _active
+    checked_at, dictionary = _active
+    if time.monotonic() - checked_at < _ACTIVE_CHECK_SECONDS and (dictionary is None or dictionary.codec == codec):
+        return dictionary
+    rows = supabase.table(DICTIONARY_TABLE).select("id, codec, data") \
+        .eq("codec", codec).order("id", desc=True).limit(1).execute().data
+    dictionary = _from_row(rows[0]) if rows else None
+    if dictionary is not None:
+        _dictionaries[dictionary.id] = dictionary
+    _active = (time.monotonic(), dictionary)
+    return dictionary
+
+
+def _from_row(row: dict) -> Dictionary:
+    return Dictionary(row["id"], row["codec"], _bytea(row["data"]))
+
+
+def _bytea(value: str) -> bytes:
+    # PostgREST returns bytea as "\x" followed by hex
+    return bytes.fromhex(value[2:]) if isinstance(value, str) else bytes(value)
+
+
+def encode_row(supabase, submission_id: str, text: str) -> dict:
+    """The submission_texts row for `text`, compressed with the configured codec."""
+    codec = settings.TEXT_CODEC
+    dictionary = None
+    if len(text) <= settings.TEXT_DICTIONARY_MAX_CHARS:
+        dictionary = active_dictionary(supabase, codec)
+    data = compress(text, codec, dictionary.data if dictionary else None, settings.TEXT_COMPRESSION_LEVEL)
+    return {
+        "submission_id": submission_id,
+        "codec": codec,
+        "dictionary_id": dictionary.id if dictionary else None,
+        "data": "\\x" + data.hex(),
+        "raw_size": len(text.encode("utf-8")),
+        "compressed_size": len(data),
+    }
+
+
+def save_text(supabase, submission_id: str, text: str) -> None:
+    supabase.table(TEXT_TABLE).upsert(
+        encode_row(supabase, submission_id, text), on_conflict="submission_id"
+    ).execute()
+
+
+def _decode_row(supabase, row: dict) -> str:
+    dictionary = get_dictionary(supabase, row["dictionary_id"]).data if row.get("dictionary_id") else None
+    return decompress(_bytea(row["data"]), row["codec"], dictionary)
+
+
+def load_texts(supabase, submission_ids: List[str]) -> Dict[str, str]:
+    """
+    Decompressed text for each of the submissions that has one. Rows
+    uploaded before the --migrate backfill still hold plain text in
+    submissions.extracted_text, which is used for them.
+    """
+    if not submission_ids:
+        return {}
+    rows = supabase.table(TEXT_TABLE).select("submission_id, codec, dictionary_id, data") \
+        .in_("submission_id", submission_ids).execute().data or []
+    texts = {row["submission_id"]: _decode_row(supabase, row) for row in rows}
+    missing = [i for i in submission_ids if i not in texts]
+    if missing:
+        legacy = supabase.table("submissions").select("id, extracted_text") \
+            .in_("id", missing).execute().data or []
+        texts.update({r["id"]: r["extracted_text"] for r in legacy if r.get("extracted_text") is not None})
+    return texts
+
+
+def load_text(supabase, submission_id: str) -> str:
+    """A submission's full text. Raises LookupError if none is stored."""
+    text = load_texts(supabase, [submission_id]).get(submission_id)
+    if text is None:
+        raise LookupError(f"No extracted text stored for submission {submission_id}")
+    return text
+
+
+def _train(supabase, codec: str, sample_count: int) -> int:
+    rows = supabase.table(TEXT_TABLE).select("submission_id, codec, dictionary_id, data") \
+        .order("submission_id").limit(sample_count).execute().data or []
+    # Train on the small documents the dictionary is meant for
+    samples = [text for text in (_decode_row(supabase, r) for r in rows)
+               if len(text) <= settings.TEXT_DICTIONARY_MAX_CHARS]
+    data = train_dictionary(samples, codec)
+    row = supabase.table(DICTIONARY_TABLE).insert({"codec": codec, "data": "\\x" + data.hex()}).execute().data[0]
+    return row["id"]
+
+
+def _migrate(supabase, batch_size: int) -> int:
+    """Move plain submissions.extracted_text into submission_texts."""
+    moved = 0
+    while True:
+        rows = supabase.table("submissions").select("id, extracted_text") \
+            .not_.is_("extracted_text", "null").limit(batch_size).execute().data or []
+        if not rows:
+            return moved
+        supabase.table(TEXT_TABLE).upsert(
+            [encode_row(supabase, r["id"], r["extracted_text"]) for r in rows], on_conflict="submission_id"
+        ).execute()
+        # The search trigger keeps the indexed text when the column is cleared
+        supabase.table("submissions").update({"extracted_text": None}) \
+            .in_("id", [r["id"] for r in rows]).execute()
+        moved += len(rows)
+
+
+if __name__ == "__main__":
+    import argparse
+    import logging
+
+    from app.core.resources import resources
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Compressed submission text maintenance")
+    parser.add_argument("--migrate", action="store_true", help="compress text still stored in submissions")
+    parser.add_argument("--train", action="store_true", help="train a new shared dictionary")
+    parser.add_argument("--samples", type=int, default=500, help="documents to train on")
+    args = parser.parse_args()
+
+    if args.migrate:
+        count = _migrate(resources.supabase, 100)
+        logging.info("Moved %d submission texts", count)
+    if args.train:
+        dictionary_id = _train(resources.supabase, settings.TEXT_CODEC, args.samples)
+        logging.info("Trained %s dictionary %s", settings.TEXT_CODEC, dictionary_id)
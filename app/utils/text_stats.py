@@ -0,0 +1,78 @@
+# app/utils/text_stats.py
+import hashlib
+import math
+import re
+import unicodedata
+from collections import Counter
+from typing import Any, Dict, Optional
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Rough page size for formats without fixed pages (DOCX, TXT)
+WORDS_PER_PAGE = 500
+
+# OpenAI models average ~4 characters per token for English prose
+CHARS_PER_TOKEN = 4
+
+# Small stopword lists; enough to tell the common classroom languages apart
+_STOPWORDS = {
+    "en": {"the", "and", "of", "to", "is", "in", "that", "it", "was", "for", "with", "as", "are", "this"},
+    "es": {"el", "la", "de", "que", "y", "en", "los", "las", "por", "con", "una", "para", "es", "del"},
+    "fr": {"le", "la", "de", "et", "les", "des", "est", "que", "une", "dans", "pour", "pas", "qui", "du"},
+    "de": {"der", "die", "und", "das", "ist", "nicht", "ein", "zu", "den", "mit", "sich", "auf", "ich", "eine"},
+    "it": {"il", "di", "che", "la", "e", "un", "per", "non", "una", "sono", "del", "della", "con", "gli"},
+    "pt": {"de", "que", "o", "a", "e", "do", "da", "em", "um", "para", "com", "não", "uma", "os"},
+    "nl": {"de", "het", "een", "en", "van", "dat", "is", "niet", "op", "te", "zijn", "voor", "met", "die"},
+}
+
+# Only the first few thousand words are needed to detect the language
+_LANGUAGE_SAMPLE_WORDS = 2000
+
+
+def normalize_text(text: str) -> str:
+    """Unicode-normalize, lowercase and collapse whitespace."""
+    return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFKC", text).lower()).strip()
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the LLM token count without loading a tokenizer."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def detect_language(words: list) -> Optional[str]:
+    """
+    Guess the ISO 639-1 language code from stopword frequency.
+    Returns None when the text is too short or matches no list.
+    """
+    counts = Counter(w for w in words[:_LANGUAGE_SAMPLE_WORDS])
+    scores = {
+        lang: sum(counts[w] for w in stopwords)
+        for lang, stopwords in _STOPWORDS.items()
+    }
+    best = max(scores, key=scores.get)
+    return best if scores[best] >= 3 else None
+
+
+def compute_text_stats(text: str, page_count: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Compute the per-submission statistics stored next to the extracted
+    text. Keys match the `submissions` column names.
+
+    Args:
+        text: Extracted document text
+        page_count: Exact page count if the format has one (PDF)
+    """
+    normalized = normalize_text(text)
+    words = _WORD_RE.findall(normalized)
+    if page_count is None:
+        page_count = max(1, math.ceil(len(words) / WORDS_PER_PAGE))
+
+    return {
+        "word_count": len(words),
+        "char_count": len(text),
+        "page_count": page_count,
+        "token_estimate": estimate_tokens(text),
+        "language": detect_language(words),
+        "text_hash": hashlib.sha256(normalized.encode("utf-8")).hexdigest(),
+    }
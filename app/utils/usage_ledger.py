@@ -0,0 +1,157 @@
+# app/utils/usage_ledger.py
+import asyncio
+import logging
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.utils.structured_logging import request_id_var
+
+logger = logging.getLogger(__name__)
+
+LEDGER_TABLE = "llm_usage"
+
+# (user id, endpoint) of the request making LLM calls; set by get_current_user
+_caller: ContextVar[Tuple[str, str]] = ContextVar("llm_caller", default=("", ""))
+
+
+def set_caller(user_id: str, endpoint: str) -> None:
+    _caller.set((user_id, endpoint))
+
+
+@dataclass
+class UsageEntry:
+    feature: str
+    model: str
+    teacher_id: str
+    prompt_tokens: int
+    completion_tokens: int
+    latency_ms: int
+    attempts: int
+    status: str = "ok"
+    cached_tokens: int = 0  # of prompt_tokens, served from the provider's prompt cache
+    prompt: str = ""  # template id, e.g. "generate_feedback@v2"
+    user_id: str = ""
+    endpoint: str = ""
+    request_id: str = ""
+    created_at: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+
+    def row(self) -> Dict[str, Any]:
+        row = asdict(self)
+        # Unauthenticated or background calls have no user or teacher
+        for key in ("user_id", "teacher_id"):
+            row[key] = row[key] or None
+        return row
+
+
+class UsageLedger:
+    """
+    Buffer of LLM usage entries, written to the `llm_usage` table in
+    batches by a background task. `record` only appends to a list, so the
+    request path never waits on the database. A batch is written every
+    `flush_interval` seconds, or sooner once `batch_size` entries are
+    waiting. If writes fail, entries are kept and retried, up to
+    `max_buffer`; beyond that the oldest are dropped.
+    """
+
+    def __init__(
+        self,
+        writer: Callable[[List[Dict[str, Any]]], None],
+        flush_interval: float = 5.0,
+        batch_size: int = 500,
+        max_buffer: int = 20_000,
+    ):
+        self.writer = writer
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_buffer = max_buffer
+        self.dropped = 0
+        self._buffer: List[Dict[str, Any]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+    def record(self, entry: UsageEntry) -> None:
+        user_id, endpoint = _caller.get()
+        entry.user_id = entry.user_id or user_id
+        entry.endpoint = entry.endpoint or endpoint
+        entry.request_id = entry.request_id or request_id_var.get()
+        self._buffer.append(entry.row())
+        self._trim()
+        self._ensure_task()
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    def _trim(self) -> None:
+        excess = len(self._buffer) - self.max_buffer
+        if excess > 0:
+            del self._buffer[:excess]
+            self.dropped += excess
+
+    def _ensure_task(self) -> None:
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        while self._buffer:
+            batch = self._buffer[:self.batch_size]
+            del self._buffer[:self.batch_size]
+            try:
+                await run_in_threadpool(self.writer, batch)
+            except Exception as e:
+                logger.error("Error writing %d LLM usage entries: %s", len(batch), e)
+                # Keep them for the next flush
+                self._buffer[:0] = batch
+                self._trim()
+                return
+
+    async def close(self) -> None:
+        # Wake the flusher and let it finish rather than cancelling it: a
+        # batch it has taken from the buffer would be lost mid-write
+        self._closing = True
+        if self._task is not None:
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+        self._closing = False
+
+
+def _supabase_writer(rows: List[Dict[str, Any]]) -> None:
+    from app.core.resources import resources
+
+    resources.supabase.table(LEDGER_TABLE).insert(rows).execute()
+
+
+_ledger: Optional[UsageLedger] = None
+
+
+def get_ledger() -> UsageLedger:
+    global _ledger
+    if _ledger is None:
+        _ledger = UsageLedger(
+            _supabase_writer,
+            settings.LLM_USAGE_FLUSH_SECONDS,
+            settings.LLM_USAGE_BATCH_SIZE,
+            settings.LLM_USAGE_MAX_BUFFER,
+        )
+    return _ledger
+
+
+def set_ledger(ledger: UsageLedger) -> None:
+    global _ledger
+    _ledger = ledger
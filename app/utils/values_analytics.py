@@ -0,0 +1,84 @@
+# app/utils/values_analytics.py
+from datetime import date, timedelta
+from typing import Any, Dict, List
+
+# Counts are maintained by triggers in migrations/values_analytics.sql
+COUNTS_TABLE = "values_stance_counts"
+
+
+def week_start(day: date) -> date:
+    """Monday of the ISO week containing `day`."""
+    return day - timedelta(days=day.weekday())
+
+
+def iso_week(day: date) -> str:
+    year, week, _ = day.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def fetch_counts(supabase, teacher_id: str, since: date) -> List[Dict[str, Any]]:
+    """Aggregate rows for one teacher from the week starting `since` on."""
+    resp = supabase.table(COUNTS_TABLE) \
+        .select("statement_id, week_start, stance, response_count") \
+        .eq("teacher_id", teacher_id) \
+        .gte("week_start", since.isoformat()) \
+        .gt("response_count", 0) \
+        .execute()
+    return resp.data or []
+
+
+def summarize(rows: List[Dict[str, Any]], statements: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Shape aggregate rows into per-statement totals and weekly for/against
+    splits (oldest week first). Statements nobody answered are left out;
+    the order follows the statement catalog.
+    """
+    by_statement: Dict[str, Dict[str, Dict[str, int]]] = {}
+    for row in rows:
+        weeks = by_statement.setdefault(row["statement_id"], {})
+        counts = weeks.setdefault(row["week_start"], {"for": 0, "against": 0})
+        counts[row["stance"]] = counts.get(row["stance"], 0) + row["response_count"]
+
+    result = []
+    for statement in statements:
+        weeks = by_statement.get(statement["id"])
+        if not weeks:
+            continue
+        week_rows = []
+        for start in sorted(weeks):
+            day = date.fromisoformat(start)
+            week_rows.append({
+                "week": iso_week(day),
+                "week_start": day,
+                "for_count": weeks[start]["for"],
+                "against_count": weeks[start]["against"],
+            })
+        result.append({
+            "statement_id": statement["id"],
+            "text": statement.get("text") or statement.get("statement") or "",
+            "for_count": sum(w["for_count"] for w in week_rows),
+            "against_count": sum(w["against_count"] for w in week_rows),
+            "weeks": week_rows,
+        })
+    return result
+
+
+def rebuild(supabase) -> int:
+    """Recompute all aggregates from values_responses; returns the row count."""
+    return supabase.rpc("rebuild_values_stance_counts", {}).execute().data or 0
+
+
+if __name__ == "__main__":
+    import argparse
+    import logging
+
+    from app.core.resources import resources
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Values analytics maintenance")
+    parser.add_argument("--rebuild", action="store_true", help="rebuild aggregates from raw responses")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        count = rebuild(resources.supabase)
+        logging.info("Rebuilt %d values analytics rows", count)
@@ -0,0 +1,257 @@
+"""
+Extraction benchmark and regression gate for app/utils/file_processor.py.
+
+Generates a deterministic corpus of PDF, DOCX and TXT fixtures (plain,
+two-column and table layouts at several page counts), runs each extractor
+in a fresh subprocess to measure pages/sec, MB/sec and peak RSS, and
+compares the results with a stored baseline.
+
+Usage:
+    python -m benchmarks.bench_extraction                    # compare to baseline
+    python -m benchmarks.bench_extraction --update-baseline  # record a new baseline
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.path.join(HERE, "fixtures")
+BASELINE_PATH = os.path.join(HERE, "baselines", "extraction.json")
+
+PAGE_COUNTS = (1, 10, 50)
+LAYOUTS = ("plain", "columns", "table")
+WORDS = (
+    "analysis argument evidence history society economy revolution industry "
+    "factory worker family city machine culture education policy reform "
+    "government citizen network energy climate science research method"
+).split()
+LINES_PER_PAGE = 50
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+# --- fixture generation ----------------------------------------------------
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _pdf_page_stream(rng: random.Random, layout: str) -> bytes:
+    ops = ["BT", "/F1 10 Tf"]
+    if layout == "plain":
+        for i in range(LINES_PER_PAGE):
+            ops.append(f"1 0 0 1 72 {740 - i * 13} Tm ({_pdf_escape(_sentence(rng, 14))}) Tj")
+    elif layout == "columns":
+        for col_x in (72, 320):
+            for i in range(LINES_PER_PAGE):
+                ops.append(f"1 0 0 1 {col_x} {740 - i * 13} Tm ({_pdf_escape(_sentence(rng, 6))}) Tj")
+    else:
+        for row in range(LINES_PER_PAGE // 2):
+            y = 740 - row * 26
+            for col, x in enumerate((72, 200, 330, 460)):
+                cell = f"{rng.randint(1, 999)}" if col else _sentence(rng, 2)
+                ops.append(f"1 0 0 1 {x + 4} {y + 8} Tm ({_pdf_escape(cell)}) Tj")
+    ops.append("ET")
+    if layout == "table":
+        for row in range(LINES_PER_PAGE // 2):
+            for x in (72, 200, 330, 460):
+                ops.append(f"{x} {740 - row * 26} 128 26 re S")
+    return "\n".join(ops).encode("latin-1")
+
+
+def write_pdf(path: str, pages: int, layout: str, seed: int) -> None:
+    """Write a minimal multi-page PDF with real text objects (no dependencies)."""
+    rng = random.Random(seed)
+    objects: List[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",  # pages tree, filled in below
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for _ in range(pages):
+        stream = _pdf_page_stream(rng, layout)
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_ref = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_ref
+        )
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [" + b" ".join(kids) + b"] /Count %d >>" % pages
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def write_docx(path: str, pages: int, layout: str, seed: int) -> None:
+    from docx import Document
+    from docx.enum.text import WD_BREAK
+
+    rng = random.Random(seed)
+    doc = Document()
+    for page in range(pages):
+        if layout == "table":
+            table = doc.add_table(rows=LINES_PER_PAGE // 2, cols=4)
+            for row in table.rows:
+                row.cells[0].text = _sentence(rng, 2)
+                for cell in row.cells[1:]:
+                    cell.text = str(rng.randint(1, 999))
+        else:
+            words = 6 if layout == "columns" else 14
+            for _ in range(LINES_PER_PAGE // 5):
+                doc.add_paragraph(_sentence(rng, words * 5))
+        if page < pages - 1:
+            doc.add_paragraph().add_run().add_break(WD_BREAK.PAGE)
+    doc.save(path)
+
+
+def write_txt(path: str, pages: int, layout: str, seed: int) -> None:
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        for _ in range(pages):
+            for _ in range(LINES_PER_PAGE):
+                if layout == "columns":
+                    f.write(f"{_sentence(rng, 6):<45}{_sentence(rng, 6)}\n")
+                elif layout == "table":
+                    f.write("\t".join([_sentence(rng, 2)] + [str(rng.randint(1, 999)) for _ in range(3)]) + "\n")
+                else:
+                    f.write(_sentence(rng, 14) + "\n")
+            f.write("\n")
+
+
+WRITERS = {"pdf": write_pdf, "docx": write_docx, "txt": write_txt}
+
+
+def build_corpus(page_counts=PAGE_COUNTS) -> List[Tuple[str, str, int, str]]:
+    """Create missing fixtures; returns (kind, layout, pages, path) tuples."""
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    corpus = []
+    for kind, writer in WRITERS.items():
+        for layout in LAYOUTS:
+            for pages in page_counts:
+                path = os.path.join(FIXTURE_DIR, f"{layout}-{pages}p.{kind}")
+                if not os.path.exists(path):
+                    writer(path, pages, layout, seed=pages * 31 + len(layout))
+                corpus.append((kind, layout, pages, path))
+    return corpus
+
+
+# --- measurement -------------------------------------------------------------
+
+def _child(kind: str, path: str, repeat: int) -> None:
+    """Run inside a fresh interpreter so peak RSS reflects one extractor."""
+    from app.utils import file_processor
+
+    extractor = {
+        "pdf": file_processor.extract_text_from_pdf,
+        "docx": file_processor.extract_text_from_docx,
+        "txt": file_processor.extract_text_from_txt,
+    }[kind]
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    best = float("inf")
+    chars = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        chars = len(extractor(path))
+        best = min(best, time.perf_counter() - start)
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    print(json.dumps({
+        "seconds": best,
+        "chars": chars,
+        "peak_rss_mb": rss_after * scale / 1e6,
+        "extraction_rss_mb": (rss_after - rss_before) * scale / 1e6,
+    }))
+
+
+def measure(kind: str, pages: int, path: str, repeat: int) -> Dict:
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_extraction", "--child", kind, path, str(repeat)],
+        check=True, capture_output=True, text=True,
+    )
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    size_mb = os.path.getsize(path) / 1e6
+    result.update({
+        "pages": pages,
+        "size_mb": size_mb,
+        "pages_per_sec": pages / result["seconds"],
+        "mb_per_sec": size_mb / result["seconds"],
+    })
+    return result
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    regressions = []
+    for key, r in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        if r["pages_per_sec"] < base["pages_per_sec"] * (1 - tolerance):
+            regressions.append(f"{key}: throughput {base['pages_per_sec']:.1f} -> {r['pages_per_sec']:.1f} pages/s")
+        if r["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(f"{key}: peak RSS {base['peak_rss_mb']:.1f} -> {r['peak_rss_mb']:.1f} MB")
+    return regressions
+
+
+def main():
+    if len(sys.argv) == 5 and sys.argv[1] == "--child":
+        _child(sys.argv[2], sys.argv[3], int(sys.argv[4]))
+        return
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3, help="runs per fixture (best is kept)")
+    parser.add_argument("--pages", type=int, nargs="+", default=list(PAGE_COUNTS))
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'fixture':24} {'pages/s':>10} {'MB/s':>8} {'peak RSS':>10} {'extract RSS':>12}")
+    for kind, layout, pages, path in build_corpus(tuple(args.pages)):
+        key = f"{kind}/{layout}/{pages}p"
+        r = measure(kind, pages, path, args.repeat)
+        results[key] = r
+        print(f"{key:24} {r['pages_per_sec']:>10.1f} {r['mb_per_sec']:>8.2f} "
+              f"{r['peak_rss_mb']:>8.1f}MB {r['extraction_rss_mb']:>10.1f}MB")
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"\nBaseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --update-baseline to record one.")
+        return
+    with open(args.baseline) as f:
+        regressions = compare(results, json.load(f), args.tolerance)
+    if regressions:
+        print(f"\nRegressions beyond {args.tolerance:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"\nNo regressions beyond {args.tolerance:.0%}.")
+
+
+if __name__ == "__main__":
+    main()
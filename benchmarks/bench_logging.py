@@ -0,0 +1,98 @@
+"""
+Measure the logging cost one authenticated /values/next-statement request
+pays on the event loop: the old calls (eager f-strings at INFO written
+synchronously by a StreamHandler) against the new ones (lazy DEBUG calls
+through the queue pipeline), at INFO and at DEBUG with sampling.
+
+Usage:
+    python -m benchmarks.bench_logging [--requests 20000]
+"""
+import argparse
+import logging
+import tempfile
+import time
+from datetime import datetime
+
+from app.utils import structured_logging
+
+logger = logging.getLogger("bench")
+
+SECRET = "super-secret-jwt-signing-key"
+ISSUER = "https://example.supabase.co/auth/v1"
+STATEMENT = {"id": "3f1c2a9e-1111-2222-3333-444455556666", "text": "I enjoy working in groups.",
+             "category": "collaboration", "created_at": "2024-01-01T00:00:00+00:00"}
+STATEMENTS = [dict(STATEMENT, id=str(i)) for i in range(40)]
+
+
+def old_request():
+    # verify_token
+    logger.info(f"JWT secret being used: {SECRET[:8]}...")
+    logger.info(f"JWT issuer: {ISSUER}")
+    logger.info(f"JWT audience: authenticated")
+    # get_next_statement
+    week_start = datetime.now()
+    responded_ids = {"1", "2"}
+    available = [s for s in STATEMENTS if s["id"] not in responded_ids]
+    logger.info(f"Week start: {week_start}")
+    logger.info(f"Found {len(STATEMENTS)} statements")
+    logger.info(f"Found {len(responded_ids)} responses this week")
+    logger.info(f"Responded to statement IDs: {responded_ids}")
+    logger.info(f"Available statements: {len(available)}")
+    logger.info(f"Selected statement: {available[0]}")
+    logger.info(f"Returning statement: {available[0]}")
+
+
+def new_request():
+    week_start = datetime.now()
+    responded_ids = {"1", "2"}
+    available = [s for s in STATEMENTS if s["id"] not in responded_ids]
+    logger.debug(
+        "Next statement for %s: %d of %d available since %s",
+        "user-1", len(available), len(STATEMENTS), week_start,
+    )
+
+
+def reset_root():
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+
+def timed(fn, requests: int) -> float:
+    start = time.perf_counter()
+    for _ in range(requests):
+        fn()
+    return (time.perf_counter() - start) / requests
+
+
+def run_old(requests: int, out) -> float:
+    reset_root()
+    logging.basicConfig(level=logging.INFO, stream=out, force=True)
+    return timed(old_request, requests)
+
+
+def run_new(requests: int, out, level: str) -> tuple:
+    reset_root()
+    structured_logging.setup_logging(level, "json", debug_per_second=20, queue_size=100_000, stream=out)
+    loop_time = timed(new_request, requests)
+    start = time.perf_counter()
+    structured_logging.shutdown_logging()
+    return loop_time, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryFile("w+") as out:
+        old = run_old(args.requests, out)
+        print(f"before (10 eager INFO lines, sync):   {old * 1e6:7.2f} us/request on the loop")
+        for level in ("INFO", "DEBUG"):
+            loop_time, drain = run_new(args.requests, out, level)
+            print(f"after, LOG_LEVEL={level:<5} (queued):      {loop_time * 1e6:7.2f} us/request on the loop"
+                  f"  (listener drained in {drain * 1e3:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Measure the per-request overhead of MetricsMiddleware and the cost of the
+individual metric updates, so we can confirm instrumentation is cheap
+enough to leave on in production.
+
+Usage:
+    python -m benchmarks.bench_metrics [--requests 100000]
+"""
+import argparse
+import asyncio
+import time
+
+from app.utils.metrics import (
+    HTTP_REQUEST_DURATION,
+    LLM_TOKENS,
+    SUPABASE_QUERY_DURATION,
+    MetricsMiddleware,
+)
+
+
+class _Route:
+    path = "/feedback/my-feedback"
+
+    @staticmethod
+    async def endpoint():
+        pass
+
+
+class _App:
+    routes = [_Route]
+
+    async def __call__(self, scope, receive, send):
+        scope["endpoint"] = _Route.endpoint
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def drive(app, requests: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    inner = app if not isinstance(app, MetricsMiddleware) else app.app
+    start = time.perf_counter()
+    for _ in range(requests):
+        scope = {"type": "http", "method": "GET", "path": "/feedback/my-feedback", "app": inner}
+        await app(scope, receive, send)
+    return (time.perf_counter() - start) / requests
+
+
+def per_call(fn, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=100_000)
+    args = parser.parse_args()
+
+    bare = _App()
+    base = asyncio.run(drive(bare, args.requests))
+    instrumented = asyncio.run(drive(MetricsMiddleware(bare), args.requests))
+    print(f"bare ASGI app:         {base * 1e6:6.2f} us/request")
+    print(f"with MetricsMiddleware: {instrumented * 1e6:6.2f} us/request "
+          f"(+{(instrumented - base) * 1e6:.2f} us)")
+
+    print(f"histogram observe:      "
+          f"{per_call(lambda: HTTP_REQUEST_DURATION.labels('/x', 'GET', '200').observe(0.01), args.requests) * 1e6:6.2f} us")
+    print(f"supabase observe:       "
+          f"{per_call(lambda: SUPABASE_QUERY_DURATION.labels('submissions', 'select').observe(0.01), args.requests) * 1e6:6.2f} us")
+    print(f"counter inc:            "
+          f"{per_call(lambda: LLM_TOKENS.labels('generate_feedback', 'gpt-4o-mini', 'prompt').inc(100), args.requests) * 1e6:6.2f} us")
+
+
+if __name__ == "__main__":
+    main()
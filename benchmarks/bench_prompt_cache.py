@@ -0,0 +1,153 @@
+"""
+Compare prompt layouts for provider-side prompt caching: the original
+generate_feedback template (student text first) against the current one
+(static instructions and teacher notes first, student text last).
+
+For each layout, a stream of feedback requests from a few teachers is
+sent to OpenAI with streaming on, and the benchmark reports
+time-to-first-token, total time and the share of prompt tokens served
+from the cache. With --dry-run nothing is sent; instead it reports how
+many tokens of each prompt match the start of an earlier one, which is
+the most the provider could serve from its cache.
+
+Usage:
+    python -m benchmarks.bench_prompt_cache [--dry-run] [--calls 20] [--versions 1 2]
+
+OpenAI only caches prompts of 1024 tokens or more, so the teacher notes
+default to a rubric long enough for the stable prefix to qualify.
+Live runs use OPENAI_API_KEY and OPENAI_MODEL from the environment.
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app.utils.prompts import PromptTemplate, get_template
+from app.utils.text_stats import estimate_tokens
+from benchmarks.bench_text_storage import make_essay
+
+# OpenAI's minimum cacheable prompt length
+CACHE_MIN_TOKENS = 1024
+TONES = ["encouraging", "direct", "formal"]
+
+
+def make_notes(rng: random.Random, words: int) -> str:
+    criteria = ["Thesis", "Evidence", "Organisation", "Style", "Conventions", "Citations"]
+    lines = []
+    while sum(len(line.split()) for line in lines) < words:
+        lines.append(f"- {rng.choice(criteria)}: " + make_essay(rng, rng.randint(150, 400)))
+    return "\n".join(lines)
+
+
+def workload(rng: random.Random, calls: int, teachers: int, notes_words: int, essay_chars: int) -> List[Dict[str, str]]:
+    """Feedback requests, interleaved across teachers who each keep the same notes and tone."""
+    profiles = [(make_notes(rng, notes_words), TONES[i % len(TONES)]) for i in range(teachers)]
+    requests = []
+    for i in range(calls):
+        notes, tone = profiles[i % teachers]
+        requests.append({
+            "extracted_text": make_essay(rng, essay_chars),
+            "teacher_notes": notes,
+            "tone": tone,
+            "conciseness": "medium",
+            "grade": rng.choice(["N/A", 72, 85, 91]),
+        })
+    return requests
+
+
+def flatten(messages: List[Dict[str, str]]) -> str:
+    return "".join(f"{m['role']}\n{m['content']}\n" for m in messages)
+
+
+def dry_run(template: PromptTemplate, requests: List[Dict[str, str]]) -> Tuple[float, float, float]:
+    """(mean prompt tokens, mean reusable prefix tokens, share of calls whose prefix is cacheable)."""
+    seen: List[str] = []
+    prompt_tokens, prefix_tokens, cacheable = [], [], 0
+    for values in requests:
+        prompt = flatten(template.messages(**values))
+        shared = max((len(os.path.commonprefix([prompt, earlier])) for earlier in seen), default=0)
+        tokens = estimate_tokens(prompt[:shared])
+        prompt_tokens.append(estimate_tokens(prompt))
+        prefix_tokens.append(tokens)
+        cacheable += tokens >= CACHE_MIN_TOKENS
+        seen.append(prompt)
+    return statistics.mean(prompt_tokens), statistics.mean(prefix_tokens), cacheable / len(requests)
+
+
+def stream_once(client, model: str, messages: List[Dict[str, str]], max_tokens: int) -> Tuple[float, float, int, int]:
+    """(time to first token, total time, prompt tokens, cached prompt tokens) for one streamed call."""
+    started = time.perf_counter()
+    first: Optional[float] = None
+    usage = None
+    stream = client.chat.completions.create(
+        model=model,
+        messages=messages,
+        max_tokens=max_tokens,
+        stream=True,
+        # Sent raw: the pinned SDK predates stream_options
+        extra_body={"stream_options": {"include_usage": True}},
+    )
+    for chunk in stream:
+        if first is None and chunk.choices and chunk.choices[0].delta.content:
+            first = time.perf_counter() - started
+        usage = getattr(chunk, "usage", None) or usage
+    total = time.perf_counter() - started
+    if usage is None:
+        return first or total, total, 0, 0
+    usage = usage if isinstance(usage, dict) else usage.model_dump()
+    cached = (usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0
+    return first or total, total, usage.get("prompt_tokens", 0), cached
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="report reusable prefixes without calling the API")
+    parser.add_argument("--versions", type=int, nargs="+", default=[1, 2], help="generate_feedback template versions")
+    parser.add_argument("--calls", type=int, default=20, help="requests per layout")
+    parser.add_argument("--teachers", type=int, default=2)
+    parser.add_argument("--notes-words", type=int, default=1000, help="length of each teacher's notes")
+    parser.add_argument("--essay-chars", type=int, default=4000)
+    parser.add_argument("--max-tokens", type=int, default=32, help="completion length; TTFT doesn't depend on it")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    requests = workload(random.Random(args.seed), args.calls, args.teachers, args.notes_words, args.essay_chars)
+    templates = [get_template("generate_feedback", version) for version in args.versions]
+
+    if args.dry_run:
+        print(f"{'prompt':<24}{'prompt tok':>12}{'prefix tok':>12}{'cacheable':>11}")
+        for template in templates:
+            prompt, prefix, cacheable = dry_run(template, requests)
+            print(f"{template.id:<24}{prompt:>12.0f}{prefix:>12.0f}{cacheable:>10.0%}")
+        return
+
+    from app.core.resources import get_openai
+
+    client = get_openai()
+    model = os.environ.get("OPENAI_MODEL", "gpt-4o-mini")
+    print(f"{'prompt':<24}{'ttft p50':>10}{'ttft p95':>10}{'total p50':>11}{'cached':>8}")
+    for template in templates:
+        # Distinct per layout so one layout can't warm the cache for the other
+        salt = f"Request batch {template.id} {time.time_ns()}.\n"
+        ttfts, totals, prompt_tokens, cached_tokens = [], [], 0, 0
+        for values in requests:
+            messages = template.messages(**values)
+            messages[0] = {"role": "system", "content": salt + messages[0]["content"]}
+            ttft, total, prompt, cached = stream_once(client, model, messages, args.max_tokens)
+            ttfts.append(ttft * 1000)
+            totals.append(total * 1000)
+            prompt_tokens += prompt
+            cached_tokens += cached
+        print(f"{template.id:<24}{percentile(ttfts, 0.5):>8.0f}ms{percentile(ttfts, 0.95):>8.0f}ms"
+              f"{percentile(totals, 0.5):>9.0f}ms{cached_tokens / max(prompt_tokens, 1):>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
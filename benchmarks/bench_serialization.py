@@ -0,0 +1,90 @@
+"""
+Compare list-endpoint serialization per 1,000 rows: the old per-row model
++ response_model re-validation + stdlib json path against bulk validation
+with pydantic-core JSON output, and the gzip cost on top.
+
+Usage:
+    python -m benchmarks.bench_serialization [--rows 1000] [--text-chars 5000]
+"""
+import argparse
+import gzip
+import json
+import random
+import string
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.models import Submission
+
+
+def make_rows(count: int, text_chars: int) -> List[dict]:
+    rng = random.Random(7)
+    words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9))) for _ in range(2000)]
+    rows = []
+    for _ in range(count):
+        text = " ".join(rng.choices(words, k=text_chars // 6))[:text_chars]
+        rows.append({
+            "id": str(uuid.uuid4()),
+            "user_id": str(uuid.uuid4()),
+            "file_name": "essay.pdf",
+            "extracted_text": text,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "word_count": len(text.split()),
+            "char_count": len(text),
+            "page_count": 2,
+            "token_estimate": len(text) // 4,
+            "language": "en",
+        })
+    return rows
+
+
+def old_path(rows: List[dict], adapter: TypeAdapter) -> bytes:
+    models = [Submission(**row) for row in rows]
+    # FastAPI re-validates the return value against response_model, then
+    # runs jsonable_encoder and the stdlib encoder
+    validated = adapter.validate_python([m.model_dump() for m in models])
+    return json.dumps(jsonable_encoder(validated)).encode("utf-8")
+
+
+def new_path(rows: List[dict], adapter: TypeAdapter) -> bytes:
+    return adapter.dump_json(adapter.validate_python(rows))
+
+
+def timed(fn, *args, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--text-chars", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows, args.text_chars)
+    adapter = TypeAdapter(List[Submission])
+    scale = 1000 / args.rows
+
+    old = timed(old_path, rows, adapter, repeat=args.repeat)
+    new = timed(new_path, rows, adapter, repeat=args.repeat)
+    body = new_path(rows, adapter)
+    gz = timed(gzip.compress, body, repeat=args.repeat)
+
+    print(f"old path:   {old * 1000 * scale:8.2f} ms / 1k rows")
+    print(f"new path:   {new * 1000 * scale:8.2f} ms / 1k rows ({old / new:.1f}x faster)")
+    print(f"gzip:       {gz * 1000 * scale:8.2f} ms / 1k rows, "
+          f"{len(body) / 1e6:.2f} MB -> {len(gzip.compress(body)) / 1e6:.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark MinHash signing and LSH index build/query time.
+
+Usage:
+    python -m benchmarks.bench_similarity [--docs 100000] [--queries 1000]
+
+Signing is measured on generated essays. The index is built from random
+signatures with planted near-duplicates, since signing 100k real
+documents would dominate the run without telling us anything new.
+"""
+import argparse
+import random
+import time
+
+from app.utils.similarity import (
+    DEFAULT_BANDS,
+    DEFAULT_NUM_PERM,
+    LSHIndex,
+    minhash_signature,
+)
+
+VOCAB = [f"word{i}" for i in range(5000)]
+
+
+def make_essay(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(VOCAB) for _ in range(words))
+
+
+def perturb(signature, rng: random.Random, fraction: float):
+    out = list(signature)
+    for i in rng.sample(range(len(out)), int(len(out) * fraction)):
+        out[i] = rng.getrandbits(32)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=1_000)
+    parser.add_argument("--essay-words", type=int, default=1_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    essays = [make_essay(rng, args.essay_words) for _ in range(50)]
+    start = time.perf_counter()
+    for essay in essays:
+        minhash_signature(essay)
+    sign_ms = (time.perf_counter() - start) * 1000 / len(essays)
+    print(f"minhash_signature ({args.essay_words} words): {sign_ms:.2f} ms/doc")
+
+    signatures = [
+        [rng.getrandbits(32) for _ in range(DEFAULT_NUM_PERM)]
+        for _ in range(args.docs)
+    ]
+    index = LSHIndex(DEFAULT_BANDS)
+    start = time.perf_counter()
+    for i, sig in enumerate(signatures):
+        index.add(str(i), sig)
+    build_s = time.perf_counter() - start
+    print(f"LSH build ({args.docs} docs): {build_s:.2f} s "
+          f"({build_s * 1e6 / args.docs:.1f} us/doc)")
+
+    # Half the queries are planted ~90% duplicates, half are unrelated
+    queries = []
+    for _ in range(args.queries // 2):
+        target = rng.randrange(args.docs)
+        queries.append((str(target), perturb(signatures[target], rng, 0.1)))
+    for _ in range(args.queries - len(queries)):
+        queries.append((None, [rng.getrandbits(32) for _ in range(DEFAULT_NUM_PERM)]))
+
+    found = 0
+    start = time.perf_counter()
+    for expected, sig in queries:
+        hits = index.query(sig, threshold=0.8)
+        if expected is not None and hits and hits[0][0] == expected:
+            found += 1
+    query_us = (time.perf_counter() - start) * 1e6 / len(queries)
+    print(f"LSH query: {query_us:.1f} us/query, "
+          f"recall on planted duplicates {found / (args.queries // 2):.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Cold-start benchmark for the API: import time of `app.main` and the
+resident memory of a process that has imported it (what each uvicorn
+worker pays before serving its first request).
+
+Each sample runs in a fresh interpreter with placeholder credentials, so
+nothing touches the network. Run at two commits to compare:
+
+    python -m benchmarks.bench_startup --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+DUMMY_ENV = {
+    "SUPABASE_URL": "http://127.0.0.1:54321",
+    "SUPABASE_KEY": "bench-key",
+    "SUPABASE_JWT_SECRET": "bench-secret",
+    "OPENAI_API_KEY": "sk-bench",
+    "UPLOAD_DIR": os.path.join("benchmarks", "fixtures", "startup-uploads"),
+}
+
+CHILD = r"""
+import json, resource, sys, time
+start = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - start
+# ru_maxrss is KiB on Linux, bytes on macOS
+scale = 1 if sys.platform == "darwin" else 1024
+print(json.dumps({
+    "import_seconds": elapsed,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 1e6,
+    "modules": len(sys.modules),
+    "heavy_modules": sorted(m for m in ("pdfplumber", "docx", "openai", "supabase") if m in sys.modules),
+}))
+"""
+
+
+def sample() -> dict:
+    env = {**os.environ, **DUMMY_ENV}
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD],
+        check=True, capture_output=True, text=True, env=env,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    samples = [sample() for _ in range(args.runs)]
+    import_ms = [s["import_seconds"] * 1000 for s in samples]
+    rss = [s["rss_mb"] for s in samples]
+    print(f"import app.main: median {statistics.median(import_ms):.0f} ms "
+          f"(min {min(import_ms):.0f}, max {max(import_ms):.0f}) over {args.runs} runs")
+    print(f"RSS after import: median {statistics.median(rss):.1f} MB (max {max(rss):.1f})")
+    print(f"modules loaded: {samples[-1]['modules']}")
+    print(f"client libraries loaded at import: {', '.join(samples[-1]['heavy_modules']) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Compare ways of storing submission text: plain, zlib and zstd, with and
+without a shared dictionary. Reports stored size, the size of the
+PostgREST response for one row, and the time to parse that response and
+decompress the text, per document size.
+
+Usage:
+    python -m benchmarks.bench_text_storage [--corpus DIR] [--docs 300]
+
+Without --corpus, essays are generated from common academic phrasing.
+With it, every .txt file under DIR is used (e.g. text exported from real
+submissions). zstd rows are skipped unless zstandard is installed.
+"""
+import argparse
+import os
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+import orjson
+
+from app.utils.text_codec import compress, decompress, train_dictionary
+
+PHRASES = [
+    "In this essay I will argue that", "On the other hand,", "For example,", "In conclusion,",
+    "It is important to note that", "As a result,", "According to the author,", "This shows that",
+    "the main character", "the reader", "throughout the novel", "in the first paragraph",
+    "Furthermore,", "However,", "In addition,", "the evidence suggests that", "climate change",
+    "social media", "the industrial revolution", "in my opinion", "the data in the table",
+]
+VOCAB = (
+    "the of and to a in is that it was for on are as with his they be at one have this from "
+    "or had by not but what some we can out other were all there when up use your how said an "
+    "each she which do their time if will way about many then them write would like so these "
+    "her long make thing see him two has look more day could go come did number sound no most "
+    "people my over know water than call first who may down side been now find history society "
+    "argument experiment result theory analysis character government economy environment"
+).split()
+SIZES = (1_000, 4_000, 16_000, 64_000, 256_000)
+
+
+def make_essay(rng: random.Random, chars: int) -> str:
+    parts, length = [], 0
+    while length < chars:
+        sentence = " ".join(
+            rng.choice(PHRASES) if rng.random() < 0.15 else VOCAB[min(int(rng.paretovariate(1.2)) - 1, len(VOCAB) - 1)]
+            for _ in range(rng.randint(8, 24))
+        )
+        sentence = sentence[0].upper() + sentence[1:] + ". "
+        parts.append(sentence)
+        length += len(sentence)
+        if rng.random() < 0.1:
+            parts.append("\n\n")
+    return "".join(parts)[:chars]
+
+
+def load_corpus(directory: str) -> List[str]:
+    texts = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name.endswith(".txt"):
+                with open(os.path.join(root, name), encoding="utf-8", errors="replace") as f:
+                    texts.append(f.read())
+    return texts
+
+
+def codecs() -> List[str]:
+    try:
+        import zstandard  # noqa: F401
+        return ["zlib", "zstd"]
+    except ImportError:
+        return ["zlib"]
+
+
+def measure(docs: List[str], codec: Optional[str], dictionary: Optional[bytes], repeat: int) -> Tuple[float, float, float]:
+    """(stored bytes, response bytes, parse + decompress us) averaged per document."""
+    stored = payload = elapsed = 0.0
+    for text in docs:
+        if codec is None:
+            body = orjson.dumps([{"extracted_text": text}])
+            stored += len(text.encode("utf-8"))
+        else:
+            data = compress(text, codec, dictionary)
+            body = orjson.dumps([{"codec": codec, "dictionary_id": 1, "data": "\\x" + data.hex()}])
+            stored += len(data)
+        payload += len(body)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            row = orjson.loads(body)[0]
+            if codec is not None:
+                decompress(bytes.fromhex(row["data"][2:]), codec, dictionary)
+        elapsed += (time.perf_counter() - start) / repeat
+    n = len(docs)
+    return stored / n, payload / n, elapsed / n * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", help="directory of .txt files to use instead of generated essays")
+    parser.add_argument("--docs", type=int, default=300, help="generated documents per size")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    if args.corpus:
+        texts = load_corpus(args.corpus)
+        rng.shuffle(texts)
+        train, test = texts[: len(texts) // 2], texts[len(texts) // 2:]
+        groups: Dict[str, List[str]] = {}
+        for text in test:
+            size = next((s for s in SIZES if len(text) <= s), SIZES[-1])
+            groups.setdefault(f"<={size // 1000}k chars", []).append(text)
+    else:
+        train = [make_essay(rng, rng.choice(SIZES[:3])) for _ in range(args.docs)]
+        groups = {f"{size // 1000}k chars": [make_essay(rng, size) for _ in range(max(5, args.docs // (size // 1000)))]
+                  for size in SIZES}
+
+    dictionaries = {}
+    for codec in codecs():
+        start = time.perf_counter()
+        dictionaries[codec] = train_dictionary(train, codec)
+        print(f"trained {codec} dictionary: {len(dictionaries[codec]) // 1024} KiB "
+              f"in {time.perf_counter() - start:.2f}s from {len(train)} documents")
+
+    variants = [("plain", None, None)]
+    for codec in codecs():
+        variants += [(codec, codec, None), (f"{codec}+dict", codec, dictionaries[codec])]
+
+    print(f"\n{'size':<14}{'storage':<12}{'stored B':>10}{'ratio':>8}{'response B':>12}{'read us':>10}")
+    for label, docs in groups.items():
+        plain_size = None
+        for name, codec, dictionary in variants:
+            stored, payload, micros = measure(docs, codec, dictionary, args.repeat)
+            plain_size = plain_size or stored
+            print(f"{label:<14}{name:<12}{stored:>10.0f}{plain_size / stored:>8.2f}{payload:>12.0f}{micros:>10.1f}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+"""
+End-to-end load-test harness: runs the API against an in-memory
+PostgREST stand-in and a fake OpenAI server, then drives a weighted mix
+of traffic and reports throughput and latency percentiles per endpoint.
+
+Usage:
+    python -m benchmarks.loadtest --concurrency 20 --duration 30 --output run.json
+    python -m benchmarks.loadtest --compare baseline.json --output run.json
+"""
@@ -0,0 +1,384 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.loadtest import __doc__ as USAGE
+from benchmarks.loadtest.tokens import mint_service_key, mint_token
+
+JWT_SECRET = "loadtest-secret-loadtest-secret-32b"
+ESSAY = (
+    "The industrial revolution transformed how people lived and worked. "
+    "Factories drew families from farms into crowded cities, and new machines "
+    "set the pace of the working day.\n\n"
+) * 40
+DEFAULT_MIX = "listings=6,upload=1,generate=1,follow_up=1,values=1"
+
+
+@dataclass
+class User:
+    id: str
+    token: str
+    submissions: List[str] = field(default_factory=list)
+
+
+@dataclass
+class World:
+    teachers: List[User]
+    students: List[User]
+    submissions: List[str]
+    statements: List[str]
+
+
+@dataclass
+class Stats:
+    latencies: Dict[str, List[float]] = field(default_factory=dict)
+    errors: Dict[str, int] = field(default_factory=dict)
+    client_errors: Dict[str, int] = field(default_factory=dict)
+
+    def record(self, label: str, seconds: float, status: Optional[int]) -> None:
+        self.latencies.setdefault(label, []).append(seconds)
+        if status is None or status >= 500:
+            self.errors[label] = self.errors.get(label, 0) + 1
+        elif status >= 400:
+            self.client_errors[label] = self.client_errors.get(label, 0) + 1
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_ready(url: str, proc: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"Server for {url} exited with code {proc.returncode}")
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.TransportError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not start within {timeout}s")
+
+
+@contextmanager
+def servers(args):
+    """Start the PostgREST fake, the OpenAI fake and the API under uvicorn."""
+    pg_port, oa_port, api_port = _free_port(), _free_port(), _free_port()
+    pg_url = f"http://127.0.0.1:{pg_port}"
+    upload_dir = tempfile.mkdtemp(prefix="cura-loadtest-")
+    base_env = {**os.environ, "PYTHONPATH": os.getcwd()}
+    api_env = {
+        **base_env,
+        "SUPABASE_URL": pg_url,
+        "SUPABASE_KEY": mint_service_key(JWT_SECRET),
+        "SUPABASE_JWT_SECRET": JWT_SECRET,
+        "OPENAI_API_KEY": "sk-loadtest",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{oa_port}/v1",
+        "UPLOAD_DIR": upload_dir,
+    }
+    oa_env = {
+        **base_env,
+        "FAKE_OPENAI_LATENCY_MS": str(args.openai_latency_ms),
+        "FAKE_OPENAI_JITTER_MS": str(args.openai_jitter_ms),
+    }
+
+    def start(target: str, port: int, env: Dict[str, str], workers: int = 1) -> subprocess.Popen:
+        cmd = [sys.executable, "-m", "uvicorn", target, "--host", "127.0.0.1",
+               "--port", str(port), "--log-level", "warning"]
+        if workers > 1:
+            cmd += ["--workers", str(workers)]
+        return subprocess.Popen(cmd, env=env)
+
+    procs = []
+    try:
+        procs.append(start("benchmarks.loadtest.fake_postgrest:app", pg_port, base_env))
+        procs.append(start("benchmarks.loadtest.fake_openai:app", oa_port, oa_env))
+        _wait_ready(pg_url, procs[0])
+        _wait_ready(f"http://127.0.0.1:{oa_port}", procs[1])
+        procs.append(start("app.main:app", api_port, api_env, args.workers))
+        _wait_ready(f"http://127.0.0.1:{api_port}/", procs[2])
+        yield pg_url, f"http://127.0.0.1:{api_port}"
+    finally:
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+
+async def seed(pg_url: str, args, rng: random.Random) -> World:
+    """Create teachers, students, assignments, submissions, feedback and statements."""
+    async with httpx.AsyncClient(base_url=f"{pg_url}/rest/v1") as pg:
+        async def insert(table: str, rows: List[Dict]) -> List[Dict]:
+            resp = await pg.post(f"/{table}", json=rows)
+            resp.raise_for_status()
+            return resp.json()
+
+        def make_user(role: str, i: int) -> User:
+            user_id = f"00000000-0000-4000-8000-{role[0]}{i:011d}"
+            return User(user_id, mint_token(JWT_SECRET, pg_url, role, user_id, name=f"{role.title()} {i}"))
+
+        teachers = [make_user("teacher", i) for i in range(args.teachers)]
+        students = [make_user("student", i) for i in range(args.students)]
+        await insert("users", [{"id": u.id, "name": f"User {u.id[-4:]}"} for u in teachers + students])
+        await insert("student_teacher_assignments", [
+            {"student_id": s.id, "teacher_id": teachers[i % len(teachers)].id}
+            for i, s in enumerate(students)
+        ])
+        statements = await insert("value_statements", [
+            {"text": f"Statement {i}: it is better to be kind than to be right."}
+            for i in range(args.statements)
+        ])
+
+        now = datetime.now(timezone.utc).isoformat()
+        sub_rows = [
+            {"user_id": rng.choice(students).id, "file_name": f"essay-{i}.txt",
+             "extracted_text": ESSAY, "created_at": now,
+             "word_count": len(ESSAY.split()), "char_count": len(ESSAY)}
+            for i in range(args.seed_submissions)
+        ]
+        submissions = await insert("submissions", sub_rows)
+        await insert("feedback", [
+            {"submission_id": s["id"], "feedback_text": "Nice structure; add evidence.",
+             "tone": "Affirming", "grade": 88}
+            for s in submissions
+        ])
+
+    by_student = {s.id: s for s in students}
+    for s in submissions:
+        by_student[s["user_id"]].submissions.append(s["id"])
+    return World(teachers, students, [s["id"] for s in submissions], [s["id"] for s in statements])
+
+
+def _auth(user: User) -> Dict[str, str]:
+    return {"Authorization": f"Bearer {user.token}"}
+
+
+async def op_listings(client, world, rng) -> Tuple[str, httpx.Response]:
+    student, teacher = rng.choice(world.students), rng.choice(world.teachers)
+    choice = rng.randrange(5)
+    if choice == 0:
+        return "GET /upload/my-submissions", await client.get("/upload/my-submissions", headers=_auth(student))
+    if choice == 1:
+        return "GET /feedback/my-feedback", await client.get("/feedback/my-feedback", headers=_auth(student))
+    if choice == 2:
+        sub_id = rng.choice(world.submissions)
+        return "GET /feedback/submission/{id}", await client.get(f"/feedback/submission/{sub_id}", headers=_auth(teacher))
+    if choice == 3:
+        return "GET /assignments/my-students", await client.get("/assignments/my-students", headers=_auth(teacher))
+    return "GET /teacher/submissions", await client.get("/teacher/submissions", headers=_auth(teacher))
+
+
+async def op_upload(client, world, rng) -> Tuple[str, httpx.Response]:
+    student = rng.choice(world.students)
+    text = ESSAY + f"Revision note {rng.random()}"
+    resp = await client.post(
+        "/upload/", headers=_auth(student),
+        files={"file": ("essay.txt", text.encode("utf-8"), "text/plain")},
+    )
+    return "POST /upload/", resp
+
+
+async def op_generate(client, world, rng) -> Tuple[str, httpx.Response]:
+    resp = await client.post("/feedback/generate", headers=_auth(rng.choice(world.teachers)), json={
+        "submission_id": rng.choice(world.submissions),
+        "tone": "Affirming",
+        "grade": 90,
+        "teacher_notes": "Focus on evidence.",
+        "conciseness": "short",
+    })
+    return "POST /feedback/generate", resp
+
+
+async def op_follow_up(client, world, rng) -> Tuple[str, httpx.Response]:
+    student = rng.choice([s for s in world.students if s.submissions] or world.students)
+    resp = await client.post("/feedback/follow-up", headers=_auth(student), json={
+        "submission_id": rng.choice(student.submissions or world.submissions),
+        "question": "How do I improve my thesis statement?",
+    })
+    return "POST /feedback/follow-up", resp
+
+
+async def op_values(client, world, rng) -> Tuple[str, httpx.Response]:
+    student = rng.choice(world.students)
+    if rng.random() < 0.5:
+        return "GET /values/next-statement", await client.get("/values/next-statement", headers=_auth(student))
+    resp = await client.post("/values/respond", headers=_auth(student), json={
+        "statement_id": rng.choice(world.statements),
+        "stance": rng.choice(["for", "against"]),
+        "response": "Kindness builds trust, which matters more than winning.",
+    })
+    return "POST /values/respond", resp
+
+
+OPERATIONS = {
+    "listings": op_listings,
+    "upload": op_upload,
+    "generate": op_generate,
+    "follow_up": op_follow_up,
+    "values": op_values,
+}
+
+
+async def drive(api_url: str, world: World, args, mix: Dict[str, float]) -> Tuple[Stats, float]:
+    stats = Stats()
+    names, weights = list(mix), list(mix.values())
+    start = time.perf_counter()
+    measure_from = start + args.warmup
+    stop_at = measure_from + args.duration
+
+    async def worker(seed: int):
+        rng = random.Random(seed)
+        while True:
+            now = time.perf_counter()
+            if now >= stop_at:
+                return
+            op = OPERATIONS[rng.choices(names, weights)[0]]
+            t0 = time.perf_counter()
+            try:
+                label, resp = await op(client, world, rng)
+                status = resp.status_code
+            except httpx.HTTPError:
+                label, status = op.__name__, None
+            if t0 >= measure_from:
+                stats.record(label, time.perf_counter() - t0, status)
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=api_url, timeout=120, limits=limits) as client:
+        await asyncio.gather(*(worker(args.seed + i) for i in range(args.concurrency)))
+    return stats, args.duration
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(stats: Stats, duration: float) -> Dict:
+    endpoints = {}
+    all_latencies = []
+    for label, values in sorted(stats.latencies.items()):
+        values = sorted(values)
+        all_latencies.extend(values)
+        endpoints[label] = {
+            "count": len(values),
+            "errors": stats.errors.get(label, 0),
+            "client_errors": stats.client_errors.get(label, 0),
+            "rps": len(values) / duration,
+            "mean_ms": sum(values) / len(values) * 1000,
+            "p50_ms": _percentile(values, 50) * 1000,
+            "p95_ms": _percentile(values, 95) * 1000,
+            "p99_ms": _percentile(values, 99) * 1000,
+        }
+    all_latencies.sort()
+    total = {
+        "count": len(all_latencies),
+        "errors": sum(stats.errors.values()),
+        "rps": len(all_latencies) / duration,
+        "p50_ms": _percentile(all_latencies, 50) * 1000,
+        "p95_ms": _percentile(all_latencies, 95) * 1000,
+        "p99_ms": _percentile(all_latencies, 99) * 1000,
+    }
+    return {"endpoints": endpoints, "total": total}
+
+
+def print_report(summary: Dict) -> None:
+    header = f"{'endpoint':36} {'count':>7} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}"
+    print(header)
+    print("-" * len(header))
+    rows = list(summary["endpoints"].items()) + [("TOTAL", summary["total"])]
+    for label, s in rows:
+        print(f"{label:36} {s['count']:>7} {s['errors']:>5} {s['rps']:>8.1f} "
+              f"{s['p50_ms']:>7.1f}ms {s['p95_ms']:>7.1f}ms {s['p99_ms']:>7.1f}ms")
+
+
+def compare(summary: Dict, baseline: Dict, tolerance: float) -> bool:
+    """Print p95/throughput deltas against a baseline; True if nothing regressed."""
+    ok = True
+    print(f"\nComparison against baseline (tolerance {tolerance:.0%}):")
+    for label, s in summary["endpoints"].items():
+        base = baseline["endpoints"].get(label)
+        if not base or not base["p95_ms"]:
+            continue
+        delta = (s["p95_ms"] - base["p95_ms"]) / base["p95_ms"]
+        regressed = delta > tolerance
+        ok &= not regressed
+        print(f"  {label:36} p95 {base['p95_ms']:8.1f} -> {s['p95_ms']:8.1f} ms "
+              f"({delta:+.0%}){'  REGRESSION' if regressed else ''}")
+    return ok
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"Unknown operation '{name}' (choose from {', '.join(OPERATIONS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description=USAGE, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="unmeasured seconds before the run")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the API")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX))
+    parser.add_argument("--openai-latency-ms", type=float, default=800)
+    parser.add_argument("--openai-jitter-ms", type=float, default=200)
+    parser.add_argument("--teachers", type=int, default=5)
+    parser.add_argument("--students", type=int, default=100)
+    parser.add_argument("--statements", type=int, default=10)
+    parser.add_argument("--seed-submissions", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--compare", help="baseline JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed p95 regression")
+    args = parser.parse_args()
+
+    with servers(args) as (pg_url, api_url):
+        world = asyncio.run(seed(pg_url, args, random.Random(args.seed)))
+        stats, duration = asyncio.run(drive(api_url, world, args, args.mix))
+
+    summary = summarize(stats, duration)
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        **summary,
+    }
+    print_report(summary)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if not compare(summary, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
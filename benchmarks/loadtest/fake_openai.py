@@ -0,0 +1,55 @@
+"""
+Fake OpenAI chat completions server with configurable latency.
+
+Latency is FAKE_OPENAI_LATENCY_MS (mean) plus up to
+FAKE_OPENAI_JITTER_MS of uniform jitter, so runs are comparable
+without spending tokens.
+
+Run with: python -m uvicorn benchmarks.loadtest.fake_openai:app
+"""
+import asyncio
+import os
+import random
+import time
+import uuid
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+LATENCY_MS = float(os.environ.get("FAKE_OPENAI_LATENCY_MS", "800"))
+JITTER_MS = float(os.environ.get("FAKE_OPENAI_JITTER_MS", "200"))
+REPLY = (
+    "Great work on this draft! Your argument is clear and well organized. "
+    "To strengthen it, add a specific example in your second paragraph and "
+    "tighten the conclusion so it restates your thesis."
+)
+
+
+async def chat_completions(request: Request) -> JSONResponse:
+    body = await request.json()
+    await asyncio.sleep((LATENCY_MS + random.uniform(0, JITTER_MS)) / 1000)
+    prompt_chars = sum(len(m.get("content") or "") for m in body.get("messages", []))
+    prompt_tokens = prompt_chars // 4
+    completion_tokens = len(REPLY) // 4
+    return JSONResponse({
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "gpt-4o-mini"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": REPLY},
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": 0},
+        },
+    })
+
+
+app = Starlette(routes=[Route("/v1/chat/completions", chat_completions, methods=["POST"])])
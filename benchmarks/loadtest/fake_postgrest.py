@@ -0,0 +1,216 @@
+"""
+In-memory stand-in for the subset of the PostgREST API the app uses:
+select with column lists and one level of embedding, eq/neq/in/gt/gte/
+lt/lte filters, order, limit/offset, exact counts, insert, upsert, delete and
+(empty) RPCs. Good enough to exercise the request path under load; not a
+database.
+
+Run with: python -m uvicorn benchmarks.loadtest.fake_postgrest:app
+"""
+import json
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+Row = Dict[str, Any]
+
+tables: Dict[str, List[Row]] = defaultdict(list)
+# Primary-key index per table, used to resolve embeds without scanning
+by_id: Dict[str, Dict[str, Row]] = defaultdict(dict)
+
+
+def _split_top_level(value: str) -> List[str]:
+    """Split on commas that are not inside parentheses."""
+    parts, depth, current = [], 0, []
+    for ch in value:
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        if ch == "," and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+        else:
+            current.append(ch)
+    if current:
+        parts.append("".join(current).strip())
+    return [p for p in parts if p]
+
+
+def _parse_select(select: str) -> Tuple[List[str], Dict[str, Tuple[List[str], bool]]]:
+    columns, embeds = [], {}
+    for item in _split_top_level(select):
+        if "(" in item:
+            name, inner = item.split("(", 1)
+            inner_join = name.endswith("!inner")
+            name = name.split("!")[0]
+            embeds[name] = (_split_top_level(inner[:-1]), inner_join)
+        else:
+            columns.append(item.split(":")[-1])
+    return columns, embeds
+
+
+def _parse_value(raw: str) -> Any:
+    if raw.startswith('"') and raw.endswith('"'):
+        return raw[1:-1]
+    return raw
+
+
+def _compare(op: str, actual: Any, raw: str) -> bool:
+    if op == "in":
+        options = {_parse_value(v) for v in _split_top_level(raw.strip("()"))}
+        return str(actual) in options
+    if op == "is":
+        return actual is None if raw == "null" else str(actual).lower() == raw
+    if actual is None:
+        return False
+    expected = _parse_value(raw)
+    if op == "eq":
+        return str(actual) == expected
+    if op == "neq":
+        return str(actual) != expected
+    try:
+        left, right = float(actual), float(expected)
+    except (TypeError, ValueError):
+        left, right = str(actual), expected
+    return {
+        "gt": left > right,
+        "gte": left >= right,
+        "lt": left < right,
+        "lte": left <= right,
+    }.get(op, True)
+
+
+def _embed_key(table: str) -> str:
+    # users -> user_id, submissions -> submission_id
+    return f"{table[:-1] if table.endswith('s') else table}_id"
+
+
+def _embed(row: Row, table: str, columns: List[str]) -> Optional[Row]:
+    fk = row.get(_embed_key(table))
+    if fk is None:
+        return None
+    other = by_id[table].get(fk)
+    return _project(other, columns) if other is not None else None
+
+
+def _project(row: Row, columns: List[str]) -> Row:
+    if not columns or "*" in columns:
+        return dict(row)
+    return {c: row.get(c) for c in columns}
+
+
+def _matching_rows(table: str, request: Request) -> List[Row]:
+    filters = [
+        (key, value) for key, value in request.query_params.multi_items()
+        if key not in ("select", "order", "limit", "offset", "or", "on_conflict", "columns")
+    ]
+    rows = []
+    for row in tables[table]:
+        ok = True
+        for key, value in filters:
+            op, _, raw = value.partition(".")
+            if "." in key:
+                embed_table, column = key.split(".", 1)
+                embedded = _embed(row, embed_table, ["*"])
+                actual = embedded.get(column) if embedded else None
+            else:
+                actual = row.get(key)
+            if not _compare(op, actual, raw):
+                ok = False
+                break
+        if ok:
+            rows.append(row)
+    return rows
+
+
+async def handle_table(request: Request) -> Response:
+    table = request.path_params["table"]
+
+    if request.method == "POST":
+        body = json.loads(await request.body() or b"[]")
+        new_rows = body if isinstance(body, list) else [body]
+        now = datetime.now(timezone.utc).isoformat()
+        conflict = request.query_params.get("on_conflict")
+        inserted = []
+        for row in new_rows:
+            if conflict:
+                existing = next((r for r in tables[table] if r.get(conflict) == row.get(conflict)), None)
+                if existing is not None:
+                    existing.update(row)
+                    inserted.append(existing)
+                    continue
+            row = {"id": str(uuid.uuid4()), "created_at": now, **row}
+            tables[table].append(row)
+            by_id[table][row["id"]] = row
+            inserted.append(row)
+        return JSONResponse(inserted, status_code=201)
+
+    rows = _matching_rows(table, request)
+
+    if request.method == "DELETE":
+        ids = {id(r) for r in rows}
+        tables[table] = [r for r in tables[table] if id(r) not in ids]
+        for row in rows:
+            by_id[table].pop(row.get("id"), None)
+        return JSONResponse(rows)
+
+    if request.method == "PATCH":
+        changes = json.loads(await request.body() or b"{}")
+        for row in rows:
+            row.update(changes)
+        return JSONResponse(rows)
+
+    columns, embeds = _parse_select(request.query_params.get("select", "*"))
+    order = request.query_params.get("order")
+    if order:
+        for clause in reversed(order.split(",")):
+            column, _, direction = clause.partition(".")
+            rows = sorted(rows, key=lambda r: str(r.get(column) or ""), reverse=direction.startswith("desc"))
+
+    total = len(rows)
+    offset = int(request.query_params.get("offset", 0))
+    limit = request.query_params.get("limit")
+    rows = rows[offset:offset + int(limit)] if limit else rows[offset:]
+
+    result = []
+    for row in rows:
+        out = _project(row, columns)
+        skip = False
+        for embed_table, (embed_columns, inner) in embeds.items():
+            out[embed_table] = _embed(row, embed_table, embed_columns)
+            if inner and out[embed_table] is None:
+                skip = True
+        if not skip:
+            result.append(out)
+
+    headers = {}
+    if "count=exact" in request.headers.get("prefer", ""):
+        end = offset + len(result) - 1
+        headers["Content-Range"] = f"{offset}-{end}/{total}" if result else f"*/{total}"
+    if request.method == "HEAD":
+        return Response(headers=headers)
+    return JSONResponse(result, headers=headers)
+
+
+async def handle_rpc(request: Request) -> Response:
+    return JSONResponse([])
+
+
+async def reset(request: Request) -> Response:
+    tables.clear()
+    by_id.clear()
+    return JSONResponse({"ok": True})
+
+
+app = Starlette(routes=[
+    Route("/__reset", reset, methods=["POST"]),
+    Route("/rest/v1/rpc/{function}", handle_rpc, methods=["POST", "GET"]),
+    Route("/rest/v1/{table}", handle_table, methods=["GET", "HEAD", "POST", "PATCH", "DELETE"]),
+])
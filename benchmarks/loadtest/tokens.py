@@ -0,0 +1,40 @@
+"""Mint HS256 access tokens shaped like Supabase's, for test users."""
+import time
+import uuid
+from typing import Dict, Optional
+
+import jwt
+
+
+def mint_token(
+    secret: str,
+    supabase_url: str,
+    role: str,
+    user_id: Optional[str] = None,
+    email: Optional[str] = None,
+    name: str = "",
+    ttl: int = 3600,
+) -> str:
+    """
+    Return a token accepted by JWTHandler.verify_token: same issuer and
+    audience as Supabase Auth, with role and name in user_metadata.
+    """
+    user_id = user_id or str(uuid.uuid4())
+    email = email or f"{role}-{user_id[:8]}@example.com"
+    now = int(time.time())
+    payload: Dict = {
+        "sub": user_id,
+        "aud": "authenticated",
+        "iss": f"{supabase_url}/auth/v1",
+        "iat": now,
+        "exp": now + ttl,
+        "role": "authenticated",
+        "email": email,
+        "user_metadata": {"sub": user_id, "email": email, "role": role, "name": name},
+    }
+    return jwt.encode(payload, secret, algorithm="HS256")
+
+
+def mint_service_key(secret: str) -> str:
+    """A syntactically valid service key for the Supabase client."""
+    return jwt.encode({"role": "service_role", "iss": "supabase"}, secret, algorithm="HS256")
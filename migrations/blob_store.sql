@@ -0,0 +1,52 @@
+-- Content-addressed storage for uploaded originals.
+-- Each distinct file is one row in `blobs`, keyed by its SHA-256; submissions
+-- point at it and a trigger keeps ref_count in step with them. Blobs whose
+-- count drops to zero are claimed by claim_unreferenced_blobs() and deleted
+-- from storage by `python -m app.utils.blob_store --gc`.
+
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256 TEXT PRIMARY KEY,
+    size BIGINT NOT NULL,
+    content_type TEXT,
+    ref_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    last_seen_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_blobs_unreferenced ON blobs(last_seen_at) WHERE ref_count = 0;
+
+ALTER TABLE submissions ADD COLUMN IF NOT EXISTS blob_sha256 TEXT REFERENCES blobs(sha256);
+ALTER TABLE submissions ADD COLUMN IF NOT EXISTS file_size BIGINT;
+ALTER TABLE submissions ADD COLUMN IF NOT EXISTS content_type TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_submissions_blob_sha256 ON submissions(blob_sha256);
+
+CREATE OR REPLACE FUNCTION submissions_blob_ref_count() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.blob_sha256 IS NOT NULL THEN
+        UPDATE blobs SET ref_count = ref_count - 1, last_seen_at = now()
+        WHERE sha256 = OLD.blob_sha256;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.blob_sha256 IS NOT NULL THEN
+        UPDATE blobs SET ref_count = ref_count + 1
+        WHERE sha256 = NEW.blob_sha256;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS submissions_blob_ref_count_trigger ON submissions;
+CREATE TRIGGER submissions_blob_ref_count_trigger
+    AFTER INSERT OR DELETE OR UPDATE OF blob_sha256 ON submissions
+    FOR EACH ROW EXECUTE FUNCTION submissions_blob_ref_count();
+
+-- Remove and return blobs unreferenced for longer than the grace period
+CREATE OR REPLACE FUNCTION claim_unreferenced_blobs(grace_seconds DOUBLE PRECISION)
+RETURNS TABLE (sha256 TEXT)
+LANGUAGE sql
+AS $$
+    DELETE FROM blobs b
+    WHERE b.ref_count = 0
+      AND b.last_seen_at < now() - make_interval(secs => grace_seconds)
+    RETURNING b.sha256;
+$$;
@@ -0,0 +1,65 @@
+-- One row per LLM call (after retries), written in batches by
+-- app/utils/usage_ledger.py. teacher_id is the teacher whose AI capacity
+-- the call used (the student's first teacher, the teacher themselves, or
+-- the user's own id when they have no teacher);
+-- feature is the generating function and endpoint the route that called it.
+
+CREATE TABLE IF NOT EXISTS llm_usage (
+    id BIGSERIAL PRIMARY KEY,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    user_id UUID,
+    teacher_id UUID,
+    endpoint TEXT NOT NULL DEFAULT '',
+    feature TEXT NOT NULL,
+    model TEXT NOT NULL,
+    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+    completion_tokens INTEGER NOT NULL DEFAULT 0,
+    latency_ms INTEGER NOT NULL,
+    attempts SMALLINT NOT NULL DEFAULT 1,
+    status TEXT NOT NULL CHECK (status IN ('ok', 'error')),
+    request_id TEXT NOT NULL DEFAULT ''
+);
+
+-- Append-only and read by time range: BRIN stays tiny however large the table grows
+CREATE INDEX IF NOT EXISTS idx_llm_usage_created_at ON llm_usage USING BRIN (created_at);
+CREATE INDEX IF NOT EXISTS idx_llm_usage_teacher_created_at ON llm_usage (teacher_id, created_at);
+
+-- Usage totals since p_since grouped by 'teacher', 'feature', 'endpoint',
+-- 'model', 'user' or 'day', optionally for one teacher.
+CREATE OR REPLACE FUNCTION llm_usage_report(
+    p_group_by TEXT,
+    p_since TIMESTAMPTZ,
+    p_teacher_id UUID DEFAULT NULL
+)
+RETURNS TABLE (
+    key TEXT,
+    calls BIGINT,
+    errors BIGINT,
+    prompt_tokens BIGINT,
+    completion_tokens BIGINT,
+    avg_latency_ms DOUBLE PRECISION,
+    p95_latency_ms DOUBLE PRECISION
+)
+LANGUAGE sql STABLE
+AS $$
+    SELECT
+        CASE p_group_by
+            WHEN 'teacher' THEN coalesce(u.teacher_id::text, '')
+            WHEN 'feature' THEN u.feature
+            WHEN 'endpoint' THEN u.endpoint
+            WHEN 'model' THEN u.model
+            WHEN 'user' THEN coalesce(u.user_id::text, '')
+            WHEN 'day' THEN (u.created_at AT TIME ZONE 'UTC')::date::text
+        END AS key,
+        count(*) AS calls,
+        count(*) FILTER (WHERE u.status = 'error') AS errors,
+        sum(u.prompt_tokens)::bigint AS prompt_tokens,
+        sum(u.completion_tokens)::bigint AS completion_tokens,
+        avg(u.latency_ms)::double precision AS avg_latency_ms,
+        percentile_cont(0.95) WITHIN GROUP (ORDER BY u.latency_ms) AS p95_latency_ms
+    FROM llm_usage u
+    WHERE u.created_at >= p_since
+      AND (p_teacher_id IS NULL OR u.teacher_id = p_teacher_id)
+    GROUP BY 1
+    ORDER BY 1;
+$$;
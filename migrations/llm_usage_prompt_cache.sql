@@ -0,0 +1,51 @@
+-- Records which prompt template version each LLM call used and how many of
+-- its prompt tokens the provider served from its prompt cache (see
+-- app/utils/prompts.py). Apply after llm_usage.sql.
+
+ALTER TABLE llm_usage ADD COLUMN IF NOT EXISTS cached_tokens INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE llm_usage ADD COLUMN IF NOT EXISTS prompt TEXT NOT NULL DEFAULT '';
+
+-- Replaces the report from llm_usage.sql: adds cached_tokens and the
+-- 'prompt' grouping. The result type changes, so it has to be dropped first.
+DROP FUNCTION IF EXISTS llm_usage_report(TEXT, TIMESTAMPTZ, UUID);
+
+CREATE FUNCTION llm_usage_report(
+    p_group_by TEXT,
+    p_since TIMESTAMPTZ,
+    p_teacher_id UUID DEFAULT NULL
+)
+RETURNS TABLE (
+    key TEXT,
+    calls BIGINT,
+    errors BIGINT,
+    prompt_tokens BIGINT,
+    completion_tokens BIGINT,
+    cached_tokens BIGINT,
+    avg_latency_ms DOUBLE PRECISION,
+    p95_latency_ms DOUBLE PRECISION
+)
+LANGUAGE sql STABLE
+AS $$
+    SELECT
+        CASE p_group_by
+            WHEN 'teacher' THEN coalesce(u.teacher_id::text, '')
+            WHEN 'feature' THEN u.feature
+            WHEN 'endpoint' THEN u.endpoint
+            WHEN 'model' THEN u.model
+            WHEN 'prompt' THEN u.prompt
+            WHEN 'user' THEN coalesce(u.user_id::text, '')
+            WHEN 'day' THEN (u.created_at AT TIME ZONE 'UTC')::date::text
+        END AS key,
+        count(*) AS calls,
+        count(*) FILTER (WHERE u.status = 'error') AS errors,
+        sum(u.prompt_tokens)::bigint AS prompt_tokens,
+        sum(u.completion_tokens)::bigint AS completion_tokens,
+        sum(u.cached_tokens)::bigint AS cached_tokens,
+        avg(u.latency_ms)::double precision AS avg_latency_ms,
+        percentile_cont(0.95) WITHIN GROUP (ORDER BY u.latency_ms) AS p95_latency_ms
+    FROM llm_usage u
+    WHERE u.created_at >= p_since
+      AND (p_teacher_id IS NULL OR u.teacher_id = p_teacher_id)
+    GROUP BY 1
+    ORDER BY 1;
+$$;
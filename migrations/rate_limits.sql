@@ -0,0 +1,62 @@
+-- Shared token buckets for AI endpoint rate limits (RATE_LIMIT_BACKEND=postgres).
+-- consume_rate_limit() refills and charges several buckets atomically: either
+-- every bucket has enough tokens and all are charged, or none are and the
+-- function returns how many seconds to wait.
+
+CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+    key TEXT PRIMARY KEY,
+    tokens DOUBLE PRECISION NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE OR REPLACE FUNCTION consume_rate_limit(
+    p_keys TEXT[],
+    p_capacities DOUBLE PRECISION[],
+    p_rates DOUBLE PRECISION[],
+    p_costs DOUBLE PRECISION[]
+)
+RETURNS DOUBLE PRECISION
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    now_ts TIMESTAMPTZ := clock_timestamp();
+    levels DOUBLE PRECISION[] := '{}';
+    lvl DOUBLE PRECISION;
+    cost DOUBLE PRECISION;
+    retry_after DOUBLE PRECISION := 0;
+BEGIN
+    INSERT INTO rate_limit_buckets (key, tokens, updated_at)
+    SELECT k, c, now_ts FROM unnest(p_keys, p_capacities) AS t(k, c)
+    ON CONFLICT (key) DO NOTHING;
+
+    -- Lock in key order so concurrent calls sharing buckets cannot deadlock
+    PERFORM 1 FROM rate_limit_buckets WHERE key = ANY(p_keys) ORDER BY key FOR UPDATE;
+
+    FOR i IN 1 .. array_length(p_keys, 1) LOOP
+        SELECT LEAST(p_capacities[i], b.tokens + EXTRACT(EPOCH FROM now_ts - b.updated_at) * p_rates[i])
+          INTO lvl
+          FROM rate_limit_buckets b
+         WHERE b.key = p_keys[i];
+        levels := levels || lvl;
+        cost := LEAST(p_costs[i], p_capacities[i]);
+        IF lvl < cost THEN
+            retry_after := GREATEST(retry_after, (cost - lvl) / p_rates[i]);
+        END IF;
+    END LOOP;
+
+    IF retry_after > 0 THEN
+        RETURN retry_after;
+    END IF;
+
+    FOR i IN 1 .. array_length(p_keys, 1) LOOP
+        UPDATE rate_limit_buckets
+           SET tokens = levels[i] - LEAST(p_costs[i], p_capacities[i]),
+               updated_at = now_ts
+         WHERE key = p_keys[i];
+    END LOOP;
+    RETURN 0;
+END;
+$$;
+
+-- Idle buckets are full by definition; prune them periodically, e.g.
+-- DELETE FROM rate_limit_buckets WHERE updated_at < now() - interval '1 day';
@@ -0,0 +1,58 @@
+-- Feedback headlines came from ts_headline unescaped, and feedback text
+-- is model output that can echo student HTML. Like submission headlines
+-- they are now returned NULL and built (escaped) by the search route.
+-- Apply after submission_texts.sql.
+
+CREATE OR REPLACE FUNCTION search_documents(
+    search_query TEXT,
+    filter_student_id UUID DEFAULT NULL,
+    filter_date_from TIMESTAMPTZ DEFAULT NULL,
+    filter_date_to TIMESTAMPTZ DEFAULT NULL,
+    result_limit INT DEFAULT 20,
+    result_offset INT DEFAULT 0
+)
+RETURNS TABLE (
+    kind TEXT,
+    id UUID,
+    submission_id UUID,
+    student_id UUID,
+    file_name TEXT,
+    created_at TIMESTAMPTZ,
+    rank REAL,
+    headline TEXT
+)
+LANGUAGE sql STABLE AS $$
+    WITH q AS (
+        SELECT websearch_to_tsquery('english', search_query) AS query
+    ),
+    hits AS (
+        SELECT 'submission'::TEXT AS kind, s.id, s.id AS submission_id,
+               s.user_id AS student_id, s.file_name, s.created_at,
+               ts_rank_cd(s.search_vector, q.query) AS rank
+        FROM submissions s, q
+        WHERE s.search_vector @@ q.query
+          AND (filter_student_id IS NULL OR s.user_id = filter_student_id)
+          AND (filter_date_from IS NULL OR s.created_at >= filter_date_from)
+          AND (filter_date_to IS NULL OR s.created_at < filter_date_to)
+        UNION ALL
+        SELECT 'feedback'::TEXT, f.id, f.submission_id,
+               s.user_id, s.file_name, f.created_at,
+               ts_rank_cd(f.search_vector, q.query)
+        FROM feedback f
+        JOIN submissions s ON s.id = f.submission_id, q
+        WHERE f.search_vector @@ q.query
+          AND (filter_student_id IS NULL OR s.user_id = filter_student_id)
+          AND (filter_date_from IS NULL OR f.created_at >= filter_date_from)
+          AND (filter_date_to IS NULL OR f.created_at < filter_date_to)
+    ),
+    page AS (
+        SELECT * FROM hits
+        ORDER BY rank DESC, created_at DESC
+        LIMIT result_limit OFFSET result_offset
+    )
+    SELECT page.kind, page.id, page.submission_id, page.student_id,
+           page.file_name, page.created_at, page.rank,
+           NULL::TEXT
+    FROM page
+    ORDER BY page.rank DESC, page.created_at DESC;
+$$;
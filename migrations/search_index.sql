@@ -0,0 +1,112 @@
+-- Full-text search over submissions and feedback.
+-- Each table gets a tsvector column kept current by a trigger and a GIN
+-- index, plus a search_documents() function the API calls over RPC.
+
+ALTER TABLE submissions ADD COLUMN IF NOT EXISTS search_vector TSVECTOR;
+ALTER TABLE feedback ADD COLUMN IF NOT EXISTS search_vector TSVECTOR;
+
+-- Keep the vectors up to date on insert/update
+CREATE OR REPLACE FUNCTION submissions_search_vector_update() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.file_name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.extracted_text, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION feedback_search_vector_update() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.search_vector := to_tsvector('english', coalesce(NEW.feedback_text, ''));
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS submissions_search_vector_trigger ON submissions;
+CREATE TRIGGER submissions_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF file_name, extracted_text ON submissions
+    FOR EACH ROW EXECUTE FUNCTION submissions_search_vector_update();
+
+DROP TRIGGER IF EXISTS feedback_search_vector_trigger ON feedback;
+CREATE TRIGGER feedback_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF feedback_text ON feedback
+    FOR EACH ROW EXECUTE FUNCTION feedback_search_vector_update();
+
+-- Backfill existing rows
+UPDATE submissions SET search_vector =
+    setweight(to_tsvector('english', coalesce(file_name, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(extracted_text, '')), 'B')
+WHERE search_vector IS NULL;
+
+UPDATE feedback SET search_vector = to_tsvector('english', coalesce(feedback_text, ''))
+WHERE search_vector IS NULL;
+
+-- Indexes for matching and for the student/date filters
+CREATE INDEX IF NOT EXISTS idx_submissions_search_vector ON submissions USING GIN(search_vector);
+CREATE INDEX IF NOT EXISTS idx_feedback_search_vector ON feedback USING GIN(search_vector);
+CREATE INDEX IF NOT EXISTS idx_submissions_user_id_created_at ON submissions(user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_feedback_submission_id ON feedback(submission_id);
+
+-- Ranked search across both tables. Headlines are only built for the
+-- page of results being returned, since ts_headline re-parses the text.
+CREATE OR REPLACE FUNCTION search_documents(
+    search_query TEXT,
+    filter_student_id UUID DEFAULT NULL,
+    filter_date_from TIMESTAMPTZ DEFAULT NULL,
+    filter_date_to TIMESTAMPTZ DEFAULT NULL,
+    result_limit INT DEFAULT 20,
+    result_offset INT DEFAULT 0
+)
+RETURNS TABLE (
+    kind TEXT,
+    id UUID,
+    submission_id UUID,
+    student_id UUID,
+    file_name TEXT,
+    created_at TIMESTAMPTZ,
+    rank REAL,
+    headline TEXT
+)
+LANGUAGE sql STABLE AS $$
+    WITH q AS (
+        SELECT websearch_to_tsquery('english', search_query) AS query
+    ),
+    hits AS (
+        SELECT 'submission'::TEXT AS kind, s.id, s.id AS submission_id,
+               s.user_id AS student_id, s.file_name, s.created_at,
+               ts_rank_cd(s.search_vector, q.query) AS rank
+        FROM submissions s, q
+        WHERE s.search_vector @@ q.query
+          AND (filter_student_id IS NULL OR s.user_id = filter_student_id)
+          AND (filter_date_from IS NULL OR s.created_at >= filter_date_from)
+          AND (filter_date_to IS NULL OR s.created_at < filter_date_to)
+        UNION ALL
+        SELECT 'feedback'::TEXT, f.id, f.submission_id,
+               s.user_id, s.file_name, f.created_at,
+               ts_rank_cd(f.search_vector, q.query)
+        FROM feedback f
+        JOIN submissions s ON s.id = f.submission_id, q
+        WHERE f.search_vector @@ q.query
+          AND (filter_student_id IS NULL OR s.user_id = filter_student_id)
+          AND (filter_date_from IS NULL OR f.created_at >= filter_date_from)
+          AND (filter_date_to IS NULL OR f.created_at < filter_date_to)
+    ),
+    page AS (
+        SELECT * FROM hits
+        ORDER BY rank DESC, created_at DESC
+        LIMIT result_limit OFFSET result_offset
+    )
+    SELECT page.kind, page.id, page.submission_id, page.student_id,
+           page.file_name, page.created_at, page.rank,
+           ts_headline(
+               'english',
+               CASE page.kind
+                   WHEN 'submission' THEN (SELECT extracted_text FROM submissions WHERE submissions.id = page.id)
+                   ELSE (SELECT feedback_text FROM feedback WHERE feedback.id = page.id)
+               END,
+               q.query,
+               'StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=30, MinWords=10'
+           )
+    FROM page, q
+    ORDER BY page.rank DESC, page.created_at DESC;
+$$;
@@ -0,0 +1,6 @@
+-- Link a revised draft to the submission it revises, so feedback can be
+-- regenerated from the section-level diff instead of the whole text.
+
+ALTER TABLE submissions ADD COLUMN IF NOT EXISTS revision_of UUID REFERENCES submissions(id) ON DELETE SET NULL;
+
+CREATE INDEX IF NOT EXISTS idx_submissions_revision_of ON submissions(revision_of);
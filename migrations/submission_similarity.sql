@@ -0,0 +1,14 @@
+-- Near-duplicate detection for submissions.
+-- Each submission stores its MinHash signature; the LSH band hashes go in
+-- a bucket table so candidate lookup is an index probe per band.
+
+ALTER TABLE submissions ADD COLUMN IF NOT EXISTS minhash_signature BIGINT[];
+ALTER TABLE submissions ADD COLUMN IF NOT EXISTS near_duplicate_of UUID REFERENCES submissions(id) ON DELETE SET NULL;
+
+CREATE TABLE IF NOT EXISTS submission_lsh_buckets (
+    bucket BIGINT NOT NULL,
+    submission_id UUID NOT NULL REFERENCES submissions(id) ON DELETE CASCADE,
+    PRIMARY KEY (bucket, submission_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_submission_lsh_buckets_submission_id ON submission_lsh_buckets(submission_id);
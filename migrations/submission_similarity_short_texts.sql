@@ -0,0 +1,21 @@
+-- Submissions with no extractable text (e.g. scanned PDFs) used to get
+-- the same constant MinHash signature, so they all matched each other at
+-- Jaccard 1.0 and shared one set of LSH buckets. New uploads with too
+-- little text get no signature; this clears the ones stored before.
+
+WITH empty AS (
+    SELECT id FROM submissions
+    WHERE minhash_signature IS NOT NULL
+      AND minhash_signature = array_fill(4294967295::BIGINT, ARRAY[cardinality(minhash_signature)])
+)
+DELETE FROM submission_lsh_buckets b USING empty WHERE b.submission_id = empty.id;
+
+UPDATE submissions
+SET minhash_signature = NULL, near_duplicate_of = NULL
+WHERE minhash_signature = array_fill(4294967295::BIGINT, ARRAY[cardinality(minhash_signature)]);
+
+-- Flags pointing at one of those submissions were matches on empty text too
+UPDATE submissions s
+SET near_duplicate_of = NULL
+FROM submissions d
+WHERE s.near_duplicate_of = d.id AND d.minhash_signature IS NULL;
@@ -0,0 +1,20 @@
+-- Text statistics computed once at upload time so listings and prompt
+-- budgeting don't need to read or reprocess extracted_text.
+
+ALTER TABLE submissions ADD COLUMN IF NOT EXISTS word_count INTEGER;
+ALTER TABLE submissions ADD COLUMN IF NOT EXISTS char_count INTEGER;
+ALTER TABLE submissions ADD COLUMN IF NOT EXISTS page_count INTEGER;
+ALTER TABLE submissions ADD COLUMN IF NOT EXISTS token_estimate INTEGER;
+ALTER TABLE submissions ADD COLUMN IF NOT EXISTS language TEXT;
+ALTER TABLE submissions ADD COLUMN IF NOT EXISTS text_hash TEXT;
+
+-- Exact-duplicate lookups by normalized text hash
+CREATE INDEX IF NOT EXISTS idx_submissions_text_hash ON submissions(text_hash);
+
+-- Backfill the counts that can be derived in SQL; language, text_hash and
+-- page_count for older rows are filled in when they are next re-uploaded.
+UPDATE submissions SET
+    char_count = char_length(extracted_text),
+    word_count = coalesce(array_length(regexp_split_to_array(trim(extracted_text), '\s+'), 1), 0),
+    token_estimate = ceil(char_length(extracted_text) / 4.0)
+WHERE char_count IS NULL;
@@ -0,0 +1,113 @@
+-- Extracted text moves out of `submissions` into a compressed side table,
+-- so listings and row reads no longer carry whole papers. The API
+-- compresses with zlib or zstd (app/utils/text_codec.py), small documents
+-- against a shared dictionary trained on the corpus.
+--
+-- Uploads still send extracted_text with the submission insert so the
+-- search trigger can index it; the trigger then clears the column. After
+-- applying this migration, run
+--     python -m app.utils.text_codec --migrate   (compress existing rows)
+--     python -m app.utils.text_codec --train     (build the first dictionary)
+
+CREATE TABLE IF NOT EXISTS text_dictionaries (
+    id SERIAL PRIMARY KEY,
+    codec TEXT NOT NULL CHECK (codec IN ('zlib', 'zstd')),
+    data BYTEA NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS submission_texts (
+    submission_id UUID PRIMARY KEY REFERENCES submissions(id) ON DELETE CASCADE,
+    codec TEXT NOT NULL CHECK (codec IN ('zlib', 'zstd')),
+    dictionary_id INTEGER REFERENCES text_dictionaries(id),
+    data BYTEA NOT NULL,
+    raw_size INTEGER NOT NULL,
+    compressed_size INTEGER NOT NULL
+);
+
+-- Already compressed; stop TOAST from trying again
+ALTER TABLE submission_texts ALTER COLUMN data SET STORAGE EXTERNAL;
+
+ALTER TABLE submissions ALTER COLUMN extracted_text DROP NOT NULL;
+
+-- Replaces the trigger function from search_index.sql. Text is indexed
+-- when it arrives and then dropped from the row; an update that doesn't
+-- supply text (renames, clearing the column) keeps the indexed text.
+CREATE OR REPLACE FUNCTION submissions_search_vector_update() RETURNS TRIGGER AS $$
+DECLARE
+    text_vector TSVECTOR := ''::tsvector;
+BEGIN
+    IF NEW.extracted_text IS NOT NULL THEN
+        text_vector := setweight(to_tsvector('english', NEW.extracted_text), 'B');
+    ELSIF TG_OP = 'UPDATE' AND OLD.search_vector IS NOT NULL THEN
+        text_vector := ts_filter(OLD.search_vector, '{b}');
+    END IF;
+    NEW.search_vector := setweight(to_tsvector('english', coalesce(NEW.file_name, '')), 'A') || text_vector;
+    NEW.extracted_text := NULL;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+-- Submission headlines can no longer be built in SQL (the text is
+-- compressed by the API); they are returned NULL and filled in by the
+-- search route for the page of results.
+CREATE OR REPLACE FUNCTION search_documents(
+    search_query TEXT,
+    filter_student_id UUID DEFAULT NULL,
+    filter_date_from TIMESTAMPTZ DEFAULT NULL,
+    filter_date_to TIMESTAMPTZ DEFAULT NULL,
+    result_limit INT DEFAULT 20,
+    result_offset INT DEFAULT 0
+)
+RETURNS TABLE (
+    kind TEXT,
+    id UUID,
+    submission_id UUID,
+    student_id UUID,
+    file_name TEXT,
+    created_at TIMESTAMPTZ,
+    rank REAL,
+    headline TEXT
+)
+LANGUAGE sql STABLE AS $$
+    WITH q AS (
+        SELECT websearch_to_tsquery('english', search_query) AS query
+    ),
+    hits AS (
+        SELECT 'submission'::TEXT AS kind, s.id, s.id AS submission_id,
+               s.user_id AS student_id, s.file_name, s.created_at,
+               ts_rank_cd(s.search_vector, q.query) AS rank
+        FROM submissions s, q
+        WHERE s.search_vector @@ q.query
+          AND (filter_student_id IS NULL OR s.user_id = filter_student_id)
+          AND (filter_date_from IS NULL OR s.created_at >= filter_date_from)
+          AND (filter_date_to IS NULL OR s.created_at < filter_date_to)
+        UNION ALL
+        SELECT 'feedback'::TEXT, f.id, f.submission_id,
+               s.user_id, s.file_name, f.created_at,
+               ts_rank_cd(f.search_vector, q.query)
+        FROM feedback f
+        JOIN submissions s ON s.id = f.submission_id, q
+        WHERE f.search_vector @@ q.query
+          AND (filter_student_id IS NULL OR s.user_id = filter_student_id)
+          AND (filter_date_from IS NULL OR f.created_at >= filter_date_from)
+          AND (filter_date_to IS NULL OR f.created_at < filter_date_to)
+    ),
+    page AS (
+        SELECT * FROM hits
+        ORDER BY rank DESC, created_at DESC
+        LIMIT result_limit OFFSET result_offset
+    )
+    SELECT page.kind, page.id, page.submission_id, page.student_id,
+           page.file_name, page.created_at, page.rank,
+           CASE page.kind
+               WHEN 'feedback' THEN ts_headline(
+                   'english',
+                   (SELECT feedback_text FROM feedback WHERE feedback.id = page.id),
+                   q.query,
+                   'StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=30, MinWords=10'
+               )
+           END
+    FROM page, q
+    ORDER BY page.rank DESC, page.created_at DESC;
+$$;
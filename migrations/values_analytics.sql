@@ -0,0 +1,120 @@
+-- Class-wide values analytics: response counts per teacher, statement, ISO
+-- week and stance, so GET /values/analytics reads a few rows per statement
+-- and week however many responses there are.
+--
+-- A response counts towards every teacher the student is currently
+-- assigned to. Triggers keep the counts in step with both tables:
+--   * values_responses insert/delete/update adds or removes one response
+--   * student_teacher_assignments insert/delete adds or removes all of the
+--     student's responses for that teacher
+-- rebuild_values_stance_counts() recomputes everything from raw rows
+-- (python -m app.utils.values_analytics --rebuild); run it once after
+-- applying this migration.
+
+CREATE TABLE IF NOT EXISTS values_stance_counts (
+    teacher_id UUID NOT NULL,
+    statement_id UUID NOT NULL REFERENCES value_statements(id) ON DELETE CASCADE,
+    week_start DATE NOT NULL,  -- Monday of the ISO week
+    stance TEXT NOT NULL CHECK (stance IN ('for', 'against')),
+    response_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (teacher_id, week_start, statement_id, stance)
+);
+
+CREATE OR REPLACE FUNCTION values_week_start(ts TIMESTAMPTZ)
+RETURNS DATE
+LANGUAGE sql IMMUTABLE
+AS $$ SELECT date_trunc('week', ts AT TIME ZONE 'UTC')::date $$;
+
+-- Add `p_delta` responses by one student to each of their teachers' counts
+CREATE OR REPLACE FUNCTION values_stance_counts_add(
+    p_student_id UUID,
+    p_statement_id UUID,
+    p_created_at TIMESTAMPTZ,
+    p_stance TEXT,
+    p_delta INTEGER
+)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    INSERT INTO values_stance_counts AS c (teacher_id, statement_id, week_start, stance, response_count)
+    SELECT a.teacher_id, p_statement_id, values_week_start(p_created_at), p_stance, p_delta
+      FROM student_teacher_assignments a
+     WHERE a.student_id = p_student_id
+    ON CONFLICT (teacher_id, week_start, statement_id, stance)
+    DO UPDATE SET response_count = c.response_count + EXCLUDED.response_count;
+$$;
+
+CREATE OR REPLACE FUNCTION values_responses_count_trigger()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM values_stance_counts_add(OLD.user_id, OLD.statement_id, OLD.created_at, OLD.stance, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM values_stance_counts_add(NEW.user_id, NEW.statement_id, NEW.created_at, NEW.stance, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS values_responses_count ON values_responses;
+CREATE TRIGGER values_responses_count
+    AFTER INSERT OR DELETE OR UPDATE OF user_id, statement_id, stance, created_at ON values_responses
+    FOR EACH ROW EXECUTE FUNCTION values_responses_count_trigger();
+
+CREATE OR REPLACE FUNCTION values_assignment_count_trigger()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    a RECORD;
+    direction INTEGER;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        a := NEW;
+        direction := 1;
+    ELSE
+        a := OLD;
+        direction := -1;
+    END IF;
+
+    INSERT INTO values_stance_counts AS c (teacher_id, statement_id, week_start, stance, response_count)
+    SELECT a.teacher_id, r.statement_id, values_week_start(r.created_at), r.stance, direction * count(*)
+      FROM values_responses r
+     WHERE r.user_id = a.student_id
+     GROUP BY r.statement_id, values_week_start(r.created_at), r.stance
+    ON CONFLICT (teacher_id, week_start, statement_id, stance)
+    DO UPDATE SET response_count = c.response_count + EXCLUDED.response_count;
+
+    DELETE FROM values_stance_counts WHERE teacher_id = a.teacher_id AND response_count <= 0;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS values_assignment_count ON student_teacher_assignments;
+CREATE TRIGGER values_assignment_count
+    AFTER INSERT OR DELETE ON student_teacher_assignments
+    FOR EACH ROW EXECUTE FUNCTION values_assignment_count_trigger();
+
+-- Recompute all counts from values_responses. The table lock keeps the
+-- triggers from interleaving with the rebuild.
+CREATE OR REPLACE FUNCTION rebuild_values_stance_counts()
+RETURNS BIGINT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    inserted BIGINT;
+BEGIN
+    LOCK TABLE values_stance_counts IN EXCLUSIVE MODE;
+    DELETE FROM values_stance_counts;
+    INSERT INTO values_stance_counts (teacher_id, statement_id, week_start, stance, response_count)
+    SELECT a.teacher_id, r.statement_id, values_week_start(r.created_at), r.stance, count(*)
+      FROM values_responses r
+      JOIN student_teacher_assignments a ON a.student_id = r.user_id
+     GROUP BY a.teacher_id, r.statement_id, values_week_start(r.created_at), r.stance;
+    GET DIAGNOSTICS inserted = ROW_COUNT;
+    RETURN inserted;
+END;
+$$;
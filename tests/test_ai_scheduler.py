@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.utils.ai_scheduler import AIScheduler
+
+LIMITS = {"interactive": 10, "standard": 10, "bulk": 10}
+WAITS = {"interactive": 5.0, "standard": 5.0, "bulk": 5.0}
+
+
+async def _run_in_order(scheduler, jobs):
+    """Queue `jobs` (priority, tenant, name) behind a held slot; return completion order."""
+    order = []
+    gate = asyncio.Event()
+
+    async def hold():
+        async with scheduler.slot("interactive", "holder"):
+            await gate.wait()
+
+    async def job(priority, tenant, name):
+        async with scheduler.slot(priority, tenant):
+            order.append(name)
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    tasks = []
+    for priority, tenant, name in jobs:
+        tasks.append(asyncio.create_task(job(priority, tenant, name)))
+        await asyncio.sleep(0)
+    gate.set()
+    await asyncio.gather(holder, *tasks)
+    return order
+
+
+def test_higher_priority_classes_go_first():
+    scheduler = AIScheduler(1, LIMITS, WAITS)
+    order = asyncio.run(_run_in_order(scheduler, [
+        ("bulk", "t1", "bulk"),
+        ("standard", "t1", "standard"),
+        ("interactive", "t1", "interactive"),
+    ]))
+    assert order == ["interactive", "standard", "bulk"]
+
+
+def test_tenants_share_a_class_fairly():
+    scheduler = AIScheduler(1, LIMITS, WAITS)
+    order = asyncio.run(_run_in_order(scheduler, [
+        ("interactive", "a", "a1"),
+        ("interactive", "a", "a2"),
+        ("interactive", "a", "a3"),
+        ("interactive", "b", "b1"),
+    ]))
+    assert order == ["a1", "b1", "a2", "a3"]
+
+
+def test_full_queue_is_shed():
+    scheduler = AIScheduler(1, {**LIMITS, "bulk": 0}, WAITS)
+
+    async def run():
+        async with scheduler.slot("interactive", "t1"):
+            with pytest.raises(HTTPException) as exc:
+                async with scheduler.slot("bulk", "t1"):
+                    pass
+            assert exc.value.status_code == 503
+
+    asyncio.run(run())
+
+
+def test_waiting_too_long_is_shed_and_frees_the_queue():
+    scheduler = AIScheduler(1, LIMITS, {**WAITS, "bulk": 0.01})
+
+    async def run():
+        async with scheduler.slot("interactive", "t1"):
+            with pytest.raises(HTTPException):
+                async with scheduler.slot("bulk", "t1"):
+                    pass
+            assert scheduler.queued("bulk") == 0
+        assert scheduler.active == 0
+
+    asyncio.run(run())
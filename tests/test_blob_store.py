@@ -0,0 +1,32 @@
+import io
+import os
+
+from app.utils.blob_store import LocalBlobStore, shard_path
+
+
+def test_identical_content_is_stored_once(tmp_path):
+    store = LocalBlobStore(str(tmp_path))
+    first = store.put(io.BytesIO(b"essay draft"))
+    second = store.put(io.BytesIO(b"essay draft"))
+    assert first == second
+    digest, size = first
+    assert size == len(b"essay draft")
+    assert store.local_path(digest) == os.path.join(str(tmp_path), shard_path(digest))
+    assert os.listdir(store.tmp_dir) == []
+
+
+def test_blobs_are_sharded_by_hash_prefix(tmp_path):
+    store = LocalBlobStore(str(tmp_path))
+    digest, _ = store.put(io.BytesIO(b"x"))
+    assert shard_path(digest) == os.path.join(digest[:2], digest[2:4], digest)
+    with store.open(digest) as f:
+        assert f.read() == b"x"
+
+
+def test_delete_skips_recently_touched_blobs(tmp_path):
+    store = LocalBlobStore(str(tmp_path))
+    digest, _ = store.put(io.BytesIO(b"x"))
+    assert store.delete(digest, older_than=0) is False
+    assert store.exists(digest)
+    assert store.delete(digest) is True
+    assert not store.exists(digest)
@@ -0,0 +1,133 @@
+import asyncio
+import threading
+import time
+
+from app.utils.cache import Cache, CacheBackend, SQLiteBackend
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_l1_entries_expire():
+    clock = FakeClock()
+    cache = Cache(clock=clock)
+    cache.set("k", {"a": 1}, ttl=10)
+    assert cache.get("k") == {"a": 1}
+    clock.now += 11
+    assert cache.get("k") is None
+
+
+def test_l2_is_shared_between_workers(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    first = Cache(SQLiteBackend(path, max_bytes=1 << 20))
+    second = Cache(SQLiteBackend(path, max_bytes=1 << 20))
+    first.set("statements", [{"id": 1, "text": "Be kind"}])
+    assert second.get("statements") == [{"id": 1, "text": "Be kind"}]
+
+
+def test_delete_evicts_l1_in_other_workers(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    first = Cache(SQLiteBackend(path, max_bytes=1 << 20), poll_interval=0)
+    second = Cache(SQLiteBackend(path, max_bytes=1 << 20), poll_interval=0)
+    first.set("classes:s1", ["t1"])
+    assert second.get("classes:s1") == ["t1"]  # now in second's L1
+    first.delete("classes:s1")
+    assert second.get("classes:s1") is None
+
+
+def test_set_evicts_l1_in_other_workers(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    first = Cache(SQLiteBackend(path, max_bytes=1 << 20), poll_interval=0)
+    second = Cache(SQLiteBackend(path, max_bytes=1 << 20), poll_interval=0)
+    first.set("values:statements", ["old"])
+    assert second.get("values:statements") == ["old"]
+    first.set("values:statements", ["new"])
+    assert second.get("values:statements") == ["new"]
+
+
+def test_pop_returns_the_value_to_one_worker_only(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    first = Cache(SQLiteBackend(path, max_bytes=1 << 20))
+    second = Cache(SQLiteBackend(path, max_bytes=1 << 20))
+    first.set("sse-ticket:abc", {"id": "s1"})
+    assert asyncio.run(second.apop("sse-ticket:abc")) == {"id": "s1"}
+    assert asyncio.run(first.apop("sse-ticket:abc")) is None  # still in first's L1, but already redeemed
+
+
+def test_l2_evicts_entries_closest_to_expiry_beyond_max_bytes(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "cache.sqlite3"), max_bytes=1000)
+    backend.set("soon", b"x" * 400, ttl=10)
+    backend.set("later", b"x" * 400, ttl=100)
+    backend.set("latest", b"x" * 400, ttl=1000)  # over budget, triggers a sweep
+    assert backend.get("soon") is None
+    assert backend.get("later") is not None
+    assert backend.get("latest") is not None
+
+
+def test_concurrent_misses_load_once(tmp_path):
+    cache = Cache(SQLiteBackend(str(tmp_path / "cache.sqlite3"), max_bytes=1 << 20))
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_set("k", loader) for _ in range(10)))
+
+    assert asyncio.run(run()) == ["value"] * 10
+    assert len(calls) == 1
+
+
+def test_sync_loaders_run_off_the_event_loop():
+    cache = Cache()
+    loop_thread = []
+
+    def loader():
+        return threading.get_ident()
+
+    async def run():
+        loop_thread.append(threading.get_ident())
+        return await cache.get_or_set("k", loader)
+
+    assert asyncio.run(run()) != loop_thread[0]
+
+
+def test_async_methods_keep_l2_io_off_the_event_loop():
+    class SlowBackend(CacheBackend):
+        """set blocks like a write waiting on another worker's lock."""
+
+        def __init__(self):
+            self.values = {}
+
+        def get(self, key):
+            return self.values.get(key)
+
+        def set(self, key, value, ttl):
+            time.sleep(0.2)
+            self.values[key] = (value, ttl)
+            ticks_during_set.append(len(ticks))
+
+        def invalidations_since(self, last_id):
+            return last_id, []
+
+    cache = Cache(SlowBackend())
+    ticks, ticks_during_set = [], []
+
+    async def ticker():
+        for _ in range(10):
+            ticks.append(1)
+            await asyncio.sleep(0.01)
+
+    async def run():
+        await asyncio.gather(cache.aset("user:abc", {"id": "u1"}), ticker())
+        return await cache.aget("user:abc")
+
+    assert asyncio.run(run()) == {"id": "u1"}
+    assert ticks_during_set[0] >= 5  # the loop kept running while set blocked
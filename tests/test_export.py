@@ -0,0 +1,62 @@
+import pytest
+
+from app.routes.teacher import _fetch_all, _fetch_feedback
+
+MAX_ROWS = 3  # PostgREST's max-rows, kept small so every fetch is capped
+
+
+class FakeQuery:
+    def __init__(self, rows, count=None):
+        self.rows = rows
+        self.count = count
+        self.start, self.end = 0, len(rows) - 1
+
+    def select(self, columns, count=None):
+        return FakeQuery(self.rows, count)
+
+    def in_(self, column, values):
+        return FakeQuery([r for r in self.rows if r[column] in values], self.count)
+
+    def order(self, column):
+        return FakeQuery(sorted(self.rows, key=lambda r: r[column]), self.count)
+
+    def range(self, start, end):
+        self.start, self.end = start, end
+        return self
+
+    def execute(self):
+        end = min(self.end, self.start + MAX_ROWS - 1)
+        data = self.rows[self.start:end + 1]
+        count = len(self.rows) if self.count == "exact" else None
+        return type("Response", (), {"data": data, "count": count})()
+
+
+class FakeSupabase:
+    def __init__(self, tables):
+        self.tables = tables
+
+    def table(self, name):
+        return FakeQuery(self.tables[name])
+
+
+def test_feedback_is_paged_past_the_max_rows_cap():
+    feedback = [
+        {"id": f"f{i}", "submission_id": f"s{i % 2}", "feedback_text": "", "tone": "", "grade": None,
+         "created_at": f"2024-01-01T00:00:{i:02d}"}
+        for i in range(10)
+    ]
+    by_submission = _fetch_feedback(FakeSupabase({"feedback": feedback}), ["s0", "s1"])
+    assert [f["id"] for f in by_submission["s0"]] == ["f0", "f2", "f4", "f6", "f8"]
+    assert len(by_submission["s1"]) == 5
+
+
+def test_fetch_all_raises_when_rows_go_missing():
+    class Shrinking(FakeQuery):
+        def execute(self):
+            response = super().execute()
+            if self.start > 0:
+                response.data = []
+            return response
+
+    with pytest.raises(RuntimeError):
+        _fetch_all(lambda count: Shrinking([{"id": i} for i in range(5)], count), 10)
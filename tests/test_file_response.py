@@ -0,0 +1,139 @@
+import io
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.resources import get_blob_store, get_supabase
+from app.models import User
+from app.routes import upload
+from app.routes.auth import get_current_user
+from app.utils.blob_store import LocalBlobStore
+from app.utils.file_response import content_disposition, parse_range
+
+
+def test_parse_range_forms():
+    assert parse_range(None, 1000) is None
+    assert parse_range("bytes=0-99", 1000) == (0, 99)
+    assert parse_range("bytes=900-", 1000) == (900, 999)
+    assert parse_range("bytes=-100", 1000) == (900, 999)
+    assert parse_range("bytes=500-5000", 1000) == (500, 999)
+
+
+def test_multiple_or_malformed_ranges_fall_back_to_full_file():
+    assert parse_range("bytes=0-10,20-30", 1000) is None
+    assert parse_range("items=0-10", 1000) is None
+
+
+def test_unsatisfiable_ranges_raise():
+    with pytest.raises(ValueError):
+        parse_range("bytes=1000-", 1000)
+    with pytest.raises(ValueError):
+        parse_range("bytes=50-10", 1000)
+
+
+def test_content_disposition_keeps_unicode_names():
+    header = content_disposition("essai final é.pdf")
+    assert header.startswith('inline; filename="essai final .pdf"')
+    assert "filename*=UTF-8''essai%20final%20%C3%A9.pdf" in header
+
+
+ORIGINAL = bytes(range(256)) * 40  # 10240 bytes
+CREATED_AT = "2024-03-01T12:00:00+00:00"
+
+
+class FakeTable:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def select(self, *_):
+        return self
+
+    def eq(self, column, value):
+        return FakeTable([r for r in self.rows if r[column] == value])
+
+    def execute(self):
+        return SimpleNamespace(data=self.rows)
+
+
+class FakeSupabase:
+    def __init__(self, submissions):
+        self.submissions = submissions
+
+    def table(self, name):
+        assert name == "submissions"
+        return FakeTable(self.submissions)
+
+
+def user(user_id, role):
+    return User(id=user_id, email=f"{user_id}@example.com", role=role, name=user_id, created_at=CREATED_AT)
+
+
+@pytest.fixture
+def download(tmp_path):
+    store = LocalBlobStore(str(tmp_path))
+    digest, _ = store.put(io.BytesIO(ORIGINAL))
+    submissions = [{
+        "id": "sub-1", "user_id": "student-1", "file_name": "essay.pdf", "created_at": CREATED_AT,
+        "blob_sha256": digest, "content_type": "application/pdf",
+    }]
+    app = FastAPI()
+    app.include_router(upload.router, prefix="/upload")
+    app.dependency_overrides[get_supabase] = lambda: FakeSupabase(submissions)
+    app.dependency_overrides[get_blob_store] = lambda: store
+
+    def client_for(current_user):
+        app.dependency_overrides[get_current_user] = lambda: current_user
+        return TestClient(app)
+
+    return client_for, f'"{digest}"'
+
+
+def test_full_and_partial_downloads(download):
+    client_for, etag = download
+    client = client_for(user("student-1", "student"))
+
+    full = client.get("/upload/original/sub-1")
+    assert full.status_code == 200 and full.content == ORIGINAL
+    assert full.headers["etag"] == etag and full.headers["accept-ranges"] == "bytes"
+
+    part = client.get("/upload/original/sub-1", headers={"Range": "bytes=100-199"})
+    assert part.status_code == 206
+    assert part.headers["content-range"] == f"bytes 100-199/{len(ORIGINAL)}"
+    assert part.content == ORIGINAL[100:200]
+
+
+def test_unsatisfiable_range_is_416(download):
+    client_for, _ = download
+    resp = client_for(user("student-1", "student")).get(
+        "/upload/original/sub-1", headers={"Range": f"bytes={len(ORIGINAL)}-"}
+    )
+    assert resp.status_code == 416
+    assert resp.headers["content-range"] == f"bytes */{len(ORIGINAL)}"
+    assert resp.content == b""
+
+
+def test_conditional_requests_are_304(download):
+    client_for, etag = download
+    client = client_for(user("student-1", "student"))
+    assert client.get("/upload/original/sub-1", headers={"If-None-Match": etag}).status_code == 304
+    resp = client.get("/upload/original/sub-1", headers={"If-Modified-Since": "Sat, 02 Mar 2024 00:00:00 GMT"})
+    assert resp.status_code == 304 and resp.content == b""
+    resp = client.get("/upload/original/sub-1", headers={"If-Modified-Since": "Thu, 29 Feb 2024 00:00:00 GMT"})
+    assert resp.status_code == 200
+
+
+def test_stale_if_range_gets_the_whole_file(download):
+    client_for, etag = download
+    client = client_for(user("student-1", "student"))
+    resp = client.get("/upload/original/sub-1", headers={"Range": "bytes=0-9", "If-Range": '"old"'})
+    assert resp.status_code == 200 and resp.content == ORIGINAL
+    resp = client.get("/upload/original/sub-1", headers={"Range": "bytes=0-9", "If-Range": etag})
+    assert resp.status_code == 206 and resp.content == ORIGINAL[:10]
+
+
+def test_students_cannot_download_other_students_files(download):
+    client_for, _ = download
+    assert client_for(user("student-2", "student")).get("/upload/original/sub-1").status_code == 403
+    assert client_for(user("teacher-1", "teacher")).get("/upload/original/sub-1").status_code == 200
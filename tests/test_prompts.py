@@ -0,0 +1,38 @@
+import os
+
+import pytest
+
+from app.core.config import settings
+from app.utils.prompts import PromptTemplate, get_template
+
+VALUES = dict(tone="encouraging", conciseness="short", teacher_notes="Focus on evidence.", grade="N/A")
+
+
+def test_feedback_prompt_keeps_student_text_after_the_stable_prefix():
+    template = get_template("generate_feedback")
+    first = template.messages(extracted_text="Essay one about rivers.", **VALUES)
+    second = template.messages(extracted_text="Essay two about mountains.", **VALUES)
+    assert first[0] == second[0]
+    user = first[1]["content"]
+    shared = os.path.commonprefix([user, second[1]["content"]])
+    assert "Focus on evidence." in shared and user.endswith("Essay one about rivers.")
+
+
+def test_versions_can_be_pinned(monkeypatch):
+    assert get_template("generate_feedback").version > 1
+    monkeypatch.setitem(settings.PROMPT_VERSIONS, "generate_feedback", 1)
+    template = get_template("generate_feedback")
+    assert template.id == "generate_feedback@v1"
+    assert template.render(extracted_text="Essay", **VALUES).startswith("Student text:\nEssay")
+    with pytest.raises(ValueError):
+        get_template("generate_feedback", 99)
+
+
+def test_templates_check_their_fields():
+    template = PromptTemplate("example", 1, "System.", "Hello {name}, {greeting}")
+    assert template.fields == ("name", "greeting")
+    assert template.render(name="Ada", greeting="welcome") == "Hello Ada, welcome"
+    with pytest.raises(ValueError):
+        template.render(name="Ada")
+    with pytest.raises(ValueError):
+        PromptTemplate("example", 2, "System.", "Score {score:.1f}")
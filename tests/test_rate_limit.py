@@ -0,0 +1,42 @@
+from app.utils.rate_limit import Bucket, InProcessStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_bucket_allows_burst_then_rejects_with_retry_after():
+    clock = FakeClock()
+    store = InProcessStore(clock=clock)
+    bucket = Bucket("user:1", capacity=3, rate=1)
+    assert [store.take([bucket]) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert store.take([bucket]) == 1.0
+    clock.now = 1.0
+    assert store.take([bucket]) == 0.0
+
+
+def test_buckets_are_charged_all_or_nothing():
+    store = InProcessStore(clock=FakeClock())
+    user = Bucket("user:1", capacity=10, rate=1, cost=4)
+    klass = Bucket("class:1", capacity=5, rate=1, cost=4)
+    assert store.take([user, klass]) == 0.0
+    # The class bucket is short, so the user bucket must not be charged either
+    assert store.take([user, klass]) == 3.0
+    assert store.take([user]) == 0.0
+
+
+def test_cost_larger_than_capacity_is_clamped():
+    store = InProcessStore(clock=FakeClock())
+    assert store.take([Bucket("user:1", capacity=100, rate=10, cost=500)]) == 0.0
+
+
+def test_least_recently_used_keys_are_evicted():
+    store = InProcessStore(max_keys=2, clock=FakeClock())
+    for key in ("a", "b", "c"):
+        store.take([Bucket(key, capacity=1, rate=1)])
+    assert store.take([Bucket("a", capacity=1, rate=1)]) == 0.0
+    assert store.take([Bucket("c", capacity=1, rate=1)]) == 1.0
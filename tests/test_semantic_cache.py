@@ -0,0 +1,61 @@
+from app.utils.semantic_cache import SemanticCache, cosine, vectorize
+
+
+def test_rephrasings_are_close_and_different_topics_are_not():
+    base = vectorize("How do I improve my thesis statement?")
+    assert cosine(base, vectorize("how can I make my thesis statements better")) > 0.85
+    assert cosine(base, vectorize("How do I improve my conclusion?")) < 0.5
+    assert cosine(vectorize("Should I use first person?"), vectorize("Shouldn't I use first person?")) < 0.85
+
+
+def test_lookup_is_scoped_to_the_feedback_id():
+    cache = SemanticCache(threshold=0.85)
+    cache.store("fb-1", "How do I improve my thesis statement?", "Make a clear claim.")
+    assert cache.lookup("fb-1", "how can I improve my thesis statement") == "Make a clear claim."
+    assert cache.lookup("fb-2", "how can I improve my thesis statement") is None
+    assert cache.lookup("fb-1", "Is my conclusion too short?") is None
+
+
+def test_questions_without_enough_content_words_are_not_cached():
+    cache = SemanticCache(threshold=0.5)
+    cache.store("fb-1", "Why?", "Because.")
+    assert len(cache) == 0
+    cache.store("fb-1", "Why is my grade low?", "Citations are missing.")
+    assert cache.lookup("fb-1", "what?") is None
+
+
+def test_least_recently_used_answers_are_evicted():
+    cache = SemanticCache(threshold=0.85, max_entries=2)
+    cache.store("fb-1", "thesis statement clarity", "A")
+    cache.store("fb-2", "paragraph transitions flow", "B")
+    assert cache.lookup("fb-1", "thesis statement clarity") == "A"
+    cache.store("fb-3", "citation format style", "C")
+    assert len(cache) == 2
+    assert cache.lookup("fb-2", "paragraph transitions flow") is None
+    assert cache.lookup("fb-1", "thesis statement clarity") == "A"
+
+
+def test_per_feedback_limit_evicts_within_that_feedback():
+    cache = SemanticCache(threshold=0.85, max_per_feedback=1)
+    cache.store("fb-1", "thesis statement clarity", "A")
+    cache.store("fb-1", "citation format style", "B")
+    assert cache.lookup("fb-1", "thesis statement clarity") is None
+    assert cache.lookup("fb-1", "citation format style") == "B"
+
+
+def test_same_topic_with_a_different_intent_does_not_match():
+    questions = [
+        "How do I improve my thesis statement?",
+        "Is my thesis statement good?",
+        "What is a thesis statement?",
+        "Why does my thesis statement work well?",
+        "thesis statement",
+    ]
+    for i, a in enumerate(questions):
+        for b in questions[i + 1:]:
+            assert cosine(vectorize(a), vectorize(b)) < 0.85, (a, b)
+
+    cache = SemanticCache(threshold=0.85)
+    cache.store("fb-1", questions[0], "Make a clear, arguable claim.")
+    for question in questions[1:]:
+        assert cache.lookup("fb-1", question) is None
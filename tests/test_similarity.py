@@ -0,0 +1,57 @@
+from app.utils.similarity import (
+    LSHIndex,
+    band_hashes,
+    estimate_jaccard,
+    minhash_signature,
+    shingles,
+)
+
+ESSAY = (
+    "The industrial revolution changed how people lived and worked. "
+    "Factories drew families from farms into crowded cities, where new "
+    "machines set the pace of the working day and children often worked "
+    "long hours beside their parents in dangerous conditions."
+)
+
+
+def test_shingles_ignore_case_and_punctuation():
+    assert shingles("A b, C d e!", size=5) == {"a b c d e"}
+    assert shingles("short text", size=5) == {"short text"}
+    assert shingles("", size=5) == set()
+
+
+def test_identical_texts_have_identical_signatures():
+    assert minhash_signature(ESSAY) == minhash_signature(ESSAY.upper())
+
+
+def test_texts_too_short_to_compare_have_no_signature():
+    assert minhash_signature("") is None
+    assert minhash_signature("Scanned page 1", min_shingles=20) is None
+    assert minhash_signature(ESSAY, min_shingles=20) is not None
+
+
+def test_jaccard_estimate_tracks_similarity():
+    edited = ESSAY.replace("dangerous conditions", "unsafe mills")
+    unrelated = "Photosynthesis converts light energy into chemical energy in plants."
+    sig = minhash_signature(ESSAY)
+    assert estimate_jaccard(sig, minhash_signature(edited)) > 0.6
+    assert estimate_jaccard(sig, minhash_signature(unrelated)) < 0.1
+
+
+def test_band_hashes_fit_bigint():
+    keys = band_hashes(minhash_signature(ESSAY), bands=16)
+    assert len(keys) == 16
+    assert all(-(1 << 63) <= k < (1 << 63) for k in keys)
+
+
+def test_lsh_index_finds_near_duplicates():
+    index = LSHIndex(bands=16)
+    index.add("original", minhash_signature(ESSAY))
+    index.add("other", minhash_signature("An unrelated essay about volcanoes and plate tectonics."))
+
+    hits = index.query(minhash_signature(ESSAY + " The end."), threshold=0.5)
+    assert [key for key, _ in hits] == ["original"]
+
+    index.remove("original")
+    assert index.query(minhash_signature(ESSAY), threshold=0.5) == []
+    assert len(index) == 1
@@ -0,0 +1,53 @@
+import logging
+import queue
+
+import orjson
+
+from app.utils.structured_logging import (
+    JSONFormatter,
+    NonBlockingQueueHandler,
+    SamplingFilter,
+    request_id_var,
+)
+
+
+def make_record(level=logging.DEBUG, msg="row %s", args=("x",), lineno=10, created=1000.0):
+    record = logging.LogRecord("app.test", level, "values.py", lineno, msg, args, None)
+    record.created = created
+    return record
+
+
+def test_sampling_drops_excess_debug_per_call_site_and_reports_count():
+    sampler = SamplingFilter(per_second=2)
+    passed = [sampler.filter(make_record()) for _ in range(5)]
+    assert passed == [True, True, False, False, False]
+    # other call sites and higher levels are unaffected
+    assert sampler.filter(make_record(lineno=11))
+    assert all(sampler.filter(make_record(level=logging.INFO)) for _ in range(5))
+
+    next_second = make_record(created=1001.0)
+    assert sampler.filter(next_second)
+    assert next_second.dropped == 3
+
+
+def test_queue_handler_defers_formatting_and_captures_request_id():
+    log_queue = queue.Queue()
+    handler = NonBlockingQueueHandler(log_queue)
+    token = request_id_var.set("req-1")
+    try:
+        handler.handle(make_record(msg="statements %s", args=(["a", "b"],)))
+    finally:
+        request_id_var.reset(token)
+
+    record = log_queue.get_nowait()
+    assert record.msg == "statements %s" and record.args == (["a", "b"],)
+    entry = orjson.loads(JSONFormatter().format(record))
+    assert entry["message"] == "statements ['a', 'b']"
+    assert entry["request_id"] == "req-1"
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    handler.handle(make_record())
+    handler.handle(make_record())
+    assert handler.dropped == 1
@@ -0,0 +1,60 @@
+import pytest
+
+from app.utils.text_codec import ZLIB_MAX_DICTIONARY, compress, decompress, load_text, train_dictionary
+
+ESSAYS = [
+    f"In this essay I will argue that the industrial revolution changed society. For example, "
+    f"factory {i} employed children. In conclusion, the evidence suggests that reform was needed."
+    for i in range(50)
+]
+
+
+def test_round_trip_with_and_without_dictionary():
+    dictionary = train_dictionary(ESSAYS[:40])
+    text = ESSAYS[45] + " Ünïcödé survives too."
+    assert decompress(compress(text), "zlib") == text
+    assert decompress(compress(text, "zlib", dictionary), "zlib", dictionary) == text
+
+
+def test_dictionary_shrinks_small_documents():
+    dictionary = train_dictionary(ESSAYS[:40])
+    assert 0 < len(dictionary) <= ZLIB_MAX_DICTIONARY
+    text = ESSAYS[45]
+    assert len(compress(text, "zlib", dictionary)) < len(compress(text, "zlib")) / 2
+
+
+def test_unknown_codec_is_rejected():
+    with pytest.raises(ValueError):
+        compress("text", "brotli")
+
+
+class FakeQuery:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def select(self, columns):
+        return self
+
+    def in_(self, column, values):
+        return FakeQuery([r for r in self.rows if r[column] in values])
+
+    def execute(self):
+        return type("Response", (), {"data": self.rows})()
+
+
+class FakeSupabase:
+    def __init__(self, tables):
+        self.tables = tables
+
+    def table(self, name):
+        return FakeQuery(self.tables.get(name, []))
+
+
+def test_load_text_falls_back_to_unmigrated_rows():
+    supabase = FakeSupabase({
+        "submission_texts": [],
+        "submissions": [{"id": "s1", "extracted_text": "Not yet migrated"}, {"id": "s2", "extracted_text": None}],
+    })
+    assert load_text(supabase, "s1") == "Not yet migrated"
+    with pytest.raises(LookupError):
+        load_text(supabase, "s2")
@@ -0,0 +1,74 @@
+import asyncio
+import time
+
+from app.utils.usage_ledger import UsageEntry, UsageLedger, set_caller
+
+
+def entry(**overrides):
+    values = dict(feature="generate_feedback", model="gpt-4o-mini", teacher_id="t1",
+                  prompt_tokens=900, completion_tokens=300, latency_ms=1200, attempts=1)
+    values.update(overrides)
+    return UsageEntry(**values)
+
+
+def test_entries_are_written_in_batches_with_the_caller():
+    batches = []
+
+    async def scenario():
+        ledger = UsageLedger(batches.append, flush_interval=60, batch_size=2)
+        set_caller("student-1", "ask_follow_up_question")
+        ledger.record(entry())
+        await asyncio.sleep(0.05)
+        assert batches == []  # waits for the interval...
+        ledger.record(entry())
+        await asyncio.sleep(0.05)
+        assert [len(b) for b in batches] == [2]  # ...or a full batch
+        ledger.record(entry())
+        await ledger.close()
+
+    asyncio.run(scenario())
+    assert [len(b) for b in batches] == [2, 1]
+    row = batches[0][0]
+    assert row["user_id"] == "student-1" and row["endpoint"] == "ask_follow_up_question"
+    assert row["teacher_id"] == "t1" and row["prompt_tokens"] == 900
+
+
+def test_failed_writes_are_retried_and_the_buffer_is_bounded():
+    written = []
+    failing = [True]
+
+    def writer(rows):
+        if failing[0]:
+            raise RuntimeError("database unavailable")
+        written.extend(rows)
+
+    async def scenario():
+        ledger = UsageLedger(writer, flush_interval=60, batch_size=10, max_buffer=3)
+        for i in range(5):
+            ledger.record(entry(latency_ms=i))
+        await ledger.flush()
+        assert ledger.dropped == 2 and not written
+        failing[0] = False
+        await ledger.close()
+
+    asyncio.run(scenario())
+    assert [row["latency_ms"] for row in written] == [2, 3, 4]
+    assert written[0]["user_id"] is None
+
+
+def test_close_waits_for_a_batch_being_written():
+    written = []
+
+    def slow_writer(rows):
+        time.sleep(0.1)
+        written.extend(rows)
+
+    async def scenario():
+        ledger = UsageLedger(slow_writer, flush_interval=60, batch_size=2)
+        ledger.record(entry())
+        ledger.record(entry())
+        await asyncio.sleep(0.02)  # the flusher has taken the batch and is writing it
+        await ledger.close()
+
+    asyncio.run(scenario())
+    assert len(written) == 2
@@ -0,0 +1,34 @@
+from datetime import date
+
+from app.utils.values_analytics import iso_week, summarize, week_start
+
+STATEMENTS = [
+    {"id": "s1", "text": "It is better to be kind than to be right."},
+    {"id": "s2", "text": "Technology is making us less human."},
+    {"id": "s3", "text": "The purpose of education is to prepare students for the workforce."},
+]
+
+
+def test_week_start_and_iso_label():
+    assert week_start(date(2024, 9, 15)) == date(2024, 9, 9)  # Sunday -> Monday
+    assert iso_week(date(2024, 9, 9)) == "2024-W37"
+    assert iso_week(date(2024, 12, 30)) == "2025-W01"
+
+
+def test_summarize_splits_by_week_in_catalog_order():
+    rows = [
+        {"statement_id": "s2", "week_start": "2024-09-16", "stance": "for", "response_count": 3},
+        {"statement_id": "s1", "week_start": "2024-09-16", "stance": "against", "response_count": 1},
+        {"statement_id": "s1", "week_start": "2024-09-09", "stance": "for", "response_count": 4},
+        {"statement_id": "s1", "week_start": "2024-09-09", "stance": "against", "response_count": 2},
+    ]
+    result = summarize(rows, STATEMENTS)
+
+    assert [r["statement_id"] for r in result] == ["s1", "s2"]
+    s1 = result[0]
+    assert (s1["for_count"], s1["against_count"]) == (4, 3)
+    assert [(w["week"], w["for_count"], w["against_count"]) for w in s1["weeks"]] == [
+        ("2024-W37", 4, 2),
+        ("2024-W38", 0, 1),
+    ]
+    assert result[1]["weeks"][0]["week_start"] == date(2024, 9, 16)